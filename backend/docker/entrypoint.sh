@@ -23,4 +23,10 @@ else
   echo "Key pair generation complete."
 fi
 
+# Prometheus multiprocess mode: drop samples left by processes of the previous run
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec "$@"
@@ -1,4 +1,4 @@
-APPS_MODULE_NAME = ["apps.communities", "apps.users", "apps.votes", "apps.posts", "apps.notifications"]
+APPS_MODULE_NAME = ["apps.communities", "apps.users", "apps.votes", "apps.posts", "apps.notifications", "apps.search"]
 
 APPS_THIRD_PARTY = [
     "graphene_django", 
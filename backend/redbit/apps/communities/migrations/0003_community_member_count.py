@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:17
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_member_counts(apps, schema_editor):
+    Community = apps.get_model("communities", "Community")
+    Membership = Community.members.through
+
+    counts = Membership.objects.values("community_id").annotate(n=Count("id")).order_by()
+    for row in counts.iterator():
+        Community.objects.filter(pk=row["community_id"]).update(member_count=row["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communities', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='member_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_member_counts, migrations.RunPython.noop),
+    ]
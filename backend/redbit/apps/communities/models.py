@@ -12,6 +12,9 @@ class Community(TimestampedModel):
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name="owned_communities", null=True, blank=True
     )
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="joined_communities", blank=True)
+    # จำนวนสมาชิก อัปเดตทุกครั้งที่ members เปลี่ยน (ดู apps.communities.signals)
+    # ใช้หา community ใหญ่ของ home feed ด้วย index แทน GROUP BY บนตาราง membership
+    member_count = models.PositiveIntegerField(default=0, db_index=True)
 
     # ไม่ต้องมี created_at, updated_at แล้ว เพราะอยู่ใน TimestampedModel
 
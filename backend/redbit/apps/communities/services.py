@@ -0,0 +1,23 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Community
+
+
+def rebuild_member_counts():
+    """
+    คำนวณ member_count ของทุก community ใหม่จากตาราง membership
+    (หลัง insert membership ตรงๆ ที่ไม่ผ่าน signal เช่น seeding)
+
+    Returns:
+        จำนวน community ที่ถูกอัปเดต
+    """
+    Membership = Community.members.through
+    counts = (
+        Membership.objects.filter(community_id=OuterRef("pk"))
+        .order_by()
+        .values("community_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Community.objects.update(member_count=Coalesce(Subquery(counts), 0))
@@ -0,0 +1,39 @@
+"""
+ทำให้ Community.member_count ตรงกับตาราง membership เสมอ (ทั้ง community.members และ user.joined_communities)
+"""
+from django.db.models import F
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import Community
+
+
+def _apply(deltas):
+    for community_id, delta in deltas.items():
+        if delta:
+            Community.objects.filter(pk=community_id).update(member_count=F("member_count") + delta)
+
+
+@receiver(m2m_changed, sender=Community.members.through)
+def update_member_count(sender, instance, action, reverse, pk_set, **kwargs):
+    memberships = sender.objects
+    if action == "post_add":
+        # pk_set ของ add มีเฉพาะแถวที่ถูกเพิ่มจริง
+        _apply({pk: 1 for pk in pk_set} if reverse else {instance.pk: len(pk_set)})
+
+    # remove ส่ง pk ที่ขอมาทั้งหมด (รวมที่ไม่ได้เป็นสมาชิก) และ clear ไม่ส่ง pk จึงหาแถวที่มีอยู่จริงก่อนลบ
+    elif action == "pre_remove":
+        if reverse:
+            removed = memberships.filter(user_id=instance.pk, community_id__in=pk_set).values_list("community_id")
+            instance._member_count_deltas = {community_id: -1 for (community_id,) in removed}
+        else:
+            removed = memberships.filter(community_id=instance.pk, user_id__in=pk_set).count()
+            instance._member_count_deltas = {instance.pk: -removed}
+    elif action == "pre_clear" and reverse:
+        joined = memberships.filter(user_id=instance.pk).values_list("community_id")
+        instance._member_count_deltas = {community_id: -1 for (community_id,) in joined}
+    elif action in ("post_remove", "post_clear"):
+        if action == "post_clear" and not reverse:
+            Community.objects.filter(pk=instance.pk).update(member_count=0)
+        else:
+            _apply(instance.__dict__.pop("_member_count_deltas", {}))
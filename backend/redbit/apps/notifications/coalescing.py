@@ -0,0 +1,285 @@
+"""
+รวม notification ก่อนเขียน (coalescing)
+
+create_notification ไม่ส่ง Celery task ต่อ event แต่ push event เข้า buffer ใน Redis (list เดียว)
+และตั้ง task flush_notifications เพียงตัวเดียวต่อ window (NOTIFICATION_COALESCE_SECONDS)
+เมื่อ flush event ถูกจัดกลุ่มตาม (ผู้รับ, ประเภท, object) แต่ละกลุ่มกลายเป็น notification เดียว
+เช่น "alice and 41 others upvoted your post: ..." แล้วเขียนทั้ง window ด้วย bulk_create ครั้งเดียว
+
+window = 0 หรือไม่มี Redis: ส่ง task ต่อ event ทันทีเหมือนเดิม (latency ต่ำสุด แต่ไม่รวม)
+
+flush ย้าย buffer ไปที่ key ของรอบนั้น (processing key) ก่อน และลบทิ้งหลัง bulk_create สำเร็จเท่านั้น
+ถ้าเขียนไม่สำเร็จ event ถูกคืนเข้าหัว buffer ให้ flush รอบถัดไป (ไม่เกิน MAX_ATTEMPTS ครั้ง)
+ถ้า worker ตายกลางทาง processing key ที่ค้างเกิน STALE_PROCESSING ถูกคืนเข้า buffer โดย flush รอบหลัง
+"""
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+
+from apps.notifications import unread
+from core.redis import get_redis
+from django.conf import settings
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "notifications:pending"
+SCHEDULED_KEY = "notifications:flush_scheduled"
+PROCESSING_PREFIX = "notifications:processing:"
+# เผื่อเวลาที่ task รอในคิว ถ้า flush หายไป key หมดอายุเองและ event ถัดไปตั้ง flush ใหม่
+SCHEDULE_GRACE = 60  # seconds
+# processing key ที่ค้างนานกว่านี้ถือว่า flush ของมันตายไปแล้ว
+STALE_PROCESSING = 10 * 60  # seconds
+# จำนวนครั้งที่ event ถูกลองเขียน ก่อนถูกทิ้ง (กัน event เสียวนซ้ำทุก flush)
+MAX_ATTEMPTS = 3
+
+# ย้าย buffer ทั้งก้อนไปที่ processing key (RENAME ใช้ไม่ได้เมื่อ buffer ว่าง)
+_TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+return 1
+"""
+
+# คืน processing key เข้าหัว buffer ตามลำดับเดิม แล้วลบทิ้ง
+_RESTORE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+for i = #items, 1, -1 do
+    redis.call('LPUSH', KEYS[2], items[i])
+end
+redis.call('DEL', KEYS[1])
+return #items
+"""
+
+# related_object ของ follow คือตัวผู้ follow เอง จึงรวมทุก follow ของผู้รับเป็นกลุ่มเดียว
+GROUP_BY_RECIPIENT = {"follow"}
+
+
+def coalesce_seconds():
+    return getattr(settings, "NOTIFICATION_COALESCE_SECONDS", 5)
+
+
+def make_event(recipient, sender, notification_type, message, content_type_id=None, object_id=None):
+    """event ที่เก็บใน buffer / ส่งให้ task (JSON ได้)"""
+    return {
+        "recipient_id": recipient.id,
+        "sender_id": sender.id if sender else None,
+        "sender_name": sender.username if sender else None,
+        "notification_type": notification_type,
+        "message": message,
+        "content_type_id": content_type_id,
+        "object_id": object_id,
+    }
+
+
+def enqueue(event):
+    """push event เข้า buffer และตั้ง flush ถ้ายังไม่มีตัวที่รออยู่"""
+    from tasks.notifications import deliver_notifications_task, flush_notifications
+
+    window = coalesce_seconds()
+    client = get_redis() if window > 0 else None
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.rpush(BUFFER_KEY, json.dumps(event))
+            pipe.set(SCHEDULED_KEY, 1, nx=True, ex=window + SCHEDULE_GRACE)
+            _, scheduled = pipe.execute()
+        except RedisError:
+            logger.warning("Notification buffer unavailable, delivering directly", exc_info=True)
+        else:
+            if scheduled:
+                flush_notifications.apply_async(countdown=window)
+            return
+    deliver_notifications_task.delay([event])
+
+
+def _processing_key():
+    # เวลาที่ขึ้นต้น key ใช้ตัดสินว่าค้างหรือยัง (recover)
+    return f"{PROCESSING_PREFIX}{int(time.time())}:{uuid.uuid4().hex}"
+
+
+def drain(client):
+    """
+    ย้าย event ทั้งหมดออกจาก buffer ไปที่ processing key ใหม่ (ยังไม่ลบ)
+
+    Returns:
+        (processing key, list ของ event) หรือ (None, []) ถ้า buffer ว่าง
+    """
+    # ลบ key ก่อน event ที่เข้ามาหลังจากนี้จะตั้ง flush รอบใหม่เอง
+    client.delete(SCHEDULED_KEY)
+    key = _processing_key()
+    if not client.register_script(_TAKE_SCRIPT)(keys=[BUFFER_KEY, key]):
+        return None, []
+    return key, [json.loads(item) for item in client.lrange(key, 0, -1)]
+
+
+def requeue(client, key, events):
+    """คืน event ที่เขียนไม่สำเร็จเข้าหัว buffer แล้วลบ processing key (event ที่ลองครบแล้วถูกทิ้ง)"""
+    retry = [{**event, "attempts": event.get("attempts", 0) + 1} for event in events]
+    dropped = sum(1 for event in retry if event["attempts"] >= MAX_ATTEMPTS)
+    if dropped:
+        logger.error("Dropping %d notification events after %d attempts", dropped, MAX_ATTEMPTS)
+    retry = [json.dumps(event) for event in retry if event["attempts"] < MAX_ATTEMPTS]
+    pipe = client.pipeline()
+    if retry:
+        pipe.lpush(BUFFER_KEY, *reversed(retry))
+    pipe.delete(key)
+    pipe.execute()
+
+
+def recover(client, now=None):
+    """คืน processing key ที่ค้าง (flush ตายก่อนเขียนเสร็จ) เข้า buffer คืนจำนวน event ที่คืน"""
+    now = time.time() if now is None else now
+    restore = client.register_script(_RESTORE_SCRIPT)
+    restored = 0
+    for key in client.scan_iter(match=f"{PROCESSING_PREFIX}*"):
+        if isinstance(key, bytes):
+            key = key.decode()
+        started = int(key.removeprefix(PROCESSING_PREFIX).split(":", 1)[0])
+        if now - started >= STALE_PROCESSING:
+            restored += restore(keys=[key, BUFFER_KEY])
+    if restored:
+        logger.warning("Restored %d notification events from an unfinished flush", restored)
+    return restored
+
+
+def _group_key(event):
+    if event["notification_type"] in GROUP_BY_RECIPIENT:
+        return event["recipient_id"], event["notification_type"]
+    return event["recipient_id"], event["notification_type"], event["content_type_id"], event["object_id"]
+
+
+def _collapsed_message(event, others):
+    """ข้อความของ event ล่าสุด โดยแทนชื่อผู้ส่งที่ขึ้นต้นด้วย "<ชื่อ> and N others" """
+    if not others:
+        return event["message"]
+    name, message = event["sender_name"], event["message"]
+    actors = f"{others} other" if others == 1 else f"{others} others"
+    if name and message.startswith(name):
+        return f"{name} and {actors}{message[len(name):]}"
+    return f"{message} (and {actors})"
+
+
+def coalesce(events):
+    """
+    รวม event ที่อยู่กลุ่มเดียวกันเป็นหนึ่งรายการ (ผู้ส่งคือคนล่าสุด ผู้ส่งซ้ำนับครั้งเดียว)
+
+    Returns:
+        list ของ event ตามลำดับที่กลุ่มปรากฏครั้งแรก
+    """
+    groups = {}
+    for event in events:
+        groups.setdefault(_group_key(event), []).append(event)
+
+    coalesced = []
+    for group in groups.values():
+        latest = group[-1]
+        senders = {event["sender_id"] for event in group}
+        coalesced.append({**latest, "message": _collapsed_message(latest, len(senders) - 1)})
+    return coalesced
+
+
+def deliver(events):
+    """เขียน notification ของ event ชุดหนึ่งด้วย bulk_create แล้วส่งแบบ real-time ผ่าน Channels"""
+    return announce(store(events))
+
+
+def store(events):
+    """
+    รวม event แล้วเขียนด้วย bulk_create
+
+    Returns:
+        list ของ (notification, ชื่อผู้ส่ง) สำหรับ announce()
+    """
+    from apps.notifications.models import Notification
+    from apps.users.models import User
+
+    coalesced = coalesce(events)
+    user_ids = {event["recipient_id"] for event in coalesced}
+    user_ids.update(event["sender_id"] for event in coalesced if event["sender_id"])
+    # user ที่ถูกลบไประหว่างรอ flush
+    existing = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+
+    pending = []
+    for event in coalesced:
+        if event["recipient_id"] not in existing:
+            continue
+        sender_id = event["sender_id"] if event["sender_id"] in existing else None
+        notification = Notification(
+            recipient_id=event["recipient_id"],
+            sender_id=sender_id,
+            notification_type=event["notification_type"],
+            message=event["message"],
+            content_type_id=event["content_type_id"],
+            object_id=event["object_id"],
+        )
+        pending.append((notification, event["sender_name"] if sender_id else None))
+
+    Notification.objects.bulk_create([notification for notification, _ in pending])
+    return pending
+
+
+def announce(pending):
+    """ส่ง notification ที่เขียนแล้วไปที่ Channels และเพิ่ม unread counter คืน list ของ notification"""
+    for notification, sender_name in pending:
+        publish(notification, sender_name)
+    unread.adjust(Counter(notification.recipient_id for notification, _ in pending))
+    return [notification for notification, _ in pending]
+
+
+def flush():
+    """เขียน event ทั้งหมดที่รออยู่ใน buffer (ไม่มี Redis = ไม่มีอะไรค้าง)"""
+    client = get_redis()
+    if client is None:
+        return 0
+    recover(client)
+    key, events = drain(client)
+    if not events:
+        return 0
+    try:
+        pending = store(events)
+    except Exception:
+        logger.exception("Failed to write %d notification events, requeued", len(events))
+        requeue(client, key, events)
+        return 0
+    # เขียนแล้ว: ลบก่อนส่ง เพื่อไม่ให้ event ถูกเขียนซ้ำถ้าการส่งล้ม
+    client.delete(key)
+    try:
+        return len(announce(pending))
+    except Exception:
+        # เหมือนการสร้างทีละรายการเดิม: การส่ง real-time ไม่สำคัญพอจะทำให้ task ค้างหรือวนซ้ำ
+        logger.exception("Failed to publish %d notifications", len(pending))
+        return len(pending)
+
+
+def publish(notification, sender_name=None):
+    """ส่ง notification ไปที่ group ของผู้รับใน Channels"""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    from core import metrics
+
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    group = f"user_{notification.recipient_id}_notifications"
+    metrics.count_group_send(group)
+    async_to_sync(channel_layer.group_send)(
+        group,
+        {
+            "type": "notification_message",
+            "notification": {
+                "id": str(notification.id),
+                "message": notification.message,
+                "notificationType": notification.notification_type,
+                "isRead": notification.is_read,
+                "createdAt": notification.created_at.isoformat(),
+                "sender": {
+                    "id": str(notification.sender_id),
+                    "username": sender_name,
+                } if notification.sender_id else None,
+            },
+        },
+    )
@@ -1,10 +1,15 @@
+from apps.notifications import coalescing
 from django.contrib.contenttypes.models import ContentType
-from tasks.notifications import create_notification_task
+from django.db import transaction
 
 
 def create_notification(recipient, sender, notification_type, message, related_object=None):
     """
-    Service function to create notifications asynchronously using Celery.
+    Service function to create notifications asynchronously.
+
+    Events are buffered and coalesced per recipient for
+    NOTIFICATION_COALESCE_SECONDS before they are written in bulk
+    (see ``apps.notifications.coalescing``).
     
     Args:
         recipient: User who will receive the notification
@@ -24,14 +29,8 @@ def create_notification(recipient, sender, notification_type, message, related_o
         content_type_id = content_type.id
         object_id = related_object.id
     
-    # Dispatch Celery task asynchronously
-    create_notification_task.delay(
-        recipient_id=recipient.id,
-        sender_id=sender.id if sender else None,
-        notification_type=notification_type,
-        message=message,
-        content_type_id=content_type_id,
-        object_id=object_id
-    )
+    event = coalescing.make_event(recipient, sender, notification_type, message, content_type_id, object_id)
+    # only events of committed writes (e.g. the vote) are delivered
+    transaction.on_commit(lambda: coalescing.enqueue(event))
     
     return None  # Task is async, no immediate return value
@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase
+
+from .coalescing import _collapsed_message, coalesce
+
+
+def event(sender_id, sender_name, notification_type="vote", object_id=1, recipient_id=100, message=None):
+    return {
+        "recipient_id": recipient_id,
+        "sender_id": sender_id,
+        "sender_name": sender_name,
+        "notification_type": notification_type,
+        "message": message or f"{sender_name} upvoted your post: Hello",
+        "content_type_id": 7,
+        "object_id": object_id,
+    }
+
+
+class CollapsedMessageTests(SimpleTestCase):
+    def test_single_sender_keeps_message(self):
+        self.assertEqual(_collapsed_message(event(1, "alice"), 0), "alice upvoted your post: Hello")
+
+    def test_other_senders_follow_the_name(self):
+        self.assertEqual(_collapsed_message(event(1, "alice"), 1), "alice and 1 other upvoted your post: Hello")
+        self.assertEqual(_collapsed_message(event(1, "alice"), 41), "alice and 41 others upvoted your post: Hello")
+
+    def test_message_without_the_name_gets_a_suffix(self):
+        self.assertEqual(
+            _collapsed_message(event(1, "alice", message="New vote on your post"), 2),
+            "New vote on your post (and 2 others)",
+        )
+
+    def test_no_sender_name(self):
+        self.assertEqual(_collapsed_message(event(None, None, message="Welcome back"), 1), "Welcome back (and 1 other)")
+
+
+class CoalesceTests(SimpleTestCase):
+    def test_same_object_becomes_one_notification_from_the_latest_sender(self):
+        result = coalesce([event(1, "alice"), event(2, "bob"), event(3, "carol")])
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["sender_id"], 3)
+        self.assertEqual(result[0]["message"], "carol and 2 others upvoted your post: Hello")
+
+    def test_repeated_sender_counts_once(self):
+        result = coalesce([event(1, "alice"), event(2, "bob"), event(1, "alice")])
+
+        self.assertEqual(result[0]["message"], "alice and 1 other upvoted your post: Hello")
+
+    def test_different_objects_recipients_and_types_stay_apart(self):
+        result = coalesce(
+            [
+                event(1, "alice", object_id=1),
+                event(2, "bob", object_id=2),
+                event(3, "carol", recipient_id=200),
+                event(4, "dave", notification_type="comment", message="dave commented on your post"),
+                event(5, "erin", object_id=1),
+            ]
+        )
+
+        # in the order each group first appeared
+        self.assertEqual([item["sender_id"] for item in result], [5, 2, 3, 4])
+        self.assertEqual(result[0]["message"], "erin and 1 other upvoted your post: Hello")
+        self.assertEqual(result[1]["message"], "bob upvoted your post: Hello")
+
+    def test_follows_group_by_recipient(self):
+        follows = [
+            event(sender_id, name, notification_type="follow", object_id=sender_id, message=f"{name} followed you")
+            for sender_id, name in ((1, "alice"), (2, "bob"))
+        ]
+
+        result = coalesce(follows)
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["message"], "bob and 1 other followed you")
@@ -0,0 +1,167 @@
+"""
+จำนวน notification ที่ยังไม่อ่านต่อ user (Redis counter)
+
+badge อ่านค่าเดียวด้วย GET แทน COUNT(*) บนตาราง notifications
+- key ถูกสร้างจากฐานข้อมูลตอนอ่านครั้งแรก และหมดอายุเมื่อ user ไม่ active (UNREAD_TTL)
+- notification ใหม่ (coalescing.deliver) เพิ่มค่า MarkNotificationRead ลดค่าหรือตั้งเป็น 0
+  โดยแก้เฉพาะ key ที่มีอยู่ (ยังไม่มี = จะถูกนับจากฐานข้อมูลตอนอ่าน)
+- task reconcile_unread_counts (Celery Beat) ตั้งค่าทุก key ใหม่จากตารางเป็นระยะ แก้ค่าที่คลาดไป
+
+ทุกครั้งที่ค่าเปลี่ยน ค่าใหม่ถูก push ไปที่ group ของ user ใน Channels (subscription onUnreadCountChanged)
+"""
+import logging
+
+from core.redis import get_redis
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+UNREAD_TTL = 24 * 60 * 60  # seconds
+KEY_PREFIX = "notifications:unread:"
+
+# INCRBY เฉพาะ key ที่มีอยู่ ไม่ให้ติดลบ และต่ออายุ key ของ user ที่ยัง active
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    value = 0
+    redis.call('SET', KEYS[1], 0)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return value
+"""
+
+
+def unread_key(user_id):
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def _unread_rows():
+    from apps.notifications.models import Notification
+
+    # อ่านจาก primary เสมอ ค่านี้ถูกเก็บต่อ จึงต้องไม่ช้ากว่าการเขียนเหมือน replica
+    return Notification.objects.using(DEFAULT_DB_ALIAS).filter(is_read=False)
+
+
+def get_count(user_id):
+    """จำนวนที่ยังไม่อ่าน (O(1) เมื่อ key มีอยู่แล้ว)"""
+    client = get_redis()
+    if client is None:
+        return _unread_rows().filter(recipient_id=user_id).count()
+    try:
+        value = client.get(unread_key(user_id))
+        if value is not None:
+            return int(value)
+        count = _unread_rows().filter(recipient_id=user_id).count()
+        # nx: ไม่ทับค่าที่ request อื่นเพิ่งสร้าง
+        client.set(unread_key(user_id), count, ex=UNREAD_TTL, nx=True)
+        return count
+    except RedisError:
+        logger.warning("Unread counter unavailable for user %s", user_id, exc_info=True)
+        return _unread_rows().filter(recipient_id=user_id).count()
+
+
+def adjust(deltas):
+    """
+    บวก delta ให้ counter ของหลาย user ({user_id: delta}) แล้ว push ค่าใหม่
+
+    Returns:
+        dict ของ user_id -> ค่าใหม่ (เฉพาะ user ที่มี key อยู่)
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    client = get_redis()
+    if client is None or not deltas:
+        return {}
+    try:
+        script = client.register_script(_ADJUST_SCRIPT)
+        pipe = client.pipeline(transaction=False)
+        for user_id, delta in deltas.items():
+            script(keys=[unread_key(user_id)], args=[delta, UNREAD_TTL], client=pipe)
+        values = pipe.execute()
+    except RedisError:
+        logger.warning("Unread counter update failed", exc_info=True)
+        return {}
+
+    counts = {user_id: value for user_id, value in zip(deltas, values, strict=True) if value is not None}
+    for user_id, count in counts.items():
+        publish(user_id, count)
+    return counts
+
+
+def reset(user_id):
+    """ตั้งเป็น 0 หลังอ่านทั้งหมด"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.set(unread_key(user_id), 0, ex=UNREAD_TTL)
+    except RedisError:
+        logger.warning("Unread counter reset failed for user %s", user_id, exc_info=True)
+        return
+    publish(user_id, 0)
+
+
+def reconcile(batch_size=1000):
+    """
+    ตั้ง counter ที่มีอยู่ทั้งหมดใหม่จากตาราง (แก้ค่าที่คลาดจาก race หรือ Redis ล่ม)
+
+    Returns:
+        จำนวน counter ที่ค่าไม่ตรงและถูกแก้
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+
+    corrected = 0
+    batch = []
+    for key in client.scan_iter(match=f"{KEY_PREFIX}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            corrected += _reconcile_batch(client, batch)
+            batch = []
+    if batch:
+        corrected += _reconcile_batch(client, batch)
+    return corrected
+
+
+def _user_id(key):
+    if isinstance(key, bytes):
+        key = key.decode()
+    return int(key.removeprefix(KEY_PREFIX))
+
+
+def _reconcile_batch(client, keys):
+    user_ids = [_user_id(key) for key in keys]
+    rows = (
+        _unread_rows().filter(recipient_id__in=user_ids).values("recipient_id").annotate(count=Count("id")).order_by()
+    )
+    actual = {row["recipient_id"]: row["count"] for row in rows}
+
+    corrected = 0
+    for user_id, value in zip(user_ids, client.mget(keys), strict=True):
+        count = actual.get(user_id, 0)
+        if value is None or int(value) == count:
+            continue
+        # xx: key ที่หมดอายุระหว่างนี้ไม่ถูกสร้างกลับ
+        if client.set(unread_key(user_id), count, xx=True, keepttl=True):
+            publish(user_id, count)
+            corrected += 1
+    return corrected
+
+
+def publish(user_id, count):
+    """ส่งจำนวนใหม่ไปที่ group ของ user ใน Channels"""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    from core import metrics
+
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    group = f"user_{user_id}_notifications"
+    metrics.count_group_send(group)
+    async_to_sync(channel_layer.group_send)(group, {"type": "unread_count_message", "count": count})
@@ -0,0 +1,201 @@
+"""
+Ranked feed cache (Redis sorted sets)
+
+แต่ละ feed (community, sort, window) เก็บ post id ที่อันดับสูงสุด FEED_CACHE_SIZE รายการ
+ไว้ใน sorted set และถูกอัปเดตทีละรายการเมื่อมีการสร้าง/ลบโพสต์หรือโหวต
+หน้าแรกๆ ของ feed จึงอ่านได้จาก Redis แล้ว hydrate ด้วย primary key
+โดยไม่ต้อง ORDER BY บนตาราง posts
+"""
+import logging
+
+from core.redis import get_redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+FEED_CACHE_SIZE = 1000
+FEED_CACHE_TTL = 60 * 60  # seconds
+# feed ที่มี window (top ของวัน/สัปดาห์/เดือน) ไม่ถูกอัปเดตทีละโหวต จึงให้หมดอายุเร็วกว่า
+WINDOW_FEED_TTL = 5 * 60  # seconds
+
+SORTS = ("new", "top", "hot")
+ALL_TIME = "all"
+
+# field บน Post ที่ใช้เป็น score ของแต่ละ sort (ตรงกับ apps.posts.ranking.POST_ORDERINGS)
+SCORE_FIELDS = {"new": "created_at", "top": "upvotes", "hot": "hot_score"}
+
+# ZADD เฉพาะ feed ที่มีอยู่ แล้วตัดให้เหลือ ARGV[3] รายการ ในคำสั่งเดียว
+# (ถ้า key หมดอายุระหว่างเช็คกับเขียน ZADD แยกจะสร้าง key ใหม่ที่ไม่มี TTL และไม่ครบ)
+# feed ที่เต็มแล้วไม่มีโพสต์ทั้งหมดอีกต่อไป จึงลบเครื่องหมาย :complete
+_UPSERT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[2])
+end
+return 1
+"""
+
+
+def feed_key(community_id, sort, window=ALL_TIME):
+    return f"feed:{community_id or 'all'}:{sort}:{window}"
+
+
+def _member(post_id):
+    # zero-pad เพื่อให้ลำดับ lexicographic ของ member ที่ score เท่ากัน ตรงกับ ORDER BY id
+    return f"{int(post_id):012d}"
+
+
+def _score(post, sort):
+    value = getattr(post, SCORE_FIELDS[sort])
+    if sort == "new":
+        return value.timestamp()
+    return float(value)
+
+
+def _scopes(post):
+    return (None, post.community_id)
+
+
+def _rows(community_id, sort, window):
+    """(post id, score) ของ FEED_CACHE_SIZE อันดับแรกจากฐานข้อมูล"""
+    from apps.posts.models import Post
+    from apps.posts.ranking import POST_ORDERINGS, top_post_totals
+
+    if window != ALL_TIME:
+        # top แบบมี window คิดจาก VoteRollup รายชั่วโมง
+        return top_post_totals(window, community_id=community_id, limit=FEED_CACHE_SIZE)
+
+    queryset = Post.objects.all()
+    if community_id:
+        queryset = queryset.filter(community_id=community_id)
+    posts = queryset.order_by(*POST_ORDERINGS[sort]).only("id", "community_id", SCORE_FIELDS[sort])
+    return [(post.id, _score(post, sort)) for post in posts[:FEED_CACHE_SIZE]]
+
+
+def _build(client, community_id, sort, window=ALL_TIME):
+    """เติม feed ที่ยังไม่มีใน cache จากฐานข้อมูล (ครั้งเดียวต่อ TTL)"""
+    rows = _rows(community_id, sort, window)
+    ttl = FEED_CACHE_TTL if window == ALL_TIME else WINDOW_FEED_TTL
+
+    key = feed_key(community_id, sort, window)
+    pipe = client.pipeline()
+    pipe.delete(key, f"{key}:complete")
+    if rows:
+        pipe.zadd(key, {_member(post_id): float(score) for post_id, score in rows})
+    # เครื่องหมายว่า feed นี้มีโพสต์ทั้งหมดอยู่ใน cache แล้ว (ไม่ต้อง fallback ไป DB ตอนหน้าท้ายๆ)
+    if len(rows) < FEED_CACHE_SIZE:
+        pipe.set(f"{key}:complete", 1, ex=ttl)
+    pipe.expire(key, ttl)
+    pipe.execute()
+
+
+def _upsert(client, key, post_id, score):
+    """เพิ่ม/อัปเดต post ใน feed ที่ถูก build แล้วเท่านั้น แล้วตัดให้เหลือ FEED_CACHE_SIZE"""
+    script = client.register_script(_UPSERT_SCRIPT)
+    script(keys=[key, f"{key}:complete"], args=[_member(post_id), score, FEED_CACHE_SIZE])
+
+
+def add_post(post):
+    """เรียกหลังสร้างโพสต์ใหม่"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        for community_id in _scopes(post):
+            for sort in SORTS:
+                _upsert(client, feed_key(community_id, sort), post.id, _score(post, sort))
+    except RedisError:
+        logger.warning("Feed cache update failed for post %s", post.id, exc_info=True)
+
+
+def update_post(post, sorts=("top", "hot")):
+    """เรียกเมื่อ score ของโพสต์เปลี่ยน (โหวต / คำนวณ hot score ใหม่)"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        for community_id in _scopes(post):
+            for sort in sorts:
+                _upsert(client, feed_key(community_id, sort), post.id, _score(post, sort))
+    except RedisError:
+        logger.warning("Feed cache update failed for post %s", post.id, exc_info=True)
+
+
+def remove_post(post_id, community_id):
+    """เรียกหลังลบโพสต์"""
+    from apps.posts.ranking import TOP_WINDOWS
+
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        keys = [feed_key(scope, sort) for scope in (None, community_id) for sort in SORTS]
+        # top แบบมี window ไม่ถูกอัปเดตทีละโหวต แต่โพสต์ที่ลบแล้วต้องหายไปทันที
+        keys += [feed_key(scope, "top", window) for scope in (None, community_id) for window in TOP_WINDOWS]
+        pipe = client.pipeline()
+        for key in keys:
+            pipe.zrem(key, _member(post_id))
+        pipe.execute()
+    except RedisError:
+        logger.warning("Feed cache removal failed for post %s", post_id, exc_info=True)
+
+
+def invalidate(sort):
+    """ลบทุก feed ของ sort นี้ (ใช้หลัง sweep hot score ซึ่งเปลี่ยน score ของทุกโพสต์)"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        keys = list(client.scan_iter(match=f"feed:*:{sort}:*"))
+        if keys:
+            client.delete(*keys)
+    except RedisError:
+        logger.warning("Feed cache invalidation failed for sort %s", sort, exc_info=True)
+
+
+def get_page_ids(community_id, sort, first, after_id=None, offset=0, window=ALL_TIME, with_scores=False):
+    """
+    คืน list ของ post id สำหรับหน้าที่ขอ หรือ None ถ้าหน้านั้นอยู่นอกช่วงที่ cache ไว้
+    (ให้ผู้เรียก fallback ไปใช้ keyset query บนฐานข้อมูล)
+    with_scores=True คืน list ของ (post id, score) แทน
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    key = feed_key(community_id, sort, window)
+    try:
+        if not client.exists(key):
+            _build(client, community_id, sort, window)
+
+        if after_id is not None:
+            rank = client.zrevrank(key, _member(after_id))
+            if rank is None:
+                return None
+            start = rank + 1
+        else:
+            start = offset or 0
+
+        pipe = client.pipeline()
+        pipe.zcard(key)
+        pipe.exists(f"{key}:complete")
+        pipe.zrevrange(key, start, start + first - 1, withscores=with_scores)
+        size, complete, members = pipe.execute()
+    except RedisError:
+        logger.warning("Feed cache read failed for %s", key, exc_info=True)
+        return None
+
+    if start + first > size and not complete:
+        return None
+    if with_scores:
+        return [(int(member), score) for member, score in members]
+    return [int(member) for member in members]
+
+
+def hydrate(post_ids, queryset):
+    """โหลดโพสต์ตาม id แล้วเรียงตามลำดับของ feed"""
+    posts = queryset.in_bulk(post_ids)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -0,0 +1,33 @@
+from apps.posts.models import Comment, Post
+from apps.posts.services import rebuild_vote_counters, rebuild_vote_rollups
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild denormalized upvotes/downvotes/score counters and hourly vote rollups "
+        "on Post and Comment from the Vote table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_update batch")
+        parser.add_argument(
+            "--model",
+            choices=["post", "comment", "all"],
+            default="all",
+            help="Which model's counters to rebuild",
+        )
+        parser.add_argument("--skip-rollups", action="store_true", help="Only rebuild the counters on the rows")
+
+    def handle(self, *args, **options):
+        models = {"post": [Post], "comment": [Comment], "all": [Post, Comment]}[options["model"]]
+
+        for model in models:
+            updated = rebuild_vote_counters(model, batch_size=options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ Rebuilt vote counters for {updated} {model._meta.verbose_name_plural}")
+            )
+            if not options["skip_rollups"]:
+                created = rebuild_vote_rollups(model, batch_size=options["batch_size"])
+                label = model._meta.verbose_name_plural
+                self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {created} hourly vote rollups for {label}"))
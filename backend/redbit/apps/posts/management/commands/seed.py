@@ -0,0 +1,51 @@
+from apps.posts.seeding import BATCH_SIZE, DEFAULT_SIZES, Skew, copy_supported, seed
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate users, follows, communities, posts, threaded comments and votes with skewed popularity "
+        "(PostgreSQL COPY when available, otherwise bulk_create)"
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f"--{name}", type=int, default=default, help=f"Number of {name} to create")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per COPY/bulk_create batch")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed, same data)")
+        skew = Skew()
+        for name in ("communities", "posts", "authors", "follows"):
+            parser.add_argument(
+                f"--{name}-skew",
+                type=float,
+                default=getattr(skew, name),
+                help=f"Zipf exponent of {name} popularity (0 = uniform)",
+            )
+        parser.add_argument("--no-copy", action="store_true", help="Use bulk_create even on PostgreSQL")
+        parser.add_argument("--skip-search-index", action="store_true", help="Do not index the seeded rows for search")
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+        if any(count < 0 for count in sizes.values()):
+            raise CommandError("Sizes must not be negative")
+        if sizes["posts"] and not (sizes["users"] and sizes["communities"]):
+            raise CommandError("Posts need at least one user and one community")
+
+        use_copy = not options["no_copy"] and copy_supported()
+        self.stdout.write(f"Seeding with {'COPY' if use_copy else 'bulk_create'} ...")
+
+        seed(
+            sizes,
+            random_seed=options["seed"],
+            batch_size=options["batch_size"],
+            skew=Skew(
+                communities=options["communities_skew"],
+                posts=options["posts_skew"],
+                authors=options["authors_skew"],
+                follows=options["follows_skew"],
+            ),
+            use_copy=use_copy,
+            search_index=not options["skip_search_index"],
+            progress=lambda label, count: self.stdout.write(self.style.SUCCESS(f"✅ Created {count} {label}")),
+        )
+        self.stdout.write(self.style.SUCCESS("✅ Rebuilt vote counters, rollups and hot scores"))
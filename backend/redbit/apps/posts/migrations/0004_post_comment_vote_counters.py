@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:03
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_vote_counters(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Vote = apps.get_model("votes", "Vote")
+
+    for model_name in ("post", "comment"):
+        model = apps.get_model("posts", model_name)
+        content_type = ContentType.objects.filter(app_label="posts", model=model_name).first()
+        if content_type is None:
+            continue
+
+        tallies = (
+            Vote.objects.filter(content_type=content_type)
+            .values("object_id")
+            .annotate(up=Count("id", filter=Q(value=1)), down=Count("id", filter=Q(value=-1)))
+        )
+        for row in tallies.iterator():
+            model.objects.filter(pk=row["object_id"]).update(
+                upvotes=row["up"], downvotes=row["down"], score=row["up"] - row["down"]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('posts', '0003_post_image'),
+        ('votes', '0002_vote_votes_content_a606f3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='downvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='downvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model("posts", "Comment")
+
+    # parent ถูกสร้างก่อนลูกเสมอ จึงไล่ตาม id แล้วต่อ path จาก parent ได้ทันที
+    known = {}
+    batch = []
+    for comment in Comment.objects.order_by("id").only("id", "parent_id").iterator(chunk_size=2000):
+        parent_path, parent_depth = known.get(comment.parent_id, ("", -1))
+        comment.path = f"{parent_path}{comment.id:010d}/"
+        comment.depth = parent_depth + 1
+        known[comment.id] = (comment.path, comment.depth)
+        batch.append(comment)
+        if len(batch) >= 2000:
+            Comment.objects.bulk_update(batch, ["path", "depth"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["path", "depth"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=1100),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_path_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_comment_materialized_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_path_idx',
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=1100),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_path_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
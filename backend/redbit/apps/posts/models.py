@@ -1,6 +1,6 @@
 from apps.communities.models import Community
 from apps.users.models import User
-from apps.votes.models import Vote
+from apps.votes.models import Vote, VoteRollup
 from core.models import TimestampedModel
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
@@ -19,27 +19,47 @@ class Post(TimestampedModel):
     image = models.ImageField(upload_to="images/", blank=True, null=True)
     # เชื่อมโยงกับระบบ Vote ที่มีอยู่
     votes = GenericRelation(Vote)
+    # ยอดโหวตรายชั่วโมง (ถูกลบไปพร้อมโพสต์)
+    vote_rollups = GenericRelation(VoteRollup)
+
+    # ตัวนับโหวตแบบ denormalized (อัปเดตใน apps.posts.services.cast_vote)
+    upvotes = models.IntegerField(default=0)
+    downvotes = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+
+    # คะแนน hot ที่คำนวณเก็บไว้ (ดู apps.posts.ranking และ tasks.notifications.update_post_score)
+    hot_score = models.FloatField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-hot_score", "-id"], name="post_hot_idx"),
+            models.Index(fields=["community", "-hot_score", "-id"], name="post_community_hot_idx"),
+            # keyset pagination (ดู graphql_api.pagination)
+            models.Index(fields=["-created_at", "-id"], name="post_new_idx"),
+            models.Index(fields=["community", "-created_at", "-id"], name="post_community_new_idx"),
+            models.Index(fields=["-upvotes", "-id"], name="post_top_idx"),
+            models.Index(fields=["community", "-upvotes", "-id"], name="post_community_top_idx"),
+            models.Index(fields=["author", "-created_at", "-id"], name="post_author_new_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def upvotes_count(self):
-        """นับคะแนนโหวต (คำนวณจากระบบ Vote)"""
-        return self.votes.filter(value=Vote.VoteType.UPVOTE).count()
+        """จำนวนโหวตขึ้น (อ่านจากตัวนับที่เก็บไว้)"""
+        return self.upvotes
 
     @property
     def downvotes_count(self):
-        """นับคะแนนโหวตลง"""
-        return self.votes.filter(value=Vote.VoteType.DOWNVOTE).count()
+        """จำนวนโหวตลง"""
+        return self.downvotes
 
     @property
     def total_votes(self):
         """คะแนนโหวตสุทธิ"""
-        return self.upvotes_count - self.downvotes_count
+        return self.score
 
     @property
     def comment_count(self):
@@ -47,6 +67,14 @@ class Post(TimestampedModel):
         return self.comments.count()
 
 
+COMMENT_PATH_STEP = 10
+
+
+def build_path(parent_path, comment_id):
+    """ต่อ id ของคอมเมนต์ (zero-padded) เข้ากับ path ของ parent"""
+    return f"{parent_path}{comment_id:0{COMMENT_PATH_STEP}d}/"
+
+
 class Comment(TimestampedModel):
     """
     Model สำหรับเก็บคอมเมนต์
@@ -58,20 +86,46 @@ class Comment(TimestampedModel):
     # สำหรับ nested comments (replies)
     parent = models.ForeignKey("self", on_delete=models.CASCADE, null=True, blank=True, related_name="replies")
 
+    # materialized path: id ของบรรพบุรุษทุกชั้นต่อกัน เช่น "0000000001/0000000007/"
+    # ทำให้ดึงทั้ง thread หรือ subtree ได้ด้วย query เดียว (ดู apps.posts.threads)
+    path = models.CharField(max_length=1100, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
     content = models.TextField()
 
     # เชื่อมโยงกับระบบ Vote ที่มีอยู่
     votes = GenericRelation(Vote)
+    vote_rollups = GenericRelation(VoteRollup)
+
+    # ตัวนับโหวตแบบ denormalized
+    upvotes = models.IntegerField(default=0)
+    downvotes = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["post", "parent", "-created_at", "-id"], name="comment_thread_idx"),
+            # varchar_pattern_ops: ให้ path__startswith (LIKE 'prefix%') ใช้ index ได้ทุก collation
+            models.Index(
+                fields=["post", "path"], name="comment_path_idx", opclasses=["int8_ops", "varchar_pattern_ops"]
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
+    def save(self, *args, **kwargs):
+        is_new = self.pk is None
+        super().save(*args, **kwargs)
+        if is_new and not self.path:
+            # path ต้องใช้ id ของตัวเอง จึงตั้งค่าหลัง insert
+            parent = self.parent if self.parent_id else None
+            self.path = build_path(parent.path if parent else "", self.pk)
+            self.depth = parent.depth + 1 if parent else 0
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
     @property
     def total_votes(self):
         """คะแนนโหวตสุทธิ"""
-        upvotes = self.votes.filter(vote_type=Vote.VoteType.UPVOTE).count()
-        downvotes = self.votes.filter(vote_type=Vote.VoteType.DOWNVOTE).count()
-        return upvotes - downvotes
+        return self.score
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+# โพสต์ที่เก่ากว่านี้จะไม่ถูกคำนวณ hot score ใหม่อีก (ถูกตั้งเป็น 0 ครั้งเดียว)
+HOT_SCORE_WINDOW = timedelta(days=7)
+
+# ลำดับของแต่ละ feed sort โดยมี "-id" เป็นตัวตัดสินเมื่อค่าเท่ากัน (ใช้กับ keyset pagination)
+POST_ORDERINGS = {
+    "new": ("-created_at", "-id"),
+    "top": ("-upvotes", "-id"),
+    "hot": ("-hot_score", "-id"),
+}
+
+# ช่วงเวลาของ top feed (ไม่ระบุ window หรือ "all" ใช้ตัวนับ Post.upvotes ตามเดิม)
+TOP_WINDOWS = {
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+    "month": timedelta(days=30),
+}
+
+# VoteRollup ที่เก่ากว่านี้ไม่ถูกใช้ใน window ใดแล้ว (ถูกลบโดย tasks.notifications.prune_vote_rollups)
+VOTE_ROLLUP_RETENTION = max(TOP_WINDOWS.values()) + timedelta(hours=1)
+
+# ค่า gravity ของสูตร: upvotes / (age_hours + HOT_SCORE_GRAVITY)
+HOT_SCORE_GRAVITY = 2
+
+
+def compute_hot_score(upvotes, created_at, now=None):
+    """
+    คำนวณ hot score แบบเดียวกับที่ feed เคยคำนวณตอน query
+    (upvotes หารด้วยอายุโพสต์เป็นชั่วโมง + gravity)
+    """
+    now = now or timezone.now()
+    if now - created_at >= HOT_SCORE_WINDOW:
+        return 0.0
+    age_hours = max((now - created_at) / timedelta(hours=1), 0)
+    return upvotes / (age_hours + HOT_SCORE_GRAVITY)
+
+
+def window_start(window, now=None):
+    """bucket แรกที่นับรวมใน window (ปัดลงเป็นต้นชั่วโมง ให้ตรงกับ VoteRollup.bucket)"""
+    now = now or timezone.now()
+    return (now - TOP_WINDOWS[window]).replace(minute=0, second=0, microsecond=0)
+
+
+def top_post_totals(window, community_id=None, limit=None, after=None, offset=0, now=None):
+    """
+    อันดับ top ของโพสต์ใน window จากผลรวม upvotes ของ VoteRollup รายชั่วโมง
+    (ไม่แตะตาราง votes) เรียงตาม (-upvotes ใน window, -id)
+
+    after เป็น (upvotes, post_id) ของแถวสุดท้ายของหน้าก่อน
+    Returns:
+        list ของ (post_id, upvotes ใน window)
+    """
+    from apps.posts.models import Post
+    from apps.votes.models import VoteRollup
+
+    rollups = VoteRollup.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post),
+        bucket__gte=window_start(window, now),
+    )
+    if community_id:
+        rollups = rollups.filter(object_id__in=Post.objects.filter(community_id=community_id).values("id"))
+
+    totals = (
+        rollups.values("object_id")
+        .annotate(window_upvotes=Sum("upvotes"))
+        .filter(window_upvotes__gt=0)
+        .order_by("-window_upvotes", "-object_id")
+    )
+    if after:
+        upvotes, post_id = after
+        totals = totals.filter(Q(window_upvotes__lt=upvotes) | Q(window_upvotes=upvotes, object_id__lt=post_id))
+        offset = 0
+
+    offset = offset or 0
+    rows = totals.values_list("object_id", "window_upvotes")
+    if limit is not None:
+        rows = rows[offset : offset + limit]
+    return list(rows)
@@ -0,0 +1,449 @@
+"""
+สร้างข้อมูลจำลองจำนวนมาก (users, communities, โพสต์, คอมเมนต์แบบ thread, โหวต, follow)
+สำหรับ benchmark และ staging (ดู management command `seed` และ benchmarks/)
+
+- insert เป็นชุดด้วย bulk_create หรือ COPY ของ PostgreSQL (เร็วกว่ามาก) จาก generator
+  จึงถือข้อมูลในหน่วยความจำไม่เกินครั้งละหนึ่งชุด
+- primary key ถูกกำหนดล่วงหน้า ทำให้คำนวณ path ของคอมเมนต์ (build_path) ได้ก่อน insert
+- ความนิยมเบ้แบบ Zipf: community/ผู้เขียน/โพสต์อันดับต้น ๆ ได้สมาชิก โพสต์ คอมเมนต์ และโหวตส่วนใหญ่
+  ปรับความเบ้ได้ด้วย Skew (exponent 0 = สุ่มเท่า ๆ กัน)
+- ข้อมูล denormalized (ตัวนับโหวต, rollup, hot_score) ถูก rebuild ด้วย helper
+  ชุดเดียวกับ management command อื่น ๆ หลัง insert เสร็จ
+- search document ของแถวที่สร้างถูก insert เป็นชุดเช่นกัน แล้วอัปเดต index ด้วย statement เดียวต่อชุด
+- feed และ home timeline ที่ cache ไว้ใน Redis ถูกล้าง (สร้างก่อนข้อมูลชุดนี้)
+"""
+import random
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from itertools import accumulate
+
+from apps.communities.models import Community
+from apps.communities.services import rebuild_member_counts
+from apps.posts import feed_cache, timelines
+from apps.posts.models import Comment, Post, build_path
+from apps.posts.ranking import compute_hot_score
+from apps.posts.services import rebuild_vote_counters, rebuild_vote_rollups
+from apps.search.models import SearchDocument
+from apps.search.services import index_documents, new_documents, searchable_models
+from apps.users.models import User
+from apps.votes.models import Vote
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+DEFAULT_SIZES = {
+    "users": 500,
+    "communities": 20,
+    "posts": 2000,
+    "comments": 10000,
+    "votes": 20000,
+    "follows": 2000,
+}
+BATCH_SIZE = 1000
+HISTORY = timedelta(days=30)
+VOTE_HISTORY = timedelta(days=7)
+REPLY_PROBABILITY = 0.6
+REPLY_CANDIDATES = 32  # คอมเมนต์ล่าสุดต่อโพสต์ที่ถูกสุ่มเป็น parent (จำกัดหน่วยความจำ)
+MAX_COMMENT_DEPTH = 8
+MAX_MEMBERSHIPS = 5
+UPVOTE_PROBABILITY = 0.8
+COMMENT_VOTE_SHARE = 0.2
+
+WORDS = (
+    "python django graphql redis postgres celery cache query index latency thread vote feed rank "
+    "community post comment reply user follow search trending news music game movie travel food "
+    "photo science space design code bug release deploy review open source weekly question answer"
+).split()
+
+
+class Skew:
+    """exponent ของการกระจายแบบ Zipf (ยิ่งมากยิ่งกระจุกที่อันดับต้น ๆ, 0 = เท่ากัน)"""
+
+    def __init__(self, communities=1.1, posts=1.1, authors=0.8, follows=1.0):
+        self.communities = communities
+        self.posts = posts
+        self.authors = authors
+        self.follows = follows
+
+
+def zipf_weights(count, exponent):
+    """cumulative weights ของอันดับ 1..count (ใช้กับ random.choices(cum_weights=...))"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def sentence(rng, low, high):
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """ให้ bulk_create ใช้ค่า auto_now/auto_now_add ที่กำหนดไว้บน object แทนเวลาปัจจุบัน"""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def copy_supported():
+    """COPY ใช้ได้เมื่อเป็น PostgreSQL ผ่าน psycopg 3 (cursor.copy)"""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, "copy")
+
+
+def _batches(objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy(model, batch):
+    """COPY object ชุดหนึ่งเข้าตารางของ model (ค่าเตรียมแบบเดียวกับ bulk_create, psycopg แปลงชนิดให้)"""
+    fields = [field for field in model._meta.concrete_fields if not (field.primary_key and batch[0].pk is None)]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN") as copy:
+            for obj in batch:
+                copy.write_row([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+
+
+def insert(model, objects, batch_size=BATCH_SIZE, use_copy=False):
+    """
+    insert object จาก iterable เป็นชุด โดยถือไว้ในหน่วยความจำครั้งละไม่เกิน batch_size
+
+    Returns:
+        จำนวนแถวที่ insert
+    """
+    count = 0
+    for batch in _batches(objects, batch_size):
+        if use_copy:
+            _copy(model, batch)
+        else:
+            model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def _reset_sequences(models):
+    # id ถูกกำหนดเอง sequence ของ PostgreSQL จึงต้องเลื่อนตาม
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def _distinct_picks(rng, population, cum_weights, count, exclude=None, rounds=3):
+    """สุ่มสมาชิกไม่ซ้ำ count ตัวตาม weight (สุ่มเพิ่มแทนตัวซ้ำไม่เกิน rounds รอบ จึงอาจได้น้อยกว่า)"""
+    picks = set()
+    for _ in range(rounds):
+        missing = count - len(picks)
+        if missing <= 0:
+            break
+        picks.update(rng.choices(population, cum_weights=cum_weights, k=missing))
+        picks.discard(exclude)
+    return picks
+
+
+def _around(rng, mean):
+    """จำนวนเต็มสุ่มแบบ exponential ที่มีค่าเฉลี่ย mean (ส่วนใหญ่น้อย บางตัวมาก, ปัดเศษแบบสุ่ม)"""
+    if mean <= 0:
+        return 0
+    value = rng.expovariate(1 / mean)
+    return int(value) + (rng.random() < value % 1)
+
+
+def _spread(rng, total, cum_weights):
+    """แบ่ง total ให้แต่ละอันดับตามสัดส่วน weight (ปัดเศษแบบสุ่ม) ทีละอันดับ"""
+    last = cum_weights[-1] if cum_weights else 0
+    previous = 0.0
+    for cumulative in cum_weights:
+        share = total * (cumulative - previous) / last
+        previous = cumulative
+        count = int(share)
+        yield count + (rng.random() < share - count)
+
+
+class Dataset:
+    """id ของข้อมูลที่สร้าง พร้อม weight ที่ใช้เลือกโพสต์ยอดนิยม"""
+
+    def __init__(self, user_ids, community_slugs, post_ids, post_weights):
+        self.user_ids = user_ids
+        self.community_slugs = community_slugs
+        self.post_ids = post_ids
+        self.post_weights = post_weights
+
+    def hot_post(self, rng):
+        return rng.choices(self.post_ids, cum_weights=self.post_weights)[0]
+
+
+def seed(
+    sizes=None,
+    random_seed=42,
+    batch_size=BATCH_SIZE,
+    now=None,
+    skew=None,
+    use_copy=None,
+    search_index=True,
+    progress=None,
+):
+    """
+    สร้างข้อมูลตาม sizes (ดู DEFAULT_SIZES) ต่อจากข้อมูลเดิมในฐานข้อมูล
+
+    Args:
+        skew: Skew ของความนิยม (ค่า default ถ้าไม่ระบุ)
+        use_copy: ใช้ COPY แทน bulk_create (None = ใช้เมื่อรองรับ)
+        search_index: สร้าง search document ของ users/communities/โพสต์ที่ insert
+        progress: callable(label, count) ถูกเรียกเมื่อแต่ละขั้นเสร็จ
+
+    Returns:
+        Dataset ของข้อมูลที่สร้าง
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    skew = skew or Skew()
+    rng = random.Random(random_seed)
+    now = now or timezone.now()
+    use_copy = copy_supported() if use_copy is None else use_copy
+    progress = progress or (lambda label, count: None)
+
+    def write(model, objects):
+        with explicit_timestamps(model):
+            return insert(model, objects, batch_size=batch_size, use_copy=use_copy)
+
+    # users ไม่มีรหัสผ่านที่ใช้ login ได้ (unusable password ใช้ร่วมกันทุกคน)
+    password = make_password(None)
+    first_user = _next_id(User)
+    user_ids = range(first_user, first_user + sizes["users"])
+    progress(
+        "users",
+        write(
+            User,
+            (
+                User(
+                    id=uid,
+                    username=f"seed{uid}",
+                    email=f"seed{uid}@example.com",
+                    password=password,
+                    date_joined=now - HISTORY,
+                    last_seen=now,
+                )
+                for uid in user_ids
+            ),
+        ),
+    )
+    author_weights = zipf_weights(len(user_ids), skew.authors)
+
+    # follows: คนดัง (อันดับต้น ๆ) มี follower มาก
+    Follow = User.following.through
+    follow_weights = zipf_weights(len(user_ids), skew.follows)
+    follows_per_user = sizes["follows"] / len(user_ids) if user_ids else 0
+    progress(
+        "follows",
+        write(
+            Follow,
+            (
+                Follow(from_user_id=uid, to_user_id=followee)
+                for uid in user_ids
+                for followee in _distinct_picks(
+                    rng, user_ids, follow_weights, _around(rng, follows_per_user), exclude=uid
+                )
+            ),
+        ),
+    )
+
+    # communities เรียงจากนิยมมากไปน้อย สมาชิกกระจายตามความนิยม
+    first_community = _next_id(Community)
+    community_ids = range(first_community, first_community + sizes["communities"])
+    community_slugs = [f"seed-{WORDS[cid % len(WORDS)]}-{cid}" for cid in community_ids]
+    progress(
+        "communities",
+        write(
+            Community,
+            (
+                Community(
+                    id=cid,
+                    name=slug,
+                    slug=slug,
+                    description=sentence(rng, 5, 15),
+                    owner_id=rng.choice(user_ids),
+                    created_at=now - HISTORY,
+                    updated_at=now - HISTORY,
+                )
+                for cid, slug in zip(community_ids, community_slugs, strict=True)
+            ),
+        ),
+    )
+    community_weights = zipf_weights(len(community_ids), skew.communities)
+    Membership = Community.members.through
+    progress(
+        "memberships",
+        write(
+            Membership,
+            (
+                Membership(community_id=cid, user_id=uid)
+                for uid in (user_ids if community_ids else ())
+                for cid in _distinct_picks(rng, community_ids, community_weights, rng.randint(1, MAX_MEMBERSHIPS))
+            ),
+        ),
+    )
+
+    # posts: เวลาสร้างเก็บใน array ของ timestamp (ใช้หน่วยความจำน้อยกว่า dict ของ datetime)
+    first_post = _next_id(Post)
+    post_ids = range(first_post, first_post + sizes["posts"])
+    start = (now - HISTORY).timestamp()
+    post_created = array("d", sorted(start + HISTORY.total_seconds() * rng.random() for _ in post_ids))
+
+    def created(pid):
+        return datetime.fromtimestamp(post_created[pid - first_post], tz=dt_timezone.utc)
+
+    def posts():
+        for pid in post_ids:
+            created_at = created(pid)
+            yield Post(
+                id=pid,
+                author_id=rng.choices(user_ids, cum_weights=author_weights)[0],
+                community_id=rng.choices(community_ids, cum_weights=community_weights)[0],
+                title=sentence(rng, 3, 10).capitalize(),
+                content=sentence(rng, 10, 60),
+                created_at=created_at,
+                updated_at=created_at,
+            )
+
+    progress("posts", write(Post, posts()))
+    # ความนิยมไม่ขึ้นกับอายุโพสต์: สลับว่าโพสต์ไหนได้อันดับต้น ๆ
+    popular = list(post_ids)
+    rng.shuffle(popular)
+    post_weights = zipf_weights(len(popular), skew.posts)
+
+    # คอมเมนต์แบบ thread: รู้ id ล่วงหน้าจึงคำนวณ path ได้ก่อน insert
+    # parent ถูกสุ่มจากคอมเมนต์ล่าสุด REPLY_CANDIDATES ตัวของโพสต์นั้น
+    first_comment = _next_id(Comment)
+    comment_ids = range(first_comment, first_comment + (sizes["comments"] if popular else 0))
+
+    def comments():
+        threads = {}  # post id -> deque[(comment id, path, depth, created_at)]
+        for cid in comment_ids:
+            pid = rng.choices(popular, cum_weights=post_weights)[0]
+            thread = threads.setdefault(pid, deque(maxlen=REPLY_CANDIDATES))
+            parent = None
+            if thread and rng.random() < REPLY_PROBABILITY:
+                parent = rng.choice(thread)
+                if parent[2] + 1 > MAX_COMMENT_DEPTH:
+                    parent = None
+            after = parent[3] if parent else created(pid)
+            created_at = min(after + (now - after) * rng.random() * 0.1, now)
+            path = build_path(parent[1] if parent else "", cid)
+            depth = parent[2] + 1 if parent else 0
+            thread.append((cid, path, depth, created_at))
+            yield Comment(
+                id=cid,
+                post_id=pid,
+                parent_id=parent[0] if parent else None,
+                author_id=rng.choice(user_ids),
+                content=sentence(rng, 5, 40),
+                path=path,
+                depth=depth,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+
+    progress("comments", write(Comment, comments()))
+
+    # votes: แบ่งจำนวนโหวตให้โพสต์ตามความนิยม (คอมเมนต์ได้ส่วน COMMENT_VOTE_SHARE แบบเท่า ๆ กัน)
+    # ผู้โหวตของแต่ละ object สุ่มแบบไม่ซ้ำ จึงไม่ต้องจำคู่ (user, object) ที่สร้างไปแล้ว
+    post_type = ContentType.objects.get_for_model(Post)
+    comment_type = ContentType.objects.get_for_model(Comment)
+    comment_votes = round(sizes["votes"] * COMMENT_VOTE_SHARE) if comment_ids else 0
+
+    def voters(count):
+        return rng.sample(user_ids, min(count, len(user_ids)))
+
+    def vote(uid, content_type, object_id):
+        return Vote(
+            user_id=uid,
+            content_type_id=content_type.id,
+            object_id=object_id,
+            value=Vote.VoteType.UPVOTE if rng.random() < UPVOTE_PROBABILITY else Vote.VoteType.DOWNVOTE,
+            created_at=now - VOTE_HISTORY * rng.random() ** 2,
+        )
+
+    def votes():
+        # โพสต์ที่ได้โหวตมากกว่าจำนวน user ส่งส่วนเกินต่อให้โพสต์อันดับถัดไป
+        overflow = 0
+        for pid, count in zip(popular, _spread(rng, sizes["votes"] - comment_votes, post_weights), strict=True):
+            chosen = voters(count + overflow)
+            overflow += count - len(chosen)
+            for uid in chosen:
+                yield vote(uid, post_type, pid)
+        per_comment = comment_votes / len(comment_ids) if comment_ids else 0
+        for cid in comment_ids:
+            for uid in voters(_around(rng, per_comment)):
+                yield vote(uid, comment_type, cid)
+
+    progress("votes", write(Vote, votes()))
+
+    _reset_sequences([User, Community, Post, Comment])
+    rebuild_member_counts()
+    for model in (Post, Comment):
+        rebuild_vote_counters(model, batch_size=batch_size)
+        rebuild_vote_rollups(model, batch_size=batch_size)
+
+    rows = (
+        Post.objects.filter(pk__gte=post_ids.start, pk__lt=post_ids.stop)
+        .values_list("pk", "upvotes", "created_at")
+        .order_by("pk")
+    )
+    hot = (
+        Post(pk=pk, hot_score=compute_hot_score(upvotes, created_at, now))
+        for pk, upvotes, created_at in rows.iterator(chunk_size=batch_size)
+    )
+    for batch in _batches(hot, batch_size):
+        Post.objects.bulk_update(batch, ["hot_score"])
+
+    if search_index:
+        # เฉพาะช่วง id ที่เพิ่งสร้าง (แถวเดิมมี document จาก signal อยู่แล้ว)
+        seeded = {User: user_ids, Community: community_ids, Post: post_ids}
+        for model in searchable_models():
+            ids = seeded[model]
+            objects = model.objects.filter(pk__gte=ids.start, pk__lt=ids.stop)
+            documents = SearchDocument.objects.filter(content_type=ContentType.objects.get_for_model(model))
+            count = 0
+            for batch in _batches(new_documents(model, objects, batch_size=batch_size), batch_size):
+                count += insert(SearchDocument, batch, batch_size=batch_size, use_copy=use_copy)
+                index_documents(
+                    documents.filter(object_id__gte=batch[0].object_id, object_id__lte=batch[-1].object_id)
+                )
+            progress(f"search documents for {model._meta.verbose_name_plural}", count)
+
+    for sort in feed_cache.SORTS:
+        feed_cache.invalidate(sort)
+    timelines.invalidate_all()
+
+    return Dataset(user_ids, community_slugs, popular, post_weights)
@@ -0,0 +1,155 @@
+from apps.votes.models import Vote, VoteRollup
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncHour
+
+
+def _counter_deltas(value, sign=1):
+    """คืนค่า delta ของ (upvotes, downvotes, score) สำหรับโหวตค่า value"""
+    if value == Vote.VoteType.UPVOTE:
+        return sign, 0, sign
+    return 0, sign, -sign
+
+
+def rollup_bucket(moment):
+    """ต้นชั่วโมงของเวลาที่โหวต (ใช้เป็น bucket ของ VoteRollup)"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _record_rollup(content_type, object_id, voted_at, up, down):
+    """บวก delta เข้า VoteRollup ของชั่วโมงที่โหวตถูกสร้าง (สร้างแถวใหม่ถ้ายังไม่มี)"""
+    if not up and not down:
+        return
+    lookup = {"content_type": content_type, "object_id": object_id, "bucket": rollup_bucket(voted_at)}
+    deltas = {"upvotes": F("upvotes") + up, "downvotes": F("downvotes") + down}
+    if VoteRollup.objects.filter(**lookup).update(**deltas):
+        return
+    try:
+        with transaction.atomic():
+            VoteRollup.objects.create(**lookup, upvotes=up, downvotes=down)
+    except IntegrityError:
+        # transaction อื่นสร้างแถวของชั่วโมงนี้ไปก่อนแล้ว
+        VoteRollup.objects.filter(**lookup).update(**deltas)
+
+
+def cast_vote(user, target, value):
+    """
+    Toggle/เปลี่ยนโหวตของ user บน target (Post หรือ Comment)
+    และอัปเดตตัวนับ upvotes/downvotes/score กับ VoteRollup ภายใน transaction เดียวกัน
+
+    Returns:
+        (vote, created) - vote เป็น None ถ้าโหวตถูกยกเลิก
+    """
+    model = type(target)
+    content_type = ContentType.objects.get_for_model(model)
+
+    with transaction.atomic():
+        vote, created = Vote.objects.select_for_update().get_or_create(
+            user=user, content_type=content_type, object_id=target.pk, defaults={"value": value}
+        )
+        voted_at = vote.created_at
+
+        up, down, score = 0, 0, 0
+        if created:
+            up, down, score = _counter_deltas(value)
+        elif vote.value == value:
+            up, down, score = _counter_deltas(vote.value, sign=-1)
+            vote.delete()
+            vote = None
+        else:
+            old_up, old_down, old_score = _counter_deltas(vote.value, sign=-1)
+            new_up, new_down, new_score = _counter_deltas(value)
+            up, down, score = old_up + new_up, old_down + new_down, old_score + new_score
+            vote.value = value
+            vote.save(update_fields=["value"])
+
+        model.objects.filter(pk=target.pk).update(
+            upvotes=F("upvotes") + up,
+            downvotes=F("downvotes") + down,
+            score=F("score") + score,
+        )
+        _record_rollup(content_type, target.pk, voted_at, up, down)
+
+    target.refresh_from_db(fields=["upvotes", "downvotes", "score"])
+    return vote, created
+
+
+def rebuild_vote_counters(model, batch_size=1000):
+    """
+    คำนวณ upvotes/downvotes/score ของทุก object ใน model ใหม่จากตาราง Vote
+    โดยใช้ aggregate ครั้งเดียวและ bulk_update เป็นชุด
+
+    Returns:
+        จำนวน object ที่มีโหวตอย่างน้อยหนึ่งครั้ง
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    tallies = (
+        Vote.objects.filter(content_type=content_type)
+        .values("object_id")
+        .annotate(
+            up=Count("id", filter=Q(value=Vote.VoteType.UPVOTE)),
+            down=Count("id", filter=Q(value=Vote.VoteType.DOWNVOTE)),
+        )
+        .order_by("object_id")
+    )
+
+    updated = 0
+    with transaction.atomic():
+        model.objects.update(upvotes=0, downvotes=0, score=0)
+
+        batch = []
+        for row in tallies.iterator(chunk_size=batch_size):
+            batch.append(
+                model(pk=row["object_id"], upvotes=row["up"], downvotes=row["down"], score=row["up"] - row["down"])
+            )
+            if len(batch) >= batch_size:
+                updated += model.objects.bulk_update(batch, ["upvotes", "downvotes", "score"])
+                batch = []
+        if batch:
+            updated += model.objects.bulk_update(batch, ["upvotes", "downvotes", "score"])
+
+    return updated
+
+
+def rebuild_vote_rollups(model, batch_size=1000):
+    """
+    สร้าง VoteRollup ของ model ใหม่ทั้งหมดจากตาราง Vote
+
+    Returns:
+        จำนวนแถว rollup ที่สร้าง
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    buckets = (
+        Vote.objects.filter(content_type=content_type)
+        .annotate(bucket=TruncHour("created_at"))
+        .values("object_id", "bucket")
+        .annotate(
+            up=Count("id", filter=Q(value=Vote.VoteType.UPVOTE)),
+            down=Count("id", filter=Q(value=Vote.VoteType.DOWNVOTE)),
+        )
+        .order_by("object_id", "bucket")
+    )
+
+    created = 0
+    with transaction.atomic():
+        VoteRollup.objects.filter(content_type=content_type).delete()
+
+        batch = []
+        for row in buckets.iterator(chunk_size=batch_size):
+            batch.append(
+                VoteRollup(
+                    content_type=content_type,
+                    object_id=row["object_id"],
+                    bucket=row["bucket"],
+                    upvotes=row["up"],
+                    downvotes=row["down"],
+                )
+            )
+            if len(batch) >= batch_size:
+                created += len(VoteRollup.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(VoteRollup.objects.bulk_create(batch))
+
+    return created
@@ -0,0 +1,138 @@
+"""
+โหลด comment thread ด้วย materialized path (Comment.path / Comment.depth)
+
+ลูกหลานทั้งหมดของ comment หนึ่งคือแถวที่ path ขึ้นต้นด้วย path ของมัน
+จึงดึงทั้ง thread (หรือ subtree) ได้ด้วย query เดียวที่เรียงตาม path
+แล้วประกอบเป็นต้นไม้ในหน่วยความจำ โดยเก็บ replies ของแต่ละ comment ไว้ที่ `_replies`
+
+ต้นไม้ถูกจำกัดทั้งความลึก (max_depth ชั้นใต้ roots) และความกว้าง (max_replies ต่อ parent)
+comment ที่ replies ถูกตัดจะมี `_more` = (id ของมัน, (created_at, id) ของ reply สุดท้ายที่ส่งไป หรือ None)
+ให้ผู้เรียกใช้ load_more() ดึงส่วนถัดไป
+"""
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+DEFAULT_MAX_DEPTH = 5
+DEFAULT_MAX_REPLIES = 10
+MAX_DEPTH = 10
+MAX_REPLIES = 100
+
+# ลำดับของ replies ภายใต้ parent เดียวกัน (เหมือน comment list ของ GraphQL)
+REPLY_ORDERING = ("-created_at", "-id")
+
+
+def bounds(max_depth=None, max_replies=None):
+    """ค่าเริ่มต้นและเพดานของขนาดต้นไม้ที่ client ขอได้"""
+    max_depth = DEFAULT_MAX_DEPTH if max_depth is None else max(0, min(int(max_depth), MAX_DEPTH))
+    max_replies = DEFAULT_MAX_REPLIES if max_replies is None else max(1, min(int(max_replies), MAX_REPLIES))
+    return max_depth, max_replies
+
+
+def _sort_key(comment):
+    return (comment.created_at, comment.id)
+
+
+def _bounded(queryset, limit, max_replies):
+    """
+    จำกัดแถวให้ลึกไม่เกิน limit + 1 และไม่เกิน max_replies + 1 ต่อ parent
+    (แถวที่เกินมาใช้บอกว่ายังมี replies ต่อ และไม่ถูกส่งออกไป)
+    """
+    ranked = queryset.filter(depth__lte=limit + 1).annotate(
+        reply_rank=Window(
+            RowNumber(),
+            partition_by=[F("parent_id")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        )
+    )
+    return ranked.filter(reply_rank__lte=max_replies + 1).select_related("author").order_by("path")
+
+
+def assemble(roots, descendants, limit, max_replies):
+    """
+    ประกอบ descendants (เรียงตาม path) เข้ากับ roots แล้วตั้ง `_replies` / `_more`
+    ให้ทุก comment ในต้นไม้ คืน comment ทั้งหมดที่อยู่ในต้นไม้ (รวม roots)
+    """
+    tree = {}
+    for root in roots:
+        root._replies, root._more = [], None
+        tree[root.id] = root
+
+    truncated = set()
+    for comment in descendants:
+        parent = tree.get(comment.parent_id)
+        if parent is None:
+            continue  # อยู่ใต้ comment ที่ถูกตัดไปแล้ว
+        if comment.depth > limit or comment.reply_rank > max_replies:
+            truncated.add(parent.id)
+            continue
+        comment._replies, comment._more = [], None
+        parent._replies.append(comment)
+        tree[comment.id] = comment
+
+    for comment in tree.values():
+        comment._replies.sort(key=_sort_key, reverse=True)
+        if comment.id in truncated:
+            last = comment._replies[-1] if comment._replies else None
+            comment._more = (comment.id, _sort_key(last) if last else None)
+    return list(tree.values())
+
+
+def load_replies(roots, max_depth=None, max_replies=None):
+    """
+    โหลด replies ของ roots (comment ของโพสต์เดียวกัน) ภายใต้ขอบเขต bounds() ด้วย query เดียว
+    คืน comment ทั้งหมดในต้นไม้ (รวม roots)
+    """
+    max_depth, max_replies = bounds(max_depth, max_replies)
+    roots = [root for root in roots if root.path]
+    if not roots:
+        return []
+
+    base = min(root.depth for root in roots)
+    queryset = Comment.objects.filter(post_id=roots[0].post_id, depth__gt=base).filter(
+        reduce(or_, (Q(path__startswith=root.path) for root in roots))
+    )
+    limit = base + max_depth
+    return assemble(roots, list(_bounded(queryset, limit, max_replies)), limit, max_replies)
+
+
+def load_subtree(post_id, comment_id, max_depth=None, max_replies=None):
+    """
+    โหลด comment_id พร้อมลูกหลานภายใต้ขอบเขต bounds()
+    คืน (comment, comment ทั้งหมดในต้นไม้) หรือ (None, []) ถ้าไม่พบ
+    """
+    max_depth, max_replies = bounds(max_depth, max_replies)
+    root = Comment.objects.filter(pk=comment_id, post_id=post_id).select_related("author").first()
+    if root is None or not root.path:
+        return None, []
+
+    # prefix ของ path ใช้ index (post, path) ได้ ต่างจากการค้นกลาง string
+    queryset = Comment.objects.filter(post_id=post_id, path__startswith=root.path, depth__gt=root.depth)
+    limit = root.depth + max_depth
+    descendants = _bounded(queryset, limit, max_replies)
+    return root, assemble([root], list(descendants), limit, max_replies)
+
+
+def load_more(parent_id, after=None, max_depth=None, max_replies=None):
+    """
+    ส่วนถัดไปของ replies ที่ถูกตัดไว้ใต้ parent_id (ต่อจาก after = (created_at, id))
+    max_depth นับจาก parent_id คืน (replies, more, comment ทั้งหมดที่โหลดมา)
+    โดย more เป็น continuation ถัดไปของ parent เดิม หรือ None ถ้าหมดแล้ว
+    """
+    max_depth, max_replies = bounds(max_depth, max_replies)
+    queryset = Comment.objects.filter(parent_id=parent_id).order_by(*REPLY_ORDERING)
+    if after:
+        created_at, comment_id = after
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=comment_id))
+    page = list(queryset.select_related("author")[: max_replies + 1])
+
+    more = None
+    if len(page) > max_replies:
+        page = page[:max_replies]
+        more = (parent_id, _sort_key(page[-1]))
+    loaded = load_replies(page, max_depth=max(max_depth - 1, 0), max_replies=max_replies)
+    return page, more, loaded
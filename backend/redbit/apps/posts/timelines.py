@@ -0,0 +1,220 @@
+"""
+Home timeline (โพสต์จาก community ที่ join และ user ที่ follow)
+
+- fan-out-on-write: เมื่อมีโพสต์ใหม่ task จะ push post id เข้า timeline ของ follower ของผู้เขียน
+  และสมาชิกของ community (เฉพาะ community ที่สมาชิกไม่เกิน HOME_FEED_FANOUT_LIMIT)
+- fan-out-on-read: community ที่ใหญ่กว่านั้นถูกดึงตอนอ่านด้วย keyset query บน index
+  (community, -created_at, -id) แล้ว merge กับ timeline
+
+timeline ของแต่ละ user เก็บเป็น Redis sorted set (score = created_at เป็น microseconds)
+ถูก build จากฐานข้อมูลเมื่อยังไม่มี และถูกลบทิ้งเมื่อ user follow/join เปลี่ยน
+"""
+import logging
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from core.redis import get_redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_SIZE = 800
+TIMELINE_TTL = 3 * 24 * 60 * 60  # seconds
+LARGE_COMMUNITIES_CACHE_KEY = "timelines:large_communities"
+LARGE_COMMUNITIES_TTL = 10 * 60  # seconds
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def fanout_limit():
+    return getattr(settings, "HOME_FEED_FANOUT_LIMIT", 10000)
+
+
+def timeline_key(user_id):
+    return f"timeline:{user_id}"
+
+
+def _score(created_at):
+    # จำนวนเต็ม microseconds แทน float timestamp เพื่อไม่ให้เสียความละเอียด
+    return (created_at - _EPOCH) // timedelta(microseconds=1)
+
+
+def _memberships():
+    from apps.communities.models import Community
+
+    return Community.members.through.objects
+
+
+def _follows():
+    from apps.users.models import User
+
+    return User.following.through.objects
+
+
+def large_community_ids():
+    """id ของ community ที่ใหญ่เกินกว่าจะ fan-out-on-write (cache ไว้ LARGE_COMMUNITIES_TTL)"""
+    from apps.communities.models import Community
+
+    ids = cache.get(LARGE_COMMUNITIES_CACHE_KEY)
+    if ids is None:
+        # index range scan บน member_count (นับไว้แล้วตอน join/leave)
+        ids = list(Community.objects.filter(member_count__gt=fanout_limit()).values_list("id", flat=True))
+        cache.set(LARGE_COMMUNITIES_CACHE_KEY, ids, LARGE_COMMUNITIES_TTL)
+    return set(ids)
+
+
+def home_queryset(user, exclude_communities=()):
+    """โพสต์ทั้งหมดของ home feed จากฐานข้อมูล (ใช้ build timeline และเป็น fallback)"""
+    from apps.posts.models import Post
+
+    joined = _memberships().filter(user_id=user.id).values("community_id")
+    if exclude_communities:
+        joined = joined.exclude(community_id__in=exclude_communities)
+    following = _follows().filter(from_user_id=user.id).values("to_user_id")
+    return Post.objects.filter(Q(community_id__in=joined) | Q(author_id__in=following))
+
+
+def _build(client, user, large_ids):
+    key = timeline_key(user.id)
+    rows = home_queryset(user, exclude_communities=large_ids).order_by("-created_at", "-id").values_list(
+        "id", "created_at"
+    )[:TIMELINE_SIZE]
+
+    pipe = client.pipeline()
+    pipe.delete(key)
+    entries = {str(post_id): _score(created_at) for post_id, created_at in rows}
+    if entries:
+        pipe.zadd(key, entries)
+    pipe.expire(key, TIMELINE_TTL)
+    pipe.execute()
+
+
+def fanout_post(post):
+    """push โพสต์ใหม่เข้า timeline ที่ถูก build แล้วของผู้ติดตามและสมาชิก community"""
+    client = get_redis()
+    if client is None:
+        return 0
+
+    recipients = _follows().filter(to_user_id=post.author_id).values_list("from_user_id", flat=True)
+    recipient_ids = set(recipients)
+    if post.community_id not in large_community_ids():
+        members = _memberships().filter(community_id=post.community_id).values_list("user_id", flat=True)
+        recipient_ids.update(members)
+
+    member, score = str(post.id), _score(post.created_at)
+    pushed = 0
+    try:
+        user_ids = list(recipient_ids)
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start : start + 500]
+            pipe = client.pipeline()
+            for user_id in chunk:
+                pipe.exists(timeline_key(user_id))
+            exists = pipe.execute()
+
+            pipe = client.pipeline()
+            for user_id, has_timeline in zip(chunk, exists, strict=True):
+                if not has_timeline:
+                    continue  # จะถูก build ใหม่ตอน user เปิด home feed
+                key = timeline_key(user_id)
+                pipe.zadd(key, {member: score})
+                pipe.zremrangebyrank(key, 0, -(TIMELINE_SIZE + 1))
+                pushed += 1
+            pipe.execute()
+    except RedisError:
+        logger.warning("Timeline fan-out failed for post %s", post.id, exc_info=True)
+    return pushed
+
+
+def invalidate(user_id):
+    """เรียกเมื่อ user follow/unfollow หรือ join/leave community"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.delete(timeline_key(user_id))
+    except RedisError:
+        logger.warning("Timeline invalidation failed for user %s", user_id, exc_info=True)
+
+
+def invalidate_all():
+    """ลบ timeline ของทุก user (ใช้หลัง insert ข้อมูลโดยไม่ผ่าน fan-out เช่น seed)"""
+    client = get_redis()
+    cache.delete(LARGE_COMMUNITIES_CACHE_KEY)
+    if client is None:
+        return
+    try:
+        keys = list(client.scan_iter(match=timeline_key("*")))
+        if keys:
+            client.delete(*keys)
+    except RedisError:
+        logger.warning("Timeline invalidation failed", exc_info=True)
+
+
+def _timeline_page(client, user, large_ids, first, cursor):
+    """
+    คืน (post_ids, exhausted) จาก timeline ใน Redis หรือ None ถ้าใช้ไม่ได้
+    exhausted = True หมายถึง timeline ถูกตัดที่ TIMELINE_SIZE และหน้านี้เลยขอบไปแล้ว
+    """
+    key = timeline_key(user.id)
+    if not client.exists(key):
+        _build(client, user, large_ids)
+
+    max_score = "+inf"
+    if cursor:
+        max_score = _score(cursor[0])
+    # ขอเกินมาเผื่อรายการที่ score เท่ากับ cursor แต่ id ไม่น้อยกว่า
+    members = client.zrevrangebyscore(key, max_score, "-inf", start=0, num=first + 50, withscores=True)
+    ids = []
+    for member, score in members:
+        post_id = int(member)
+        if cursor and int(score) == _score(cursor[0]) and post_id >= cursor[1]:
+            continue
+        ids.append(post_id)
+        if len(ids) == first:
+            break
+
+    truncated = client.zcard(key) >= TIMELINE_SIZE
+    return ids, truncated and len(ids) < first
+
+
+def home_feed(user, first, after=None):
+    """
+    หน้าของ home feed เรียงตาม (-created_at, -id)
+    after เป็น (created_at, id) ของโพสต์สุดท้ายของหน้าก่อน
+    """
+    from apps.posts.models import Post
+
+    queryset = Post.objects.select_related("author", "community")
+
+    def keyset(qs):
+        if after:
+            created_at, post_id = after
+            qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+        return list(qs.order_by("-created_at", "-id")[:first])
+
+    client = get_redis()
+    if client is not None:
+        try:
+            large_ids = large_community_ids()
+            page = _timeline_page(client, user, large_ids, first, after)
+        except RedisError:
+            logger.warning("Timeline read failed for user %s", user.id, exc_info=True)
+            page = None
+
+        if page is not None and not page[1]:
+            timeline_ids = page[0]
+            posts = list(queryset.filter(id__in=timeline_ids))
+
+            joined_large = _memberships().filter(user_id=user.id, community_id__in=large_ids)
+            joined_large = set(joined_large.values_list("community_id", flat=True))
+            if joined_large:
+                posts += keyset(queryset.filter(community_id__in=joined_large))
+
+            unique = {post.id: post for post in posts}
+            return sorted(unique.values(), key=lambda post: (post.created_at, post.id), reverse=True)[:first]
+
+    return keyset(home_queryset(user).select_related("author", "community"))
@@ -0,0 +1,67 @@
+"""
+Autocomplete ของ username และชื่อ/slug ของ community (typeahead)
+
+ค้นด้วย prefix บน lower(field) ซึ่งมี index รองรับ (ดู migration 0003 ของ apps.search)
+และ cache ผลของแต่ละ prefix ไว้สั้นๆ เพราะ prefix สั้นที่ถูกพิมพ์บ่อย (เช่น "a", "ga") จะซ้ำกันมาก
+cache เก็บเฉพาะ pk (ไม่ pickle ทั้ง object ซึ่งมีข้อมูลอย่าง password hash) แล้วดึง object ด้วย in_bulk
+"""
+import hashlib
+
+from django.apps import apps
+from django.core.cache import cache
+
+from .backends import get_backend
+
+AUTOCOMPLETE_CACHE_TTL = 60  # seconds
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_PREFIX_LENGTH = 50
+
+# kind -> (model, field ที่ match กับ prefix)
+AUTOCOMPLETE_FIELDS = {
+    "users": ("users.User", ("username",)),
+    "communities": ("communities.Community", ("name", "slug")),
+}
+KINDS = tuple(AUTOCOMPLETE_FIELDS)
+
+
+def normalize(prefix):
+    return (prefix or "").strip().lower()[:MAX_PREFIX_LENGTH]
+
+
+def _matching_pks(model, fields, prefix, limit):
+    backend = get_backend()
+
+    # แต่ละ field ใช้ index ของตัวเอง แล้วรวมผลตามลำดับตัวอักษร
+    found = {}
+    for field in fields:
+        rows = backend.prefix(model.objects.all(), field, prefix).order_by("match_key", "pk")
+        for pk, match_key in rows.values_list("pk", "match_key")[:limit]:
+            found.setdefault(pk, match_key)
+    return [pk for pk, _ in sorted(found.items(), key=lambda item: (item[1], item[0]))[:limit]]
+
+
+def autocomplete(prefix, kinds=KINDS, limit=None):
+    """
+    คืน dict ของ kind -> list ของ object ที่ขึ้นต้นด้วย prefix (ไม่สนตัวพิมพ์เล็ก/ใหญ่)
+    """
+    prefix = normalize(prefix)
+    limit = DEFAULT_LIMIT if limit is None else max(1, min(int(limit), MAX_LIMIT))
+    results = {kind: [] for kind in KINDS}
+    if not prefix:
+        return results
+
+    for kind in kinds:
+        if kind not in AUTOCOMPLETE_FIELDS:
+            continue
+        label, fields = AUTOCOMPLETE_FIELDS[kind]
+        model = apps.get_model(label)
+        key = f"autocomplete:{kind}:{limit}:{hashlib.md5(prefix.encode()).hexdigest()}"
+        pks = cache.get(key)
+        if pks is None:
+            pks = _matching_pks(model, fields, prefix, limit)
+            cache.set(key, pks, AUTOCOMPLETE_CACHE_TTL)
+        # object ที่ถูกลบไประหว่างที่ยังอยู่ใน cache จะหายไปจากผล
+        objects = model.objects.in_bulk(pks)
+        results[kind] = [objects[pk] for pk in pks if pk in objects]
+    return results
@@ -0,0 +1,121 @@
+"""
+Search backend ที่เลือกได้ผ่าน settings.SEARCH_BACKEND (dotted path)
+ถ้าไม่ได้ตั้งไว้ จะเลือกตามชนิดของฐานข้อมูล default
+
+ทุก backend รับ queryset ของ SearchDocument แล้วคืน queryset ที่กรองเฉพาะแถวที่ตรงกับคำค้น
+พร้อม annotate `rank` (ค่ามาก = เกี่ยวข้องมาก) ส่วนการเรียงและแบ่งหน้าทำใน apps.search.services
+
+prefix() ใช้กับ autocomplete (apps.search.autocomplete) โดย match lower(field) กับ prefix
+บน expression index ที่สร้างใน migration ของ apps.search
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Collate, Lower
+from django.utils.module_loading import import_string
+
+from .models import SearchDocument
+
+
+class BasicSearchBackend:
+    """ค้นด้วย icontains บน SearchDocument (ไม่มี index ใช้เมื่อฐานข้อมูลไม่รองรับ full-text)"""
+
+    def index(self, document):
+        """เรียกหลังบันทึก title/body ของ document"""
+
+    def index_many(self, documents):
+        """เรียกหลัง insert/อัปเดต title/body ของ documents (queryset) แบบ bulk"""
+
+    def search(self, documents, query):
+        terms = query.split()
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(body__icontains=term)
+        return documents.filter(condition).annotate(rank=Value(1.0, output_field=FloatField()))
+
+    def prefix(self, queryset, field, prefix):
+        """แถวที่ lower(field) ขึ้นต้นด้วย prefix (ตัวพิมพ์เล็กแล้ว) annotate ค่าไว้ที่ `match_key`"""
+        return queryset.annotate(match_key=Lower(field)).filter(match_key__startswith=prefix)
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    """tsvector ใน SearchDocument.vector + GIN index จัดอันดับด้วย ts_rank"""
+
+    # เนื้อหามีทั้งภาษาไทยและอังกฤษ จึงไม่ใช้ stemming ของภาษาใดภาษาหนึ่ง
+    config = "simple"
+
+    def index(self, document):
+        self.index_many(SearchDocument.objects.filter(pk=document.pk))
+
+    def index_many(self, documents):
+        from django.contrib.postgres.search import SearchVector
+
+        vector = SearchVector("title", weight="A", config=self.config) + SearchVector(
+            "body", weight="B", config=self.config
+        )
+        documents.update(vector=vector)
+
+    def search(self, documents, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type="websearch", config=self.config)
+        return documents.filter(vector=search_query).annotate(rank=SearchRank("vector", search_query))
+
+    def prefix(self, queryset, field, prefix):
+        # lower(field) COLLATE "C" ตรงกับ btree index (migration 0004 ของ apps.search)
+        # ทั้ง LIKE 'abc%' และ ORDER BY match_key LIMIT n จึงเดินตาม index ได้ไม่ขึ้นกับ collation ของฐานข้อมูล
+        return queryset.annotate(match_key=Collate(Lower(field), "C")).filter(match_key__startswith=prefix)
+
+
+class SQLiteSearchBackend(BasicSearchBackend):
+    """ตาราง FTS5 `search_documents_fts` (sync กับ search_documents ด้วย trigger) จัดอันดับด้วย bm25"""
+
+    table = "search_documents_fts"
+
+    @staticmethod
+    def match_expression(query):
+        # quote ทุกคำเพื่อไม่ให้ตัวอักษรพิเศษกลายเป็น syntax ของ FTS5 และให้คำสุดท้ายเป็น prefix (typeahead)
+        terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+        if terms:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, documents, query):
+        match = self.match_expression(query)
+        if not match:
+            return documents.none()
+
+        table = self.table
+        doc_table = SearchDocument._meta.db_table
+        matches = RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+        # bm25 คืนค่าติดลบ (น้อย = เกี่ยวข้องมาก) จึงกลับเครื่องหมาย, title หนักกว่า body 4 เท่า
+        rank = RawSQL(
+            f"SELECT -bm25({table}, 4.0, 1.0) FROM {table} WHERE {table} MATCH %s AND rowid = {doc_table}.id",
+            [match],
+            output_field=FloatField(),
+        )
+        return documents.filter(id__in=matches).annotate(rank=rank)
+
+    def prefix(self, queryset, field, prefix):
+        # LIKE ของ SQLite ไม่ใช้ expression index จึงค้นเป็นช่วงแทน (index เรียงแบบ BINARY ตาม code point)
+        return queryset.annotate(match_key=Lower(field)).filter(
+            match_key__gte=prefix, match_key__lt=prefix + "\U0010ffff"
+        )
+
+
+BACKENDS_BY_VENDOR = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "SEARCH_BACKEND", None)
+        backend_class = import_string(path) if path else BACKENDS_BY_VENDOR.get(connection.vendor, BasicSearchBackend)
+        _backend = backend_class()
+    return _backend
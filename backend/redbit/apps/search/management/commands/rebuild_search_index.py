@@ -0,0 +1,14 @@
+from apps.search.services import rebuild_index, searchable_models
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuild full-text search documents for posts, communities and users"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows fetched per query")
+
+    def handle(self, *args, **options):
+        for model in searchable_models():
+            count = rebuild_index(model, batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"✅ Indexed {count} {model._meta.verbose_name_plural}"))
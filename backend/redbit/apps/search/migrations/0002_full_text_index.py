@@ -0,0 +1,104 @@
+from django.db import migrations
+
+FTS_TABLE = "search_documents_fts"
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, body, content='search_documents', content_rowid='id')",
+    f"""CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER search_documents_au AFTER UPDATE OF title, body ON search_documents BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_documents_ai",
+    "DROP TRIGGER IF EXISTS search_documents_ad",
+    "DROP TRIGGER IF EXISTS search_documents_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_FORWARD = ["CREATE INDEX search_documents_vector_gin ON search_documents USING gin (vector)"]
+POSTGRES_REVERSE = ["DROP INDEX IF EXISTS search_documents_vector_gin"]
+
+# ให้ตรงกับ apps.search.services.SEARCHABLE_FIELDS ณ ตอนสร้าง migration นี้
+SEARCHABLE_FIELDS = {
+    ("posts", "Post"): (("title",), ("content",)),
+    ("communities", "Community"): (("name", "slug"), ("description",)),
+    ("users", "User"): (("username",), ("bio",)),
+}
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_index(apps, schema_editor):
+    # index ของ full-text ขึ้นกับชนิดฐานข้อมูล (ดู apps.search.backends)
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+def backfill_documents(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    SearchDocument = apps.get_model("search", "SearchDocument")
+
+    def text(obj, names):
+        return " ".join(str(value) for value in (getattr(obj, name) for name in names) if value)
+
+    for (app_label, model_name), (title_fields, body_fields) in SEARCHABLE_FIELDS.items():
+        model = apps.get_model(app_label, model_name)
+        content_type, _ = ContentType.objects.get_or_create(app_label=app_label, model=model_name.lower())
+        batch = []
+        for obj in model.objects.order_by("pk").iterator(chunk_size=1000):
+            batch.append(
+                SearchDocument(
+                    content_type=content_type,
+                    object_id=obj.pk,
+                    title=text(obj, title_fields),
+                    body=text(obj, body_fields),
+                )
+            )
+            if len(batch) >= 1000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+
+    if schema_editor.connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchVector
+
+        SearchDocument.objects.update(
+            vector=SearchVector("title", weight="A", config="simple") + SearchVector("body", weight="B", config="simple")
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+        ("posts", "0007_comment_materialized_path"),
+        ("communities", "0002_initial"),
+        ("users", "0002_user_dark_mode_user_is_online_user_last_seen_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# (app label, model, field) ที่ autocomplete ค้นด้วย prefix ของ lower(field)
+PREFIX_FIELDS = [
+    ("users", "User", "username"),
+    ("communities", "Community", "name"),
+    ("communities", "Community", "slug"),
+]
+
+
+def _indexes(apps, schema_editor):
+    for app_label, model_name, field_name in PREFIX_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        table = model._meta.db_table
+        column = model._meta.get_field(field_name).column
+        yield f"{table}_{column}_prefix_idx", schema_editor.quote_name(table), schema_editor.quote_name(column)
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        # trigram index รองรับ LIKE 'abc%' บน lower(column) ได้โดยไม่ขึ้นกับ collation ของฐานข้อมูล
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table, column in _indexes(apps, schema_editor):
+            schema_editor.execute(f"CREATE INDEX {name} ON {table} USING gin (lower({column}) gin_trgm_ops)")
+    else:
+        # btree บน lower(column) สำหรับค้นเป็นช่วง (ดู SQLiteSearchBackend.prefix)
+        for name, table, column in _indexes(apps, schema_editor):
+            schema_editor.execute(f"CREATE INDEX {name} ON {table} (lower({column}))")
+
+
+def drop_indexes(apps, schema_editor):
+    for name, _, _ in _indexes(apps, schema_editor):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0002_full_text_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
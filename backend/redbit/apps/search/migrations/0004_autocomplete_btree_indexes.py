@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# (app label, model, field) ที่ autocomplete ค้นด้วย prefix ของ lower(field) (เหมือน 0003)
+PREFIX_FIELDS = [
+    ("users", "User", "username"),
+    ("communities", "Community", "name"),
+    ("communities", "Community", "slug"),
+]
+
+
+def _indexes(apps, schema_editor):
+    for app_label, model_name, field_name in PREFIX_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        table = model._meta.db_table
+        column = model._meta.get_field(field_name).column
+        yield f"{table}_{column}_prefix_idx", schema_editor.quote_name(table), schema_editor.quote_name(column)
+
+
+def use_btree(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return  # SQLite ใช้ btree บน lower(column) อยู่แล้ว
+    # GIN trigram คืนแถวตามลำดับไม่ได้ (ต้องเก็บทุกแถวที่ match แล้ว sort) และ prefix 1-2 ตัวอักษรไม่มี trigram ให้ใช้
+    # btree บน lower(column) COLLATE "C" ใช้ได้ทั้ง LIKE 'abc%' และ ORDER BY ... LIMIT (เดินตาม index แล้วหยุด)
+    for name, table, column in _indexes(apps, schema_editor):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+        schema_editor.execute(f'CREATE INDEX {name} ON {table} ((lower({column}) COLLATE "C"))')
+
+
+def use_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, table, column in _indexes(apps, schema_editor):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+        schema_editor.execute(f"CREATE INDEX {name} ON {table} USING gin (lower({column}) gin_trgm_ops)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0003_autocomplete_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(use_btree, use_trigram),
+    ]
@@ -0,0 +1,38 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    ข้อความที่ค้นหาได้ของ Post / Community / User (หนึ่งแถวต่อ object)
+    ถูกอัปเดตทุกครั้งที่ object ถูกบันทึก (ดู apps.search.signals)
+
+    index ของ full-text search สร้างใน migration ตามชนิดฐานข้อมูล:
+    - PostgreSQL: GIN index บน `vector` (tsvector)
+    - SQLite: ตาราง FTS5 `search_documents_fts` ที่ sync ด้วย trigger
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    # title มีน้ำหนักมากกว่า body ตอนจัดอันดับ
+    title = models.TextField()
+    body = models.TextField(blank=True, default="")
+
+    # ใช้เฉพาะ PostgreSQL (backend อื่นปล่อยเป็น NULL)
+    vector = SearchVectorField(null=True, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "search_documents"
+
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id"], name="search_document_object_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model}:{self.object_id} {self.title[:50]}"
@@ -0,0 +1,122 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from .backends import get_backend
+from .models import SearchDocument
+
+# model ที่ค้นหาได้: field ที่ใช้ทำ (title, body) ของ SearchDocument
+SEARCHABLE_FIELDS = {
+    "posts.Post": (("title",), ("content",)),
+    "communities.Community": (("name", "slug"), ("description",)),
+    "users.User": (("username",), ("bio",)),
+}
+
+
+def searchable_models():
+    return [apps.get_model(label) for label in SEARCHABLE_FIELDS]
+
+
+def _fields(model):
+    return SEARCHABLE_FIELDS.get(model._meta.label)
+
+
+def indexed_fields(model):
+    """ชื่อ field ทั้งหมดของ model ที่มีผลกับ SearchDocument (None ถ้า model ไม่ถูก index)"""
+    fields = _fields(model)
+    if fields is None:
+        return None
+    title_fields, body_fields = fields
+    return {*title_fields, *body_fields}
+
+
+def _text(obj, names):
+    return " ".join(str(value) for value in (getattr(obj, name) for name in names) if value)
+
+
+def index_object(obj):
+    """สร้าง/อัปเดต SearchDocument ของ obj"""
+    title_fields, body_fields = _fields(type(obj))
+    document, _ = SearchDocument.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.pk,
+        defaults={"title": _text(obj, title_fields), "body": _text(obj, body_fields)},
+    )
+    get_backend().index(document)
+    return document
+
+
+def remove_object(obj):
+    SearchDocument.objects.filter(content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk).delete()
+
+
+def rebuild_index(model, batch_size=500):
+    """index ทุก object ของ model ใหม่ (ใช้หลังเปลี่ยน backend หรือ import ข้อมูลโดยไม่ผ่าน save())"""
+    count = 0
+    for obj in model.objects.order_by("pk").iterator(chunk_size=batch_size):
+        index_object(obj)
+        count += 1
+    return count
+
+
+def new_documents(model, queryset, batch_size=500):
+    """
+    SearchDocument (ยังไม่บันทึก) ของทุก object ใน queryset เรียงตาม pk
+    สำหรับ insert แบบ bulk เมื่อ object ถูกสร้างโดยไม่ผ่าน save() และยังไม่มี document
+    """
+    title_fields, body_fields = _fields(model)
+    content_type = ContentType.objects.get_for_model(model)
+    objects = queryset.only("pk", *title_fields, *body_fields).order_by("pk")
+    for obj in objects.iterator(chunk_size=batch_size):
+        yield SearchDocument(
+            content_type=content_type,
+            object_id=obj.pk,
+            title=_text(obj, title_fields),
+            body=_text(obj, body_fields),
+        )
+
+
+def index_documents(documents):
+    """อัปเดต index ของ SearchDocument ใน queryset ด้วย statement เดียว (หลัง insert แบบ bulk)"""
+    get_backend().index_many(documents)
+
+
+def search(model, query, limit, after=None, queryset=None, offset=0):
+    """
+    ค้นหา object ของ model เรียงตามความเกี่ยวข้อง (rank มากก่อน, SearchDocument id มากก่อน)
+
+    Args:
+        after: (rank, document id) ของผลลัพธ์สุดท้ายของหน้าก่อน
+        offset: ใช้เมื่อไม่มี after เท่านั้น (สำหรับ client เดิม)
+        queryset: จำกัดผลลัพธ์ให้อยู่ใน queryset นี้ และใช้โหลด object (เช่น select_related)
+
+    Returns:
+        list ของ object โดยแต่ละตัวมี `search_rank` และ `_search_key` = (rank, document id)
+    """
+    queryset = model.objects.all() if queryset is None else queryset
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    documents = SearchDocument.objects.filter(content_type=ContentType.objects.get_for_model(model))
+    if queryset.query.where:
+        documents = documents.filter(object_id__in=queryset.values("pk"))
+
+    ranked = get_backend().search(documents, query)
+    if after:
+        rank, document_id = after
+        ranked = ranked.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=document_id))
+        offset = 0
+    offset = offset or 0
+    rows = list(ranked.order_by("-rank", "-id").values_list("id", "object_id", "rank")[offset : offset + limit])
+
+    objects = queryset.in_bulk([object_id for _, object_id, _ in rows])
+    results = []
+    for document_id, object_id, rank in rows:
+        obj = objects.get(object_id)
+        if obj is None:
+            continue
+        obj.search_rank = rank
+        obj._search_key = (rank, document_id)
+        results.append(obj)
+    return results
@@ -0,0 +1,24 @@
+"""
+ทำให้ SearchDocument ตรงกับ object ต้นทางเสมอ (อัปเดตตอนเขียน ไม่ใช่ตอนค้นหา)
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .services import index_object, indexed_fields, remove_object
+
+
+@receiver(post_save)
+def update_search_document(sender, instance, raw=False, update_fields=None, **kwargs):
+    fields = indexed_fields(sender)
+    if fields is None or raw:
+        return
+    # เช่น login ที่บันทึกแค่ last_login ไม่ต้อง index ใหม่
+    if update_fields is not None and not fields.intersection(update_fields):
+        return
+    index_object(instance)
+
+
+@receiver(post_delete)
+def delete_search_document(sender, instance, **kwargs):
+    if indexed_fields(sender) is not None:
+        remove_object(instance)
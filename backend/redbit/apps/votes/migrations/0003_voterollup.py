@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    Vote = apps.get_model("votes", "Vote")
+    VoteRollup = apps.get_model("votes", "VoteRollup")
+
+    rows = (
+        Vote.objects.annotate(bucket=TruncHour("created_at"))
+        .values("content_type_id", "object_id", "bucket")
+        .annotate(up=Count("id", filter=Q(value=1)), down=Count("id", filter=Q(value=-1)))
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(
+            VoteRollup(
+                content_type_id=row["content_type_id"],
+                object_id=row["object_id"],
+                bucket=row["bucket"],
+                upvotes=row["up"],
+                downvotes=row["down"],
+            )
+        )
+        if len(batch) >= 2000:
+            VoteRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        VoteRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('votes', '0002_vote_votes_content_a606f3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('bucket', models.DateTimeField()),
+                ('upvotes', models.IntegerField(default=0)),
+                ('downvotes', models.IntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'db_table': 'vote_rollups',
+                'indexes': [models.Index(fields=['content_type', 'bucket', 'object_id'], name='vote_rollup_window_idx')],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'bucket'), name='vote_rollup_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -36,3 +36,31 @@ class Vote(models.Model):
             models.Index(fields=["content_type", "object_id"]),
             models.Index(fields=["user", "created_at"]),
         ]
+
+
+class VoteRollup(models.Model):
+    """
+    ยอดโหวตรายชั่วโมงของแต่ละ object (นับตามชั่วโมงที่โหวตถูกสร้าง)
+    อัปเดตใน apps.posts.services.cast_vote ใช้จัดอันดับ top แบบมีช่วงเวลา (วันนี้/สัปดาห์/เดือน)
+    โดยไม่ต้อง aggregate ตาราง votes
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    # ต้นชั่วโมง (UTC) ของโหวตที่นับรวมในแถวนี้
+    bucket = models.DateTimeField()
+
+    upvotes = models.IntegerField(default=0)
+    downvotes = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "vote_rollups"
+
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id", "bucket"], name="vote_rollup_bucket_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["content_type", "bucket", "object_id"], name="vote_rollup_window_idx"),
+        ]
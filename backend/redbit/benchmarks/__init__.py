@@ -0,0 +1,13 @@
+"""
+Load benchmarks for the GraphQL API.
+
+Run from backend/redbit (needs Redis, like the app itself):
+
+    python -m benchmarks --posts 5000 --comments 50000 --output before.json
+
+A fresh test database is created, seeded with ``apps.posts.seeding`` (the
+generator behind ``manage.py seed``) and destroyed afterwards, so the
+development database is never touched. The JSON report has p50/p95/p99
+latency, SQL queries and throughput for every operation in
+``benchmarks.operations``. Compare two reports to measure a change.
+"""
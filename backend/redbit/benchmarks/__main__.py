@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "redbit.settings.local")
+
+
+def parse_args(argv=None):
+    from apps.posts.seeding import DEFAULT_SIZES
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the GraphQL API in-process.")
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=default, help=f"Number of {name} to seed")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured requests per operation")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per operation")
+    parser.add_argument("--operations", nargs="*", help="Only run these operations (see benchmarks.operations)")
+    parser.add_argument("--anonymous", action="store_true", help="Send reads without a session (response cache)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the dataset")
+    parser.add_argument("--keepdb", action="store_true", help="Keep the test database for the next run")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    django.setup()
+    args = parse_args(argv)
+
+    from apps.posts.seeding import DEFAULT_SIZES, seed
+    from benchmarks.operations import OPERATIONS, OPERATIONS_BY_NAME
+    from benchmarks.runner import BenchmarkRunner
+    from django.conf import settings
+    from django.db import connection, connections
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    from redbit.celery import app as celery_app
+
+    operations = [OPERATIONS_BY_NAME[name] for name in args.operations] if args.operations else OPERATIONS
+    sizes = {name: getattr(args, name) for name in DEFAULT_SIZES}
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    # like the test runner: replicas read the test database (TEST["MIRROR"])
+    for alias in settings.DATABASE_REPLICAS:
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    # notification/feed tasks run inline so no broker is needed; their cost is part of the mutations
+    celery_app.conf.task_always_eager = True
+    # diagnostics would only add overhead to what is measured
+    graphene = {**settings.GRAPHENE, "SQL_PROFILER": {"ENABLED": False}, "TRACING": {"SAMPLE_RATE": 0}}
+    try:
+        with override_settings(GRAPHENE=graphene):
+            print(f"Seeding {sizes} ...", file=sys.stderr)
+            dataset = seed(sizes, random_seed=args.seed)
+            runner = BenchmarkRunner(dataset, iterations=args.iterations, warmup=args.warmup, anonymous=args.anonymous)
+            report = runner.run(operations, sizes)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+        teardown_test_environment()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
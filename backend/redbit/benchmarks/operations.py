@@ -0,0 +1,102 @@
+"""
+GraphQL operations driven by the benchmark runner.
+
+Each operation is a named document plus a function that picks variables
+from the seeded ``Dataset`` (``apps.posts.seeding``). Targets are drawn with the dataset's
+popularity weights, so hot posts are read and voted on more often.
+"""
+from apps.posts.seeding import WORDS
+
+POST_FIELDS = """
+    id
+    title
+    upvotes
+    voteCount
+    commentCount
+    userVote
+    timeAgo
+    author { id username }
+    community { id name slug }
+"""
+
+ALL_POSTS = f"""
+query AllPosts($sortBy: String, $window: String, $first: Int) {{
+  allPosts(sortBy: $sortBy, window: $window, first: $first) {{ {POST_FIELDS} cursor }}
+}}
+"""
+
+POST = f"""
+query Post($id: ID!) {{
+  post(id: $id) {{ {POST_FIELDS} content }}
+}}
+"""
+
+COMMENTS = """
+query Comments($postId: ID!) {
+  comments(postId: $postId, first: 20, maxDepth: 3, maxReplies: 5) {
+    id content upvotes author { username } moreRepliesToken
+    replies { id content author { username } moreRepliesToken
+      replies { id content author { username } moreRepliesToken } }
+  }
+}
+"""
+
+SEARCH = """
+query Search($query: String!) {
+  search(query: $query, first: 10) {
+    posts { id title }
+    communities { id name }
+    users { id username }
+  }
+}
+"""
+
+VOTE = """
+mutation Vote($postId: ID!, $value: Int!) {
+  vote(postId: $postId, value: $value) { success errors }
+}
+"""
+
+CREATE_COMMENT = """
+mutation CreateComment($postId: ID!, $content: String!) {
+  createComment(postId: $postId, content: $content) { success errors comment { id } }
+}
+"""
+
+
+class Operation:
+    def __init__(self, name, query, variables, mutation=False):
+        self.name = name
+        self.query = query
+        self.variables = variables
+        self.mutation = mutation
+
+
+def _all_posts(sort, window=None):
+    return lambda dataset, rng: {"sortBy": sort, "window": window, "first": 20}
+
+
+OPERATIONS = [
+    Operation("allPosts:new", ALL_POSTS, _all_posts("new")),
+    Operation("allPosts:hot", ALL_POSTS, _all_posts("hot")),
+    Operation("allPosts:top", ALL_POSTS, _all_posts("top")),
+    Operation("allPosts:top:day", ALL_POSTS, _all_posts("top", "day")),
+    Operation("allPosts:top:week", ALL_POSTS, _all_posts("top", "week")),
+    Operation("allPosts:top:month", ALL_POSTS, _all_posts("top", "month")),
+    Operation("post", POST, lambda dataset, rng: {"id": dataset.hot_post(rng)}),
+    Operation("comments", COMMENTS, lambda dataset, rng: {"postId": dataset.hot_post(rng)}),
+    Operation("search", SEARCH, lambda dataset, rng: {"query": " ".join(rng.sample(WORDS, 2))}),
+    Operation(
+        "vote",
+        VOTE,
+        lambda dataset, rng: {"postId": dataset.hot_post(rng), "value": rng.choice((1, 1, 1, -1))},
+        mutation=True,
+    ),
+    Operation(
+        "createComment",
+        CREATE_COMMENT,
+        lambda dataset, rng: {"postId": dataset.hot_post(rng), "content": " ".join(rng.choices(WORDS, k=12))},
+        mutation=True,
+    ),
+]
+OPERATIONS_BY_NAME = {operation.name: operation for operation in OPERATIONS}
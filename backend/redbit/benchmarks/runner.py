@@ -0,0 +1,143 @@
+"""
+Drives GraphQL operations through ``/graphql/`` in-process and reports
+latency percentiles, SQL queries per operation and throughput.
+
+Requests go through Django's test ``Client``, so the whole stack is
+measured: middleware, ``AsyncRedbitGraphQLView`` (document cache, cost rule,
+response cache) and the resolvers. Operations run one after another, so
+throughput is sequential operations per second of a single process.
+"""
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from apps.posts import feed_cache
+from apps.users.models import User
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from graphql_api import response_cache
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * pct / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _git_revision():
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL)
+        return output.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    """
+    Counts SQL queries on the connections of every thread. Query root fields
+    run in worker threads, which ``CaptureQueriesContext`` would not see.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        for conn in connections.all():
+            self.install(conn)
+        connection_created.connect(self._created, weak=False)
+
+    def install(self, conn):
+        if self not in conn.execute_wrappers:
+            conn.execute_wrappers.append(self)
+
+    def _created(self, sender, connection, **kwargs):
+        self.install(connection)
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def reset_caches():
+    """Drop cached feeds and responses so no run starts with another run's rows."""
+    for sort in feed_cache.SORTS:
+        feed_cache.invalidate(sort)
+    response_cache.invalidate()
+
+
+class BenchmarkRunner:
+    def __init__(self, dataset, iterations=200, warmup=20, random_seed=1, anonymous=False):
+        self.dataset = dataset
+        self.iterations = iterations
+        self.warmup = warmup
+        self.rng = random.Random(random_seed)
+
+        user = User.objects.get(pk=dataset.user_ids[0])
+        self.member = Client()
+        self.member.force_login(user)
+        # reads as a logged-out visitor hit the shared response cache
+        self.reader = Client() if anonymous else self.member
+        self.anonymous = anonymous
+        self.queries = QueryCounter()
+
+    def request(self, operation):
+        client = self.member if operation.mutation else self.reader
+        body = {"query": operation.query, "variables": operation.variables(self.dataset, self.rng)}
+        before = self.queries.count
+        start = time.perf_counter()
+        response = client.post("/graphql/", body, content_type="application/json")
+        elapsed = time.perf_counter() - start
+        failed = response.status_code != 200 or bool(response.json().get("errors"))
+        return elapsed, self.queries.count - before, failed
+
+    def run_operation(self, operation):
+        for _ in range(self.warmup):
+            self.request(operation)
+
+        latencies, query_counts, errors = [], [], 0
+        for _ in range(self.iterations):
+            elapsed, queries, failed = self.request(operation)
+            latencies.append(elapsed)
+            query_counts.append(queries)
+            errors += failed
+
+        latencies.sort()
+        total = sum(latencies)
+        return {
+            "iterations": self.iterations,
+            "errors": errors,
+            **{f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 3) for pct in PERCENTILES},
+            "mean_ms": round(total / len(latencies) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3),
+            "queries_mean": round(sum(query_counts) / len(query_counts), 2),
+            "queries_max": max(query_counts),
+            "throughput_ops": round(len(latencies) / total, 2) if total else None,
+        }
+
+    def run(self, operations, sizes=None):
+        reset_caches()
+        results = {operation.name: self.run_operation(operation) for operation in operations}
+        reset_caches()
+        return {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "iterations": self.iterations,
+                "warmup": self.warmup,
+                "anonymous_reads": self.anonymous,
+                "dataset": sizes,
+            },
+            "operations": results,
+        }
@@ -0,0 +1,234 @@
+"""
+Prometheus metrics for the API, Channels and Celery.
+
+Web processes serve ``/metrics`` (see ``metrics_view``), which needs
+``METRICS_TOKEN`` unless ``DEBUG`` is on. Celery workers serve
+the same format from a small HTTP server started in the worker's main
+process (``CELERY_METRICS_PORT``, see ``connect_celery_signals``).
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (daphne/gunicorn with several
+processes, Celery prefork) every process writes its samples to that
+directory and the endpoint aggregates them with ``MultiProcessCollector``.
+The directory must be emptied when the service starts (docker/entrypoint.sh
+does this). Without it, the default in-process registry is used.
+
+Pool gauges are per process and summed over live processes. Each process
+refreshes its own after a GraphQL request or a Celery task
+(``record_pool_usage``). For the psycopg connection pool (``DB_POOL``) the
+statistics collected since the last refresh are added to the wait/connect
+counters. The GraphQL document cache is refreshed the same way
+(``record_document_cache``).
+"""
+import os
+import re
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from graphql import FieldNode
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+GRAPHQL_OPERATION_SECONDS = Histogram(
+    "redbit_graphql_operation_seconds",
+    "Time to answer a GraphQL HTTP request.",
+    ["operation_type", "operation_name"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "redbit_websocket_connections",
+    "Open GraphQL WebSocket connections.",
+    multiprocess_mode="livesum",
+)
+CHANNEL_GROUP_SENDS = Counter(
+    "redbit_channel_group_sends",
+    "Messages sent to channel layer groups.",
+    ["group"],
+)
+CELERY_TASK_SECONDS = Histogram(
+    "redbit_celery_task_seconds",
+    "Celery task run time.",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+DB_CONNECTIONS = Gauge(
+    "redbit_db_connections",
+    "Open database connections held by the process.",
+    ["alias"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "redbit_db_pool_connections",
+    "Connections of the psycopg pool of the process (open, idle) and requests waiting for one.",
+    ["alias", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_REQUESTS = Counter(
+    "redbit_db_pool_requests",
+    "Connections requested from the psycopg pool; queued ones had to wait, errors timed out.",
+    ["alias", "outcome"],
+)
+DB_POOL_WAIT_SECONDS = Counter(
+    "redbit_db_pool_wait_seconds",
+    "Time spent waiting for a connection from the psycopg pool.",
+    ["alias"],
+)
+DB_POOL_CONNECT_SECONDS = Counter(
+    "redbit_db_pool_connect_seconds",
+    "Time spent opening new connections for the psycopg pool.",
+    ["alias"],
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "redbit_redis_pool_connections",
+    "Connections in the django_redis pool of the process.",
+    ["alias", "state"],
+    multiprocess_mode="livesum",
+)
+DOCUMENT_CACHE_LOOKUPS = Counter(
+    "redbit_graphql_document_cache_lookups",
+    "Lookups in the parsed GraphQL document cache.",
+    ["result"],
+)
+DOCUMENT_CACHE_ENTRIES = Gauge(
+    "redbit_graphql_document_cache_entries",
+    "Parsed GraphQL documents cached by the process.",
+    multiprocess_mode="livesum",
+)
+
+# label of operations that are neither allow-listed nor a single root field
+OTHER_OPERATION = "other"
+_GROUP_ID_RE = re.compile(r"\d+")
+
+
+def _multiprocess():
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def registry():
+    if not _multiprocess():
+        return REGISTRY
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def metrics_view(request):
+    """``/metrics``; requires ``Authorization: Bearer <METRICS_TOKEN>``, and is closed without one unless DEBUG."""
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token is None and not settings.DEBUG:
+        return HttpResponseForbidden()
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def operation_label(operation):
+    """
+    ``operation_name`` label of a validated operation. The name comes from the
+    client, so only names in ``METRICS_OPERATION_NAMES`` are used as is; other
+    operations are labelled with their root field when they select just one
+    (the schema bounds those), everything else is ``"other"``.
+    """
+    if operation is None:
+        return OTHER_OPERATION
+    if operation.name and operation.name.value in settings.METRICS_OPERATION_NAMES:
+        return operation.name.value
+    fields = set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return OTHER_OPERATION
+        fields.add(selection.name.value)
+    return fields.pop() if len(fields) == 1 else OTHER_OPERATION
+
+
+def observe_operation(operation_type, operation_name, seconds):
+    """``operation_name`` must be bounded, see ``operation_label``."""
+    GRAPHQL_OPERATION_SECONDS.labels(operation_type or "unknown", operation_name or OTHER_OPERATION).observe(seconds)
+
+
+def count_group_send(group):
+    """Count a ``group_send``; ids are stripped so ``user_1_notifications`` -> ``user_N_notifications``."""
+    CHANNEL_GROUP_SENDS.labels(_GROUP_ID_RE.sub("N", group)).inc()
+
+
+def record_pool_usage():
+    for connection in connections.all(initialized_only=True):
+        DB_CONNECTIONS.labels(connection.alias).set(1 if connection.connection is not None else 0)
+        if connection.settings_dict.get("OPTIONS", {}).get("pool"):
+            record_db_pool(connection.alias, connection.pool)
+
+    for alias, config in settings.CACHES.items():
+        if not config.get("BACKEND", "").startswith("django_redis."):
+            continue
+        from django_redis import get_redis_connection
+
+        pool = get_redis_connection(alias).connection_pool
+        in_use = len(getattr(pool, "_in_use_connections", ()))
+        available = len(getattr(pool, "_available_connections", ()))
+        REDIS_POOL_CONNECTIONS.labels(alias, "in_use").set(in_use)
+        REDIS_POOL_CONNECTIONS.labels(alias, "idle").set(available)
+
+
+def record_db_pool(alias, pool):
+    stats = pool.pop_stats()  # counters are reset, so each refresh adds what happened since the last one
+    DB_POOL_CONNECTIONS.labels(alias, "open").set(stats.get("pool_size", 0))
+    DB_POOL_CONNECTIONS.labels(alias, "idle").set(stats.get("pool_available", 0))
+    DB_POOL_CONNECTIONS.labels(alias, "waiting").set(stats.get("requests_waiting", 0))
+    queued = stats.get("requests_queued", 0)
+    errors = stats.get("requests_errors", 0)
+    DB_POOL_REQUESTS.labels(alias, "immediate").inc(max(stats.get("requests_num", 0) - queued, 0))
+    DB_POOL_REQUESTS.labels(alias, "queued").inc(queued)
+    DB_POOL_REQUESTS.labels(alias, "error").inc(errors)
+    DB_POOL_WAIT_SECONDS.labels(alias).inc(stats.get("requests_wait_ms", 0) / 1000)
+    DB_POOL_CONNECT_SECONDS.labels(alias).inc(stats.get("connections_ms", 0) / 1000)
+
+
+def record_document_cache():
+    from graphql_api.documents import document_cache
+
+    stats = document_cache.pop_stats()  # like record_db_pool, each refresh adds the lookups since the last one
+    DOCUMENT_CACHE_LOOKUPS.labels("hit").inc(stats["hits"])
+    DOCUMENT_CACHE_LOOKUPS.labels("miss").inc(stats["misses"])
+    DOCUMENT_CACHE_ENTRIES.set(stats["size"])
+
+
+def connect_celery_signals():
+    """Task durations, pool gauges and the worker's metrics server for Celery workers."""
+    from celery import signals
+
+    started = {}
+
+    @signals.task_prerun.connect(weak=False)
+    def task_prerun(task_id=None, **_kwargs):
+        started[task_id] = time.perf_counter()
+
+    @signals.task_postrun.connect(weak=False)
+    def task_postrun(task_id=None, task=None, state=None, **_kwargs):
+        start = started.pop(task_id, None)
+        if start is not None:
+            CELERY_TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - start)
+        try:
+            record_pool_usage()
+        except Exception:
+            pass  # metrics must never fail a task
+
+    @signals.worker_init.connect(weak=False)
+    def worker_init(**_kwargs):
+        port = getattr(settings, "CELERY_METRICS_PORT", None)
+        if port:
+            start_http_server(int(port), registry=registry())
+
+    @signals.worker_process_shutdown.connect(weak=False)
+    def worker_process_shutdown(pid=None, **_kwargs):
+        if _multiprocess():
+            multiprocess.mark_process_dead(pid or os.getpid())
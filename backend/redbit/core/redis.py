@@ -0,0 +1,18 @@
+from django.conf import settings
+
+
+def get_redis(alias="default"):
+    """
+    Raw redis-py client behind a ``django_redis`` cache, for data structures
+    the Django cache API does not expose (sorted sets, counters, lists).
+
+    Returns None when the cache is not Redis-backed (e.g. tests/SQLite setups),
+    so callers can fall back to the database.
+    """
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if not backend.startswith("django_redis."):
+        return None
+
+    from django_redis import get_redis_connection
+
+    return get_redis_connection(alias)
@@ -0,0 +1,86 @@
+"""
+Read replicas for GraphQL queries.
+
+``ReplicaRouter`` sends reads to a replica only inside ``read_from()``,
+which the GraphQL view enters for query operations. Everything else
+(mutations, the admin, Celery tasks, Channels consumers, migrations) keeps
+using ``default``. A request picks one replica and keeps it for all of its
+reads, including the root fields that run in worker threads, because the
+choice lives in a context variable that ``sync_to_async`` copies.
+
+Replicas lag behind the primary, so after a mutation the user is pinned
+to the primary for ``DATABASE_REPLICA_STICKY_SECONDS`` (``pin_to_primary``)
+and reads their own writes. The pin is kept in the Django cache, so it
+holds across web processes.
+
+Replicas are configured with ``DATABASE_REPLICA_URLS``; adding a URL adds
+a replica. Each one mirrors ``default`` in tests, so any second local
+database (or the primary's own URL) works as a stand-in.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_alias = ContextVar("redbit_replica_read_alias", default=None)
+
+
+def _pin_key(user_id):
+    return f"db:primary:{user_id}"
+
+
+def pin_to_primary(user):
+    """Send ``user``'s reads to the primary for the next few seconds, after they wrote."""
+    if settings.DATABASE_REPLICAS and user is not None and user.is_authenticated:
+        cache.set(_pin_key(user.pk), 1, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def choose_replica(user):
+    """
+    Replica alias for the reads of one query by ``user``.
+
+    Returns None (read from the primary) when there are no replicas or the
+    user wrote within the sticky window.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    if user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)):
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def read_from(alias):
+    """Route reads inside the block to ``alias`` (None: the primary)."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # reads inside a transaction must see its writes
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # explicit, or Django would write back to the replica an instance was read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get the schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,5 +1,6 @@
 import graphene
 from apps.communities.models import Community
+from apps.posts import timelines
 from django.utils.text import slugify
 from graphql_jwt.decorators import login_required
 
@@ -42,6 +43,7 @@ class CreateCommunity(graphene.Mutation):
         
         # Auto-join creator
         community.members.add(user)
+        timelines.invalidate(user.id)
         
         return CreateCommunity(success=True, community=community, errors=[])
 
@@ -71,6 +73,7 @@ class JoinCommunity(graphene.Mutation):
         else:
             community.members.add(user)
             is_member = True
+        timelines.invalidate(user.id)
         
         return JoinCommunity(
             success=True,
@@ -1,6 +1,15 @@
 import graphene
 from apps.communities.models import Community
 from graphene_django import DjangoObjectType
+from graphql_api.loaders import (
+    CommunityIsMemberLoader,
+    CommunityMemberCountLoader,
+    CommunityMembersLoader,
+    CommunityPostCountLoader,
+    UserByIdLoader,
+    load,
+    load_related,
+)
 
 
 class CommunityType(DjangoObjectType):
@@ -8,22 +17,32 @@ class CommunityType(DjangoObjectType):
     post_count = graphene.Int()
     is_member = graphene.Boolean()
     icon = graphene.String()
+    cursor = graphene.String()  # ส่งกลับมาเป็น `after` เพื่อขอหน้าถัดไป
     
     class Meta:
         model = Community
         fields = "__all__"
     
+    def resolve_cursor(self, info):
+        return getattr(self, "_cursor", None)
+
+    def resolve_owner(self, info):
+        return load_related(info, self, "owner", UserByIdLoader)
+
+    def resolve_members(self, info):
+        return load(info, CommunityMembersLoader, self.pk)
+
     def resolve_member_count(self, info):
-        return self.members.count()
+        return load(info, CommunityMemberCountLoader, self.pk)
     
     def resolve_post_count(self, info):
-        return self.posts.count()
+        return load(info, CommunityPostCountLoader, self.pk)
     
     def resolve_is_member(self, info):
         user = info.context.user
         if not user.is_authenticated:
             return False
-        return self.members.filter(id=user.id).exists()
+        return load(info, CommunityIsMemberLoader, self.pk)
 
     def resolve_icon(self, info):
         # Return a default icon or None for now
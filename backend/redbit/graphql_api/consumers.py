@@ -5,18 +5,42 @@ Implements graphql-transport-ws protocol
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from graphql import FieldNode, get_operation_ast
+
+from apps.notifications import unread
+from core import metrics
+from graphql_api.documents import document_cache
+from graphql_api.schema import schema
+
+
+def root_fields(document, operation_name=None):
+    """Names of the root fields a subscription selects (aliases ignored)"""
+    operation = get_operation_ast(document, operation_name)
+    if operation is None:
+        return set()
+    return {
+        selection.name.value
+        for selection in operation.selection_set.selections
+        if isinstance(selection, FieldNode)
+    }
 
 
 class GraphQLSubscriptionConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         """Accept WebSocket connection"""
         await self.accept(subprotocol="graphql-transport-ws")
+        metrics.WEBSOCKET_CONNECTIONS.inc()
+        self.counted = True
         
-        # Store subscription IDs
+        # Store subscription IDs and the root fields each one selects
         self.subscriptions = {}
+        self.subscription_fields = {}
         
     async def disconnect(self, close_code):
         """Handle disconnection"""
+        if getattr(self, 'counted', False):
+            metrics.WEBSOCKET_CONNECTIONS.dec()
+            self.counted = False
         # Remove from all notification groups
         if hasattr(self, 'user_group_name'):
             await self.channel_layer.group_discard(
@@ -60,8 +84,25 @@ class GraphQLSubscriptionConsumer(AsyncWebsocketConsumer):
                 subscription_id = message.get('id')
                 payload = message.get('payload', {})
                 
+                # Reject documents that don't parse/validate (cached, so repeats are cheap)
+                document, errors = document_cache.get(schema.graphql_schema, payload.get('query') or '')
+                if errors:
+                    await self.send(text_data=json.dumps({
+                        'id': subscription_id,
+                        'type': 'error',
+                        'payload': [error.formatted for error in errors]
+                    }))
+                    return
+                
                 # Store subscription
                 self.subscriptions[subscription_id] = payload
+                fields = root_fields(document, payload.get('operationName'))
+                self.subscription_fields[subscription_id] = fields
+                
+                # The badge gets the current count right away, then every change
+                if 'onUnreadCountChanged' in fields and self.scope['user'].is_authenticated:
+                    count = await database_sync_to_async(unread.get_count)(self.scope['user'].id)
+                    await self.send_next(subscription_id, {'onUnreadCountChanged': count})
                 
                 # For notifications, we don't need to do anything else
                 # The subscription is passive - it just waits for events
@@ -71,6 +112,7 @@ class GraphQLSubscriptionConsumer(AsyncWebsocketConsumer):
                 subscription_id = message.get('id')
                 if subscription_id in self.subscriptions:
                     del self.subscriptions[subscription_id]
+                    self.subscription_fields.pop(subscription_id, None)
             
             elif msg_type == 'ping':
                 # Respond to ping
@@ -91,14 +133,29 @@ class GraphQLSubscriptionConsumer(AsyncWebsocketConsumer):
         """
         notification_data = event['notification']
         
-        # Send to all active subscriptions
-        for subscription_id in self.subscriptions.keys():
-            await self.send(text_data=json.dumps({
-                'id': subscription_id,
-                'type': 'next',
-                'payload': {
-                    'data': {
-                        'onNotificationCreated': notification_data
-                    }
-                }
-            }))
+        # Send to all active subscriptions of this field
+        for subscription_id in self.subscribers('onNotificationCreated'):
+            await self.send_next(subscription_id, {'onNotificationCreated': notification_data})
+    
+    async def unread_count_message(self, event):
+        """
+        Handle unread counter changes from channel layer (apps.notifications.unread)
+        """
+        for subscription_id in self.subscribers('onUnreadCountChanged'):
+            await self.send_next(subscription_id, {'onUnreadCountChanged': event['count']})
+    
+    def subscribers(self, field):
+        return [
+            subscription_id
+            for subscription_id, fields in self.subscription_fields.items()
+            if field in fields
+        ]
+    
+    async def send_next(self, subscription_id, data):
+        await self.send(text_data=json.dumps({
+            'id': subscription_id,
+            'type': 'next',
+            'payload': {
+                'data': data
+            }
+        }))
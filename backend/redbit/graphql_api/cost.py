@@ -0,0 +1,245 @@
+"""
+Static cost and depth analysis of GraphQL documents.
+
+``QueryCostRule`` runs with the other validation rules, so an expensive
+document is rejected before any resolver touches the database. Every object
+a field can return costs 1, and lists multiply that by their size:
+
+    cost(field) = weight(field) + list_size(field) * (1 + sum(cost(child)))
+
+The ``1`` only applies to object types (scalars are free). ``weight`` is an
+extra per-field cost from ``GRAPHENE["QUERY_COST"]["FIELD_WEIGHTS"]``. The
+list size is taken from the ``first``/``limit`` argument (literal or
+variable) and falls back to ``LIST_SIZES`` / ``DEFAULT_LIST_SIZE``, which
+match the page size the resolvers use without one.
+
+Comment trees (``TREE_FIELDS``) are charged for what the thread loader can
+return: inside them every ``replies`` list (``TREE_LISTS``) holds up to
+``maxReplies`` items, and levels below ``maxDepth`` are empty. Missing or
+too large values are bounded like the resolver does (``threads.bounds``).
+Introspection fields are free.
+"""
+from apps.posts import threads
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    GraphQLObjectType,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+)
+from graphql.validation import ValidationRule
+
+from .pagination import DEFAULT_PAGE_SIZE
+
+DEFAULTS = {
+    "MAX_COST": 10000,
+    "MAX_DEPTH": 10,
+    "MAX_LIST_SIZE": 100,
+    "DEFAULT_LIST_SIZE": DEFAULT_PAGE_SIZE,
+    "LIST_SIZE_ARGUMENTS": ("first", "limit"),
+    # "TypeName.fieldName" -> expected items for list fields without a size argument
+    "LIST_SIZES": {
+        # replies of a comment outside a loaded tree
+        "CommentType.replies": threads.DEFAULT_MAX_REPLIES,
+        "CommunityType.members": 50,
+    },
+    # fields returning a comment tree bounded by their maxReplies/maxDepth arguments
+    "TREE_FIELDS": ("Query.comments", "Query.moreReplies"),
+    # list fields holding one level of that tree
+    "TREE_LISTS": ("CommentType.replies", "ReplySliceType.replies"),
+    # "TypeName.fieldName" -> extra cost of resolving the field itself
+    "FIELD_WEIGHTS": {
+        "Query.search": 10,
+        "Query.allPosts": 2,
+        "Query.homeFeed": 5,
+        "Query.autocomplete": 2,
+    },
+}
+
+
+def cost_settings():
+    """Merged ``GRAPHENE["QUERY_COST"]`` settings."""
+    configured = getattr(settings, "GRAPHENE", {}).get("QUERY_COST", {})
+    return {**DEFAULTS, **configured}
+
+
+class CostReport:
+    """Cost and depth of the executed operation, filled in during validation."""
+
+    def __init__(self):
+        self.cost = None
+        self.depth = None
+        self.max_cost = None
+
+    def as_extension(self):
+        return {"cost": self.cost, "depth": self.depth, "maxCost": self.max_cost}
+
+
+class QueryCostAnalyzer:
+    def __init__(self, schema, fragments, variables=None, config=None):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables or {}
+        self.config = config or cost_settings()
+        self.errors = []
+
+    def _error(self, message, node, code):
+        self.errors.append(GraphQLError(message, node, extensions={"code": code}))
+
+    def _int_argument(self, field_node, name):
+        for argument in field_node.arguments:
+            if argument.name.value != name:
+                continue
+            value = argument.value
+            if isinstance(value, VariableNode):
+                value = self.variables.get(value.name.value)
+            elif isinstance(value, IntValueNode):
+                value = int(value.value)
+            return value if isinstance(value, int) else None
+        return None
+
+    def _tree_bounds(self, key, field_node):
+        """``(replies per comment, levels)`` of the tree a ``TREE_FIELDS`` field loads."""
+        max_depth, max_replies = threads.bounds(
+            self._int_argument(field_node, "maxDepth"), self._int_argument(field_node, "maxReplies")
+        )
+        if key == "Query.moreReplies":
+            # the slice itself is the first level and is returned even with maxDepth 0
+            max_depth = max(max_depth, 1)
+        return max_replies, max_depth
+
+    def _list_size(self, key, field_node):
+        for name in self.config["LIST_SIZE_ARGUMENTS"]:
+            value = self._int_argument(field_node, name)
+            if value is not None:
+                if value > self.config["MAX_LIST_SIZE"]:
+                    self._error(
+                        f"'{key}' requests {value} items; the maximum is {self.config['MAX_LIST_SIZE']}.",
+                        field_node,
+                        "LIST_TOO_LARGE",
+                    )
+                return max(value, 0)
+        return self.config["LIST_SIZES"].get(key, self.config["DEFAULT_LIST_SIZE"])
+
+    def selection_set(self, parent_type, selection_set, depth, visited=frozenset(), tree=None):
+        """
+        Return ``(cost, depth)`` of the selections made on ``parent_type``.
+        ``tree`` is ``(replies per comment, levels left)`` inside a comment tree.
+        """
+        if selection_set is None:
+            return 0, depth
+
+        cost, max_depth = 0, depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self.field(parent_type, selection, depth + 1, visited, tree)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                field_cost, field_depth = self.selection_set(
+                    fragment_type, selection.selection_set, depth, visited, tree
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited:
+                    continue  # reported by the standard rules
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                field_cost, field_depth = self.selection_set(
+                    fragment_type, fragment.selection_set, depth, visited | {name}, tree
+                )
+            else:
+                continue
+            cost += field_cost
+            max_depth = max(max_depth, field_depth)
+        return cost, max_depth
+
+    def field(self, parent_type, field_node, depth, visited, tree=None):
+        name = field_node.name.value
+        if name.startswith("__"):
+            return 0, depth - 1
+
+        fields = getattr(parent_type, "fields", None) or {}
+        definition = fields.get(name)
+        if definition is None:
+            return 0, depth  # unknown fields are reported by the standard rules
+
+        key = f"{parent_type.name}.{name}"
+        field_type = get_nullable_type(definition.type)
+        named_type = get_named_type(field_type)
+        weight = self.config["FIELD_WEIGHTS"].get(key, 0)
+
+        size = None
+        if key in self.config["TREE_FIELDS"]:
+            tree = self._tree_bounds(key, field_node)
+        elif key in self.config["TREE_LISTS"] and tree is not None:
+            replies, levels = tree
+            size = replies if levels > 0 else 0
+            tree = (replies, levels - 1)
+        else:
+            tree = None
+
+        child_cost, child_depth = self.selection_set(named_type, field_node.selection_set, depth, visited, tree)
+        item_cost = child_cost + (1 if isinstance(named_type, GraphQLObjectType) else 0)
+        if isinstance(field_type, GraphQLList):
+            item_cost *= self._list_size(key, field_node) if size is None else size
+        return weight + item_cost, child_depth
+
+    def operation(self, node):
+        root_type = self.schema.get_root_type(node.operation)
+        if root_type is None:
+            return 0, 0
+        return self.selection_set(root_type, node.selection_set, 0)
+
+
+def query_cost_rule(variables=None, operation_name=None, report=None):
+    """
+    Build a validation rule class bound to one request's variables.
+    ``report`` (a ``CostReport``) receives the cost of the selected operation.
+    """
+
+    class QueryCostRule(ValidationRule):
+        def enter_operation_definition(self, node: OperationDefinitionNode, *_args):
+            if operation_name and (node.name is None or node.name.value != operation_name):
+                return
+
+            config = cost_settings()
+            fragments = {
+                definition.name.value: definition
+                for definition in self.context.document.definitions
+                if definition.kind == "fragment_definition"
+            }
+            analyzer = QueryCostAnalyzer(self.context.schema, fragments, variables, config)
+            cost, depth = analyzer.operation(node)
+
+            if report is not None:
+                report.cost, report.depth, report.max_cost = cost, depth, config["MAX_COST"]
+
+            for error in analyzer.errors:
+                self.report_error(error)
+            if depth > config["MAX_DEPTH"]:
+                self.report_error(
+                    GraphQLError(
+                        f"Query depth {depth} exceeds the maximum of {config['MAX_DEPTH']}.",
+                        node,
+                        extensions={"code": "QUERY_TOO_DEEP", "depth": depth, "maxDepth": config["MAX_DEPTH"]},
+                    )
+                )
+            if cost > config["MAX_COST"]:
+                self.report_error(
+                    GraphQLError(
+                        f"Query cost {cost} exceeds the maximum of {config['MAX_COST']}.",
+                        node,
+                        extensions={"code": "QUERY_TOO_COMPLEX", "cost": cost, "maxCost": config["MAX_COST"]},
+                    )
+                )
+
+    return QueryCostRule
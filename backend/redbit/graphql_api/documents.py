@@ -0,0 +1,119 @@
+"""
+Process-local LRU of parsed and validated GraphQL documents.
+
+Clients send the same few operations over and over, so parsing and running
+the standard validation rules on every request is wasted CPU. Entries are
+keyed by the SHA-256 of the query text and a hash of the printed schema, so
+a deploy that changes the schema never reuses a document validated against
+the old one. Documents that fail to parse or validate are cached with their
+errors too.
+
+Only the variable-independent ``specified_rules`` are cached; rules that
+depend on the request (the cost limit in ``graphql_api.cost``) still run per
+request against the cached document.
+
+Settings (``GRAPHENE["DOCUMENT_CACHE"]``): ``MAX_SIZE`` (entries, 0 disables).
+Hits, misses and size are exported to Prometheus (``core.metrics.record_document_cache``).
+"""
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, parse, print_schema
+from graphql.validation import specified_rules, validate
+
+DEFAULT_MAX_SIZE = 1000
+
+_schema_versions = weakref.WeakKeyDictionary()
+
+
+def schema_version(schema):
+    """Short hash of the printed SDL, computed once per schema object."""
+    version = _schema_versions.get(schema)
+    if version is None:
+        version = hashlib.sha256(print_schema(schema).encode("utf-8")).hexdigest()[:16]
+        _schema_versions[schema] = version
+    return version
+
+
+def parse_and_validate(schema, query, spans=None):
+    """
+    Return ``(document, errors)``; ``document`` is None when the query does not parse.
+    ``spans`` (optional dict) receives ``"parsing"``/``"validation"`` ``(start, end)`` in ``perf_counter_ns``.
+    """
+    start = time.perf_counter_ns()
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+    finally:
+        if spans is not None:
+            spans["parsing"] = (start, time.perf_counter_ns())
+
+    start = time.perf_counter_ns()
+    errors = validate(schema, document, specified_rules, graphene_settings.MAX_VALIDATION_ERRORS)
+    if spans is not None:
+        spans["validation"] = (start, time.perf_counter_ns())
+    return document, errors
+
+
+class DocumentCache:
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        configured = getattr(settings, "GRAPHENE", {}).get("DOCUMENT_CACHE", {})
+        return configured.get("MAX_SIZE", DEFAULT_MAX_SIZE)
+
+    def get(self, schema, query, spans=None):
+        """
+        Parsed and validated ``(document, errors)`` for ``query`` against ``schema``.
+        On a hit the lookup itself is reported as the ``"parsing"`` span.
+        """
+        start = time.perf_counter_ns()
+        key = (schema_version(schema), hashlib.sha256(query.encode("utf-8")).hexdigest())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if spans is not None:
+                    spans["parsing"] = (start, time.perf_counter_ns())
+                return entry
+            self.misses += 1
+
+        entry = parse_and_validate(schema, query, spans)
+        max_size = self.max_size
+        if max_size > 0:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > max_size:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def pop_stats(self):
+        """Hits and misses since the last call (the counters are reset) and the current size."""
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+            self.hits = self.misses = 0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+document_cache = DocumentCache()
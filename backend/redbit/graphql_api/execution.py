@@ -0,0 +1,30 @@
+"""
+Concurrent execution of root query fields for ``AsyncRedbitGraphQLView``.
+
+Resolvers and the ORM are synchronous, so they must not run on the event
+loop. ``ThreadedRootExecutionContext`` resolves each root field, with its
+whole subtree, in a worker thread. graphql-core gathers the root fields of
+a query, so independent fields (``me``, ``allPosts``, ``trendingCommunities``)
+run in parallel, each on its own database connection. Mutations must stay
+serial and inside one transaction, so the view executes them in a single
+thread with the default context instead.
+"""
+from contextlib import nullcontext
+
+from channels.db import database_sync_to_async
+from graphql import ExecutionContext
+
+
+class ThreadedRootExecutionContext(ExecutionContext):
+    def execute_field(self, parent_type, source, field_nodes, path):
+        if path.prev is not None:
+            return super().execute_field(parent_type, source, field_nodes, path)
+        # close_old_connections() around the call, as for any request, so that
+        # worker thread connections honour CONN_MAX_AGE
+        run = database_sync_to_async(self._execute_root_field, thread_sensitive=False)
+        return run(parent_type, source, field_nodes, path)
+
+    def _execute_root_field(self, parent_type, source, field_nodes, path):
+        profile = getattr(self.context_value, "sql_profile", None)
+        with profile.capture() if profile else nullcontext():
+            return super().execute_field(parent_type, source, field_nodes, path)
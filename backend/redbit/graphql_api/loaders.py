@@ -0,0 +1,324 @@
+"""
+Request-scoped DataLoaders for graphene resolvers.
+
+Execution here is synchronous, so a loader cannot wait for sibling objects
+to ask for their keys. Instead, ``DataLoaderMiddleware`` primes every loader
+with the keys of each list of model instances a field returns. The first
+``load()`` for any object in that list then fetches the whole list with one
+``IN (...)`` query and later siblings are served from the request cache.
+
+The async view resolves root fields in parallel threads that share the
+request's loaders, so loaders and the registry are guarded by locks.
+"""
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from apps.communities.models import Community
+from apps.notifications.models import Notification
+from apps.posts.models import Comment, Post
+from apps.users.models import User
+from apps.votes.models import Vote
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Model, QuerySet
+
+
+class Loader(ABC):
+    """
+    Batch-loads one kind of value for one request.
+
+    ``primed_by`` maps a model to the attribute that holds this loader's key
+    on its instances, e.g. ``{Post: "author_id"}`` for a user loader.
+    """
+
+    primed_by = {}
+    default = None
+
+    def __init__(self, context):
+        self.context = context
+        self._cache = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @property
+    def viewer(self):
+        return getattr(self.context, "user", None)
+
+    def prime(self, keys):
+        with self._lock:
+            self._pending.update(key for key in keys if key is not None and key not in self._cache)
+
+    def load(self, key):
+        with self._lock:
+            if key not in self._cache:
+                self._pending.add(key)
+                keys = list(self._pending)
+                self._pending.clear()
+                results = self.batch_load(keys)
+                for k in keys:
+                    self._cache[k] = results.get(k, self.default)
+            value = self._cache[key]
+        return list(value) if isinstance(value, list) else value
+
+    @abstractmethod
+    def batch_load(self, keys):
+        """Return a dict mapping each found key to its value."""
+
+
+class UserByIdLoader(Loader):
+    primed_by = {Post: "author_id", Comment: "author_id", Community: "owner_id", Notification: "sender_id"}
+
+    def batch_load(self, keys):
+        return User.objects.in_bulk(keys)
+
+
+class CommunityByIdLoader(Loader):
+    primed_by = {Post: "community_id"}
+
+    def batch_load(self, keys):
+        return Community.objects.in_bulk(keys)
+
+
+class PostByIdLoader(Loader):
+    primed_by = {Comment: "post_id"}
+
+    def batch_load(self, keys):
+        return Post.objects.select_related("author", "community").in_bulk(keys)
+
+
+class CommentByIdLoader(Loader):
+    primed_by = {Comment: "parent_id"}
+
+    def batch_load(self, keys):
+        return Comment.objects.select_related("author").in_bulk(keys)
+
+
+class UserVoteLoader(Loader):
+    """Vote value (1/-1) the current user gave to each object of ``model``."""
+
+    model = None
+
+    def batch_load(self, keys):
+        if not self.viewer or not self.viewer.is_authenticated:
+            return {}
+        votes = Vote.objects.filter(
+            user=self.viewer,
+            content_type=ContentType.objects.get_for_model(self.model),
+            object_id__in=keys,
+        ).values_list("object_id", "value")
+        return dict(votes)
+
+
+class PostUserVoteLoader(UserVoteLoader):
+    model = Post
+    primed_by = {Post: "pk"}
+
+
+class CommentUserVoteLoader(UserVoteLoader):
+    model = Comment
+    primed_by = {Comment: "pk"}
+
+
+class PostCommentCountLoader(Loader):
+    primed_by = {Post: "pk"}
+    default = 0
+
+    def batch_load(self, keys):
+        rows = Comment.objects.filter(post_id__in=keys).values("post_id").annotate(n=Count("id")).order_by()
+        return {row["post_id"]: row["n"] for row in rows}
+
+
+class CommentRepliesLoader(Loader):
+    primed_by = {Comment: "pk"}
+    default = []
+
+    def batch_load(self, keys):
+        replies = defaultdict(list)
+        for reply in Comment.objects.filter(parent_id__in=keys).select_related("author"):
+            replies[reply.parent_id].append(reply)
+        return replies
+
+
+class CommunityMemberCountLoader(Loader):
+    primed_by = {Community: "pk"}
+    default = 0
+
+    def batch_load(self, keys):
+        Membership = Community.members.through
+        rows = (
+            Membership.objects.filter(community_id__in=keys).values("community_id").annotate(n=Count("id")).order_by()
+        )
+        return {row["community_id"]: row["n"] for row in rows}
+
+
+class CommunityPostCountLoader(Loader):
+    primed_by = {Community: "pk"}
+    default = 0
+
+    def batch_load(self, keys):
+        rows = Post.objects.filter(community_id__in=keys).values("community_id").annotate(n=Count("id")).order_by()
+        return {row["community_id"]: row["n"] for row in rows}
+
+
+class CommunityIsMemberLoader(Loader):
+    primed_by = {Community: "pk"}
+    default = False
+
+    def batch_load(self, keys):
+        if not self.viewer or not self.viewer.is_authenticated:
+            return {}
+        Membership = Community.members.through
+        joined = Membership.objects.filter(user_id=self.viewer.id, community_id__in=keys).values_list(
+            "community_id", flat=True
+        )
+        return {community_id: True for community_id in joined}
+
+
+class CommunityMembersLoader(Loader):
+    primed_by = {Community: "pk"}
+    default = []
+
+    def batch_load(self, keys):
+        Membership = Community.members.through
+        members = defaultdict(list)
+        for membership in Membership.objects.filter(community_id__in=keys).select_related("user"):
+            members[membership.community_id].append(membership.user)
+        return members
+
+
+class UserFollowerCountLoader(Loader):
+    primed_by = {User: "pk"}
+    default = 0
+
+    def batch_load(self, keys):
+        Follow = User.following.through
+        rows = Follow.objects.filter(to_user_id__in=keys).values("to_user_id").annotate(n=Count("id")).order_by()
+        return {row["to_user_id"]: row["n"] for row in rows}
+
+
+class UserFollowingCountLoader(Loader):
+    primed_by = {User: "pk"}
+    default = 0
+
+    def batch_load(self, keys):
+        Follow = User.following.through
+        rows = Follow.objects.filter(from_user_id__in=keys).values("from_user_id").annotate(n=Count("id")).order_by()
+        return {row["from_user_id"]: row["n"] for row in rows}
+
+
+class UserIsFollowingLoader(Loader):
+    primed_by = {User: "pk"}
+    default = False
+
+    def batch_load(self, keys):
+        if not self.viewer or not self.viewer.is_authenticated:
+            return {}
+        Follow = User.following.through
+        followed = Follow.objects.filter(from_user_id=self.viewer.id, to_user_id__in=keys).values_list(
+            "to_user_id", flat=True
+        )
+        return {user_id: True for user_id in followed}
+
+
+LOADERS = (
+    UserByIdLoader,
+    CommunityByIdLoader,
+    PostByIdLoader,
+    CommentByIdLoader,
+    PostUserVoteLoader,
+    CommentUserVoteLoader,
+    PostCommentCountLoader,
+    CommentRepliesLoader,
+    CommunityMemberCountLoader,
+    CommunityPostCountLoader,
+    CommunityIsMemberLoader,
+    CommunityMembersLoader,
+    UserFollowerCountLoader,
+    UserFollowingCountLoader,
+    UserIsFollowingLoader,
+)
+
+
+class LoaderRegistry:
+    """All loaders of one request, created lazily."""
+
+    def __init__(self, context):
+        self.context = context
+        self._loaders = {}
+        self._lock = threading.Lock()
+
+    def get(self, loader_class):
+        if loader_class not in self._loaders:
+            with self._lock:
+                if loader_class not in self._loaders:
+                    self._loaders[loader_class] = loader_class(self.context)
+        return self._loaders[loader_class]
+
+    def prime(self, objects):
+        by_model = defaultdict(list)
+        seen = set()
+        stack = list(objects)
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            by_model[type(obj)].append(obj)
+            # related objects fetched with select_related are primed as well
+            stack.extend(related for related in obj._state.fields_cache.values() if isinstance(related, Model))
+
+        for model, instances in by_model.items():
+            for loader_class in LOADERS:
+                attr = loader_class.primed_by.get(model)
+                if attr is not None:
+                    self.get(loader_class).prime(getattr(obj, attr) for obj in instances)
+
+
+_registry_lock = threading.Lock()
+
+
+def get_loaders(info):
+    context = info.context
+    registry = getattr(context, "_loaders", None)
+    if registry is None:
+        with _registry_lock:
+            registry = getattr(context, "_loaders", None)
+            if registry is None:
+                registry = LoaderRegistry(context)
+                context._loaders = registry
+    return registry
+
+
+def load(info, loader_class, key):
+    return get_loaders(info).get(loader_class).load(key)
+
+
+def load_related(info, obj, field_name, loader_class):
+    """
+    Resolve a forward foreign key through a loader unless the related object
+    was already fetched with ``select_related``.
+    """
+    field = obj._meta.get_field(field_name)
+    if field.is_cached(obj):
+        return getattr(obj, field_name)
+    key = getattr(obj, field.attname)
+    if key is None:
+        return None
+    return load(info, loader_class, key)
+
+
+class DataLoaderMiddleware:
+    """
+    Graphene middleware that primes the request's loaders with every list of
+    model instances returned by a field.
+    """
+
+    def resolve(self, next, root, info, **kwargs):
+        result = next(root, info, **kwargs)
+
+        if isinstance(result, QuerySet):
+            result = list(result)
+        if isinstance(result, list) and result and isinstance(result[0], Model):
+            get_loaders(info).prime(result)
+
+        return result
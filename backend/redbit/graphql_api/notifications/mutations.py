@@ -1,5 +1,7 @@
 import graphene
+from apps.notifications import unread
 from apps.notifications.models import Notification
+from django.db import transaction
 from graphql_jwt.decorators import login_required
 
 
@@ -18,13 +20,16 @@ class MarkNotificationRead(graphene.Mutation):
                     id=notification_id,
                     recipient=user
                 )
-                notif.is_read = True
-                notif.save()
+                if not notif.is_read:
+                    notif.is_read = True
+                    notif.save()
+                    transaction.on_commit(lambda: unread.adjust({user.id: -1}))
             except Notification.DoesNotExist:
                 return MarkNotificationRead(success=False)
         else:
             # Mark all as read
             user.notifications.filter(is_read=False).update(is_read=True)
+            transaction.on_commit(lambda: unread.reset(user.id))
             
         return MarkNotificationRead(success=True)
 
@@ -1,4 +1,5 @@
 import graphene
+from apps.notifications import unread
 from graphql_jwt.decorators import login_required
 
 from .types import NotificationType
@@ -18,4 +19,5 @@ class NotificationQuery(graphene.ObjectType):
     
     @login_required
     def resolve_unread_count(self, info):
-        return info.context.user.notifications.filter(is_read=False).count()
+        # Redis counter (see apps.notifications.unread), not COUNT(*) on every badge refresh
+        return unread.get_count(info.context.user.id)
@@ -7,6 +7,7 @@ from graphql_api.notifications.types import NotificationType
 
 class NotificationSubscription(graphene.ObjectType):
     on_notification_created = graphene.Field(NotificationType)
+    on_unread_count_changed = graphene.Int()
     
     def resolve_on_notification_created(root, info):
         """
@@ -15,3 +16,10 @@ class NotificationSubscription(graphene.ObjectType):
         """
         # This is a placeholder - actual subscription logic is handled by the consumer
         return root
+
+    def resolve_on_unread_count_changed(root, info):
+        """
+        Unread notification count of the authenticated user, sent when
+        subscribing and whenever the counter changes (see apps.notifications.unread).
+        """
+        return root
@@ -1,8 +1,24 @@
 from apps.notifications.models import Notification
+from django.contrib.contenttypes.models import ContentType
 from graphene_django import DjangoObjectType
+from graphql_api.loaders import UserByIdLoader, load, load_related
 
 
 class NotificationType(DjangoObjectType):
     class Meta:
         model = Notification
         fields = "__all__"
+
+    def resolve_sender(self, info):
+        return load_related(info, self, "sender", UserByIdLoader)
+
+    def resolve_recipient(self, info):
+        if self.recipient_id == getattr(info.context.user, "id", None):
+            return info.context.user
+        return load(info, UserByIdLoader, self.recipient_id)
+
+    def resolve_content_type(self, info):
+        if self.content_type_id is None:
+            return None
+        # get_for_id ใช้ cache ของ ContentType อยู่แล้ว
+        return ContentType.objects.get_for_id(self.content_type_id)
@@ -0,0 +1,87 @@
+"""
+Automatic persisted queries (Apollo APQ protocol, version 1).
+
+A client first sends only ``extensions.persistedQuery.sha256Hash``. If the
+server has never seen that hash it answers with ``PersistedQueryNotFound``
+and the client retries with the full query text, which is then stored under
+its hash. Later requests, including HTTP GET with the extensions in the
+query string, carry the hash alone, so the query text is neither uploaded
+nor part of the URL and identical GETs can be cached by a CDN.
+
+Queries are kept in the Django cache (Redis in every environment).
+"""
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError
+
+APQ_VERSION = 1
+DEFAULT_TTL = 30 * 24 * 60 * 60  # seconds
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class PersistedQueryError(GraphQLError):
+    def __init__(self, message, code, status=200):
+        super().__init__(message, extensions={"code": code})
+        self.status = status
+
+
+def _config():
+    return getattr(settings, "GRAPHENE", {}).get("PERSISTED_QUERIES", {})
+
+
+def _store():
+    return caches[_config().get("CACHE_ALIAS", "default")]
+
+
+def query_key(sha256_hash):
+    return f"apq:{sha256_hash}"
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def _persisted_query(request, data):
+    extensions = data.get("extensions") or request.GET.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise PersistedQueryError("Extensions are invalid JSON.", "BAD_REQUEST", 400) from None
+    if not isinstance(extensions, dict):
+        return None
+    return extensions.get("persistedQuery")
+
+
+def resolve(request, data):
+    """
+    Return the request ``data`` with its ``query`` filled in from the store
+    when the request uses a persisted query hash.
+    """
+    persisted = _persisted_query(request, data)
+    if not persisted:
+        return data
+    if not isinstance(persisted, dict) or persisted.get("version") != APQ_VERSION:
+        raise PersistedQueryError("PersistedQueryNotSupported", "PERSISTED_QUERY_NOT_SUPPORTED")
+
+    sha256_hash = str(persisted.get("sha256Hash", "")).lower()
+    if not _SHA256_RE.match(sha256_hash):
+        raise PersistedQueryError("Invalid persisted query hash.", "BAD_REQUEST", 400)
+
+    query = request.GET.get("query") or data.get("query")
+    if query:
+        # registration: the client sent the text after a miss
+        if query_hash(query) != sha256_hash:
+            raise PersistedQueryError("Provided sha does not match query.", "BAD_REQUEST", 400)
+        _store().set(query_key(sha256_hash), query, _config().get("TTL", DEFAULT_TTL))
+        return data
+
+    query = _store().get(query_key(sha256_hash))
+    if query is None:
+        raise PersistedQueryError("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+    return {**data, "query": query}
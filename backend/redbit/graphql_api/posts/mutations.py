@@ -1,14 +1,18 @@
 import graphene
 from apps.communities.models import Community
+from apps.posts import feed_cache
 from apps.posts.models import Comment, Post
-from django.contrib.contenttypes.models import ContentType
+from apps.posts.services import cast_vote
 from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator
+from django.db import transaction
 from graphql_jwt.decorators import login_required
 from graphene_file_upload.scalars import Upload
 from .types import CommentType, PostType
 from apps.notifications.services import create_notification
 from apps.notifications.models import Notification
+from tasks.feeds import fanout_post_task
+from tasks.notifications import update_post_score
 
 
 class VoteMutation(graphene.Mutation):
@@ -33,16 +37,10 @@ class VoteMutation(graphene.Mutation):
         except Post.DoesNotExist:
             return VoteMutation(success=False, errors=["Post not found."])
 
-        content_type = ContentType.objects.get_for_model(Post)
-        vote, created = post.votes.get_or_create(user=user, content_type=content_type, object_id=post_id)
+        vote, created = cast_vote(user, post, value)
+        transaction.on_commit(lambda: feed_cache.update_post(post, sorts=("top",)))
+        transaction.on_commit(lambda: update_post_score.delay(post.id))
 
-        if not created:
-            if vote.value == value:
-                vote.delete()
-            else:
-                vote.value = value
-                vote.save()
-        
         # Notify if upvote
         if value == 1 and created:
             create_notification(
@@ -138,6 +136,8 @@ class CreatePost(graphene.Mutation):
         post = Post.objects.create(
             author=user, community=community, title=title, content=content, image_url=image_url, image=image
         )
+        transaction.on_commit(lambda: feed_cache.add_post(post))
+        transaction.on_commit(lambda: fanout_post_task.delay(post.id))
 
         return CreatePost(success=True, post=post, errors=[])
 
@@ -211,7 +211,9 @@ class DeletePost(graphene.Mutation):
             if post.author != user and not user.is_staff:
                 return DeletePost(success=False)
 
+            post_id, community_id = post.id, post.community_id
             post.delete()
+            transaction.on_commit(lambda: feed_cache.remove_post(post_id, community_id))
             return DeletePost(success=True)
         except Post.DoesNotExist:
             return DeletePost(success=False)
@@ -1,8 +1,56 @@
 import graphene
+from apps.communities.models import Community
+from apps.posts import feed_cache, threads, timelines
 from apps.posts.models import Comment, Post
+from apps.posts.ranking import POST_ORDERINGS, TOP_WINDOWS, top_post_totals
+from graphql import GraphQLError
+from graphql_api.loaders import get_loaders
+from graphql_api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    cursor_for,
+    cursor_value,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+    paginate,
+)
+from graphql_api.search.schema import search_page
 from graphql_jwt.decorators import login_required
 
-from .types import CommentType, PostType
+from .types import CommentType, PostType, ReplySliceType, decode_replies_token, encode_replies_token
+
+COMMENT_ORDERING = ("-created_at", "-id")
+
+
+def _windowed_top(queryset, community_id, window, first, after, offset):
+    """One page of the top feed for a time window; cursors hold (upvotes in window, id)."""
+    cursor = None
+    if after:
+        values = decode_cursor(after)
+        if len(values) != 2:
+            raise GraphQLError("Invalid cursor.")
+        try:
+            cursor = (int(values[0]), int(values[1]))
+        except (TypeError, ValueError):
+            raise GraphQLError("Invalid cursor.") from None
+
+    rows = feed_cache.get_page_ids(
+        community_id,
+        "top",
+        first,
+        after_id=cursor[1] if cursor else None,
+        offset=offset,
+        window=window,
+        with_scores=True,
+    )
+    if rows is None:
+        rows = top_post_totals(window, community_id=community_id, limit=first, after=cursor, offset=offset)
+
+    totals = {post_id: int(total) for post_id, total in rows}
+    posts = feed_cache.hydrate(list(totals), queryset)
+    for post in posts:
+        post._cursor = encode_cursor([totals[post.id], post.id])
+    return posts
 
 
 class PostQuery(graphene.ObjectType):
@@ -15,76 +63,151 @@ class PostQuery(graphene.ObjectType):
         limit=graphene.Int(),
         offset=graphene.Int(),
         after=graphene.String(),
-        first=graphene.String(),
+        first=graphene.Int(),
+        window=graphene.String(),  # top only: "day", "week", "month" or "all"
     )
 
     # Single post
     post = graphene.Field(PostType, id=graphene.ID(required=True))
 
     # Comments
-    comments = graphene.List(CommentType, post_id=graphene.ID(required=True))
+    # Comments: a page of top-level comments (or the subtree under root_id) with nested replies.
+    # The tree is cut at max_depth levels and max_replies replies per comment; truncated comments
+    # carry a moreRepliesToken for moreReplies.
+    comments = graphene.List(
+        CommentType,
+        post_id=graphene.ID(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+        root_id=graphene.ID(),
+        max_depth=graphene.Int(),
+        max_replies=graphene.Int(),
+    )
+
+    # Next slice of a truncated comment branch
+    more_replies = graphene.Field(
+        ReplySliceType, token=graphene.String(required=True), max_depth=graphene.Int(), max_replies=graphene.Int()
+    )
 
     # User's posts
-    user_posts = graphene.List(PostType, username=graphene.String(required=True))
+    user_posts = graphene.List(
+        PostType, username=graphene.String(required=True), first=graphene.Int(), after=graphene.String()
+    )
 
     # My posts
-    my_posts = graphene.List(PostType)
-
-    def resolve_all_posts(self, info, sort_by="new", community=None, search=None, limit=20, offset=0):
-        from django.db import models
-        from django.db.models import Count, Q
-
-        queryset = Post.objects.select_related("author", "community").prefetch_related("votes")
+    my_posts = graphene.List(PostType, first=graphene.Int(), after=graphene.String())
+
+    # Home feed: joined communities + followed users
+    home_feed = graphene.List(PostType, first=graphene.Int(), after=graphene.String())
+
+    def resolve_all_posts(
+        self,
+        info,
+        sort_by="new",
+        community=None,
+        search=None,
+        limit=DEFAULT_PAGE_SIZE,
+        offset=0,
+        after=None,
+        first=None,
+        window=None,
+    ):
+        from django.db.models import Q
+
+        queryset = Post.objects.select_related("author", "community")
+        if sort_by not in POST_ORDERINGS:
+            sort_by = "new"
+        # Sort: hot_score is materialized on Post and kept fresh by Celery (see apps.posts.ranking)
+        ordering = POST_ORDERINGS[sort_by]
 
         # Filter by community
+        community_id = None
         if community:
-            queryset = queryset.filter(Q(community__name=community) | Q(community__slug=community))
+            community_id = (
+                Community.objects.filter(Q(name=community) | Q(slug=community)).values_list("id", flat=True).first()
+            )
+            if community_id is None:
+                return []
+            queryset = queryset.filter(community_id=community_id)
 
-        # Search
+        # Search: ranked by relevance through the full-text index (apps.search)
         if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(content__icontains=search))
-
-        # Sort
-        if sort_by == "hot":
-            # Simple hot algorithm: upvotes / age
-            from datetime import timedelta
-            from django.db.models import ExpressionWrapper, F, fields
-            from django.utils import timezone
-
-            queryset = queryset.annotate(
-                upvote_count=Count("votes", filter=Q(votes__value=1)),
-                age_hours=ExpressionWrapper(
-                    (timezone.now() - F("created_at")) / timedelta(hours=1), output_field=fields.FloatField()
-                ),
-                hot_score=ExpressionWrapper(F("upvote_count") / (F("age_hours") + 2), output_field=fields.FloatField()),
-            ).order_by("-hot_score")
-        elif sort_by == "top":
-            queryset = queryset.annotate(upvote_count=Count("votes", filter=Q(votes__value=1))).order_by(
-                "-upvote_count"
-            )
-        else:  # new
-            queryset = queryset.order_by("-created_at")
+            return search_page(Post, search, page_size(first or limit), after=after, queryset=queryset, offset=offset)
+
+        # Windowed top: summed from hourly vote rollups, never from raw votes
+        if sort_by == "top" and window in TOP_WINDOWS:
+            return _windowed_top(queryset, community_id, window, page_size(first or limit), after, offset)
+
+        # Top pages of every feed come from the Redis ranked feed cache
+        after_id = None
+        if after:
+            values = decode_cursor(after)
+            if len(values) != len(ordering):
+                raise GraphQLError("Invalid cursor.")
+            after_id = cursor_value(Post, "id", values[-1])
+        post_ids = feed_cache.get_page_ids(
+            community_id, sort_by, page_size(first or limit), after_id=after_id, offset=offset
+        )
+        if post_ids is not None:
+            posts = feed_cache.hydrate(post_ids, queryset)
+            for post in posts:
+                post._cursor = cursor_for(post, ordering)
+            return posts
 
-        return queryset[offset : offset + limit]
+        return paginate(queryset, ordering, first=first or limit, after=after, offset=offset)
 
     def resolve_post(self, info, id):
         try:
-            return Post.objects.select_related("author", "community").prefetch_related("votes").get(pk=id)
+            return Post.objects.select_related("author", "community").get(pk=id)
         except Post.DoesNotExist:
             return None
 
-    def resolve_comments(self, info, post_id):
-        return (
-            Comment.objects.filter(post_id=post_id, parent=None)
-            .select_related("author")
-            .prefetch_related("votes", "replies")
-        )
+    def resolve_comments(
+        self, info, post_id, first=None, after=None, root_id=None, max_depth=None, max_replies=None
+    ):
+        if root_id is not None:
+            try:
+                root_id = int(root_id)
+            except ValueError:
+                raise GraphQLError("Invalid rootId.") from None
+            root, tree = threads.load_subtree(post_id, root_id, max_depth=max_depth, max_replies=max_replies)
+            roots = [root] if root is not None else []
+        else:
+            queryset = Comment.objects.filter(post_id=post_id, parent=None).select_related("author")
+            roots = paginate(queryset, COMMENT_ORDERING, first=first, after=after)
+            # Every reply under this page of roots comes from one query ordered by materialized path
+            tree = threads.load_replies(roots, max_depth=max_depth, max_replies=max_replies)
+
+        # Vote lookups for the whole tree are batched into one query
+        get_loaders(info).prime(tree)
+        return roots
+
+    def resolve_more_replies(self, info, token, max_depth=None, max_replies=None):
+        parent_id, after = decode_replies_token(token)
+        replies, more, tree = threads.load_more(parent_id, after, max_depth=max_depth, max_replies=max_replies)
+        get_loaders(info).prime(tree)
+        return ReplySliceType(replies=replies, more_replies_token=encode_replies_token(more))
+
+    def resolve_user_posts(self, info, username, first=None, after=None):
+        queryset = Post.objects.filter(author__username=username).select_related("author", "community")
+        return paginate(queryset, POST_ORDERINGS["new"], first=first, after=after)
 
-    def resolve_user_posts(self, info, username):
-        return (
-            Post.objects.filter(author__username=username).select_related("author", "community").order_by("-created_at")
-        )
+    @login_required
+    def resolve_my_posts(self, info, first=None, after=None):
+        queryset = Post.objects.filter(author=info.context.user).select_related("community")
+        return paginate(queryset, POST_ORDERINGS["new"], first=first, after=after)
 
     @login_required
-    def resolve_my_posts(self, info):
-        return Post.objects.filter(author=info.context.user).select_related("community").order_by("-created_at")
+    def resolve_home_feed(self, info, first=None, after=None):
+        ordering = POST_ORDERINGS["new"]
+        cursor = None
+        if after:
+            values = decode_cursor(after)
+            if len(values) != len(ordering):
+                raise GraphQLError("Invalid cursor.")
+            cursor = (cursor_value(Post, "created_at", values[0]), cursor_value(Post, "id", values[1]))
+
+        posts = timelines.home_feed(info.context.user, page_size(first), after=cursor)
+        for post in posts:
+            post._cursor = cursor_for(post, ordering)
+        return posts
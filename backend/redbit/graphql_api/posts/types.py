@@ -1,8 +1,45 @@
 import graphene
 from apps.posts.models import Comment, Post
 from apps.votes.models import Vote
+from django.core.exceptions import ValidationError
 from django.utils.timesince import timesince
 from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from graphql_api.loaders import (
+    CommentByIdLoader,
+    CommentRepliesLoader,
+    CommentUserVoteLoader,
+    CommunityByIdLoader,
+    PostByIdLoader,
+    PostCommentCountLoader,
+    PostUserVoteLoader,
+    UserByIdLoader,
+    load,
+    load_related,
+)
+from graphql_api.pagination import decode_cursor, encode_cursor
+
+
+def encode_replies_token(more):
+    """continuation ของ apps.posts.threads (`_more`) -> token ที่ client ส่งกลับมาใน moreReplies"""
+    if more is None:
+        return None
+    parent_id, after = more
+    return encode_cursor([parent_id, *after] if after else [parent_id])
+
+
+def decode_replies_token(token):
+    values = decode_cursor(token)
+    if len(values) not in (1, 3):
+        raise GraphQLError("Invalid cursor.")
+    try:
+        parent_id = int(values[0])
+        after = None
+        if len(values) == 3:
+            after = (Comment._meta.get_field("created_at").to_python(values[1]), int(values[2]))
+    except (TypeError, ValueError, ValidationError):
+        raise GraphQLError("Invalid cursor.") from None
+    return parent_id, after
 
 
 class PostType(DjangoObjectType):
@@ -17,6 +54,7 @@ class PostType(DjangoObjectType):
     vote_count = graphene.Int()
     comment_count = graphene.Int()
     user_vote = graphene.String()  # "up", "down", หรือ null
+    cursor = graphene.String()  # ส่งกลับมาเป็น `after` เพื่อขอหน้าถัดไป
 
     class Meta:
         model = Post
@@ -34,32 +72,36 @@ class PostType(DjangoObjectType):
         """แปลง datetime เป็น 'X hours ago'"""
         return f"{timesince(self.created_at)} ago"
 
+    def resolve_cursor(self, info):
+        return getattr(self, "_cursor", None)
+
     def resolve_upvotes(self, info):
-        """ดึงคะแนนโหวตสุทธิจาก property ของ model"""
-        return self.total_votes
+        """ดึงคะแนนโหวตสุทธิจากตัวนับที่เก็บไว้ใน model"""
+        return self.score
 
     def resolve_vote_count(self, info):
-        return self.total_votes
+        return self.score
+
+    def resolve_author(self, info):
+        return load_related(info, self, "author", UserByIdLoader)
+
+    def resolve_community(self, info):
+        return load_related(info, self, "community", CommunityByIdLoader)
 
     def resolve_comment_count(self, info):
-        """ดึงจำนวนคอมเมนต์จาก property ของ model"""
-        return self.comment_count
+        """ดึงจำนวนคอมเมนต์ของทุกโพสต์ในหน้าเดียวกันด้วย query เดียว"""
+        return load(info, PostCommentCountLoader, self.pk)
 
     def resolve_user_vote(self, info):
         """
         ตรวจสอบว่า user ที่ login อยู่ โหวตโพสต์นี้หรือยัง
+        (โหลดโหวตของทุกโพสต์ในหน้าเดียวกันพร้อมกันผ่าน DataLoader)
         """
-        user = info.context.user
-        if not user.is_authenticated:
-            return None
-        try:
-            # ใช้ GenericRelation 'votes' ที่เราตั้งใน model
-            vote = self.votes.get(user=user)
-            # VoteType ใน model ของคุณคือ "UPVOTE" หรือ "DOWNVOTE"
-            # frontend คาดหวัง "up" หรือ "down"
-            return "up" if vote.value == Vote.VoteType.UPVOTE else "down"
-        except Vote.DoesNotExist:
+        value = load(info, PostUserVoteLoader, self.pk)
+        if value is None:
             return None
+        # frontend คาดหวัง "up" หรือ "down"
+        return "up" if value == Vote.VoteType.UPVOTE else "down"
 
 
 class CommentType(DjangoObjectType):
@@ -70,8 +112,11 @@ class CommentType(DjangoObjectType):
     time_ago = graphene.String()
     upvotes = graphene.Int()
     user_vote = graphene.String()
+    cursor = graphene.String()
     # Field สำหรับ nested replies
     replies = graphene.List(lambda: CommentType)
+    # มีค่าเมื่อ replies ถูกตัดด้วย maxDepth/maxReplies ส่งให้ moreReplies เพื่อโหลดส่วนถัดไป
+    more_replies_token = graphene.String()
 
     class Meta:
         model = Comment
@@ -87,21 +132,42 @@ class CommentType(DjangoObjectType):
     def resolve_time_ago(self, info):
         return f"{timesince(self.created_at)} ago"
 
+    def resolve_cursor(self, info):
+        return getattr(self, "_cursor", None)
+
     def resolve_upvotes(self, info):
-        return self.total_votes
+        return self.score
+
+    def resolve_author(self, info):
+        return load_related(info, self, "author", UserByIdLoader)
+
+    def resolve_post(self, info):
+        return load_related(info, self, "post", PostByIdLoader)
+
+    def resolve_parent(self, info):
+        return load_related(info, self, "parent", CommentByIdLoader)
 
     def resolve_user_vote(self, info):
-        user = info.context.user
-        if not user.is_authenticated:
-            return None
-        try:
-            vote = self.votes.get(user=user)
-            return "up" if vote.value == 1 else "down"
-        except Vote.DoesNotExist:
+        value = load(info, CommentUserVoteLoader, self.pk)
+        if value is None:
             return None
+        return "up" if value == Vote.VoteType.UPVOTE else "down"
+
+    def resolve_more_replies_token(self, info):
+        return encode_replies_token(getattr(self, "_more", None))
 
     def resolve_replies(self, info):
         """
         ดึง replies (comment ลูก) ของ comment นี้
+        ถ้า thread ถูกโหลดมาทั้งต้นแล้ว (apps.posts.threads) ใช้ที่ประกอบไว้ ไม่ต้อง query เพิ่ม
         """
-        return self.replies.all()
+        if hasattr(self, "_replies"):
+            return self._replies
+        return load(info, CommentRepliesLoader, self.pk)
+
+
+class ReplySliceType(graphene.ObjectType):
+    """replies ส่วนถัดไปจาก moreReplies"""
+
+    replies = graphene.List(CommentType)
+    more_replies_token = graphene.String()
@@ -0,0 +1,134 @@
+"""
+Per-request SQL profiling of GraphQL execution.
+
+``RedbitGraphQLView`` installs a ``SQLProfile`` as a database execute wrapper
+for the duration of ``execute()``, and ``SQLProfilerMiddleware`` tells the
+profile which field is being resolved. A query is charged to the last field
+whose resolver started, so a root field returning a queryset is charged for
+evaluating it. Paths drop list indices (``allPosts.author``), which makes one
+query per list item show up as a single path with many identical statements.
+
+The report counts queries and DB time per path and lists statements that ran
+at least ``DUPLICATE_THRESHOLD`` times under the same path (likely N+1s).
+Operations over ``MAX_QUERIES`` queries or with duplicates are logged; with
+``EXTENSIONS`` on, the report is also returned as ``extensions.sql``.
+
+The current path is tracked per thread: the async view resolves root fields
+in worker threads, each of which enters ``capture()`` for its own connections.
+
+Settings (``GRAPHENE["SQL_PROFILER"]``): ``ENABLED`` and ``EXTENSIONS``
+(both default to ``DEBUG``), ``DUPLICATE_THRESHOLD``, ``MAX_QUERIES``.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "DUPLICATE_THRESHOLD": 5,
+    "MAX_QUERIES": 50,
+    "SQL_PREVIEW_LENGTH": 200,
+}
+REQUEST_ROOT = "(request)"
+
+
+def profiler_settings():
+    configured = getattr(settings, "GRAPHENE", {}).get("SQL_PROFILER", {})
+    return {"ENABLED": settings.DEBUG, "EXTENSIONS": settings.DEBUG, **DEFAULTS, **configured}
+
+
+def path_pattern(path):
+    return ".".join(str(key) for key in path.as_list() if not isinstance(key, int))
+
+
+class SQLProfile:
+    def __init__(self, config=None):
+        self.config = config or profiler_settings()
+        self._local = threading.local()
+        self.queries = []  # (path, sql, seconds)
+
+    @property
+    def path(self):
+        return getattr(self._local, "path", REQUEST_ROOT)
+
+    @path.setter
+    def path(self, value):
+        self._local.path = value
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((self.path, sql, time.perf_counter() - start))
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def report(self):
+        by_path = defaultdict(lambda: [0, 0.0])
+        statements = Counter()
+        for path, sql, seconds in self.queries:
+            by_path[path][0] += 1
+            by_path[path][1] += seconds
+            statements[(path, sql)] += 1
+
+        threshold = self.config["DUPLICATE_THRESHOLD"]
+        preview = self.config["SQL_PREVIEW_LENGTH"]
+        return {
+            "queries": len(self.queries),
+            "time": round(sum(seconds for _path, _sql, seconds in self.queries) * 1000, 3),
+            "resolvers": [
+                {"path": path, "queries": count, "time": round(seconds * 1000, 3)}
+                for path, (count, seconds) in sorted(by_path.items(), key=lambda item: -item[1][0])
+            ],
+            "duplicates": [
+                {"path": path, "sql": sql[:preview], "count": count}
+                for (path, sql), count in statements.most_common()
+                if count >= threshold
+            ],
+        }
+
+    def log_offenders(self, report, operation_name=None):
+        operation = operation_name or "anonymous operation"
+        if report["queries"] > self.config["MAX_QUERIES"]:
+            logger.warning(
+                "GraphQL %s ran %d SQL queries (%.1f ms)", operation, report["queries"], report["time"]
+            )
+        for duplicate in report["duplicates"]:
+            logger.warning(
+                "Possible N+1 in GraphQL %s: %s ran the same query %d times: %s",
+                operation,
+                duplicate["path"],
+                duplicate["count"],
+                duplicate["sql"],
+            )
+
+
+def start_profile(request):
+    """A new ``SQLProfile`` attached to ``request``, or None when profiling is off."""
+    config = profiler_settings()
+    if not config["ENABLED"]:
+        return None
+    request.sql_profile = SQLProfile(config)
+    return request.sql_profile
+
+
+class SQLProfilerMiddleware:
+    """Graphene middleware that records which field the request's ``SQLProfile`` is in."""
+
+    def resolve(self, next, root, info, **kwargs):
+        profile = getattr(info.context, "sql_profile", None)
+        if profile is not None:
+            profile.path = path_pattern(info.path)
+        return next(root, info, **kwargs)
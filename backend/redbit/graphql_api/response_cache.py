@@ -0,0 +1,176 @@
+"""
+Shared response cache for anonymous GraphQL queries.
+
+Logged-out users all see the same ``allPosts``, ``post``, ``communityBySlug``,
+``trendingCommunities`` and ``search`` results. A query is cached when:
+
+* the request carries no credentials (no session user, no JWT header/cookie),
+* the operation is a ``query`` and every root field is listed in ``FIELDS``.
+
+The key is built from the normalized document (``print_ast``), the operation
+name and the variables, plus a version number for each of its root fields.
+``INVALIDATING_MUTATIONS`` maps a mutation to the root fields whose results
+it changes, and running it bumps only their versions: a vote drops cached
+``allPosts``/``post`` responses but keeps ``communityBySlug`` and
+``search``. The TTL of a response is the smallest TTL of its root fields.
+
+Cached bodies hold ``data`` and ``errors`` only: the ``extensions`` of the
+request that filled the entry (cost, SQL profile, tracing) describe that
+request alone and are never shared.
+
+Each entry also stores an ETag. The view sends it with
+``Cache-Control: public`` and answers a matching ``If-None-Match`` with 304.
+The ETag is weak because the response that fills the entry carries its own
+extensions on top of the cached body.
+
+Settings: ``GRAPHENE["RESPONSE_CACHE"]`` (``ENABLED``, ``CACHE_ALIAS``,
+``FIELDS``, ``INVALIDATING_MUTATIONS``).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import FieldNode, OperationType, get_operation_ast, print_ast
+from graphql_jwt.utils import get_http_authorization
+
+DEFAULTS = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    # root query field -> TTL in seconds
+    "FIELDS": {
+        "allPosts": 30,
+        "post": 30,
+        "communityBySlug": 60,
+        "trendingCommunities": 120,
+        "search": 60,
+    },
+    # mutation -> root query fields whose cached responses it makes stale
+    "INVALIDATING_MUTATIONS": {
+        "createPost": ("allPosts", "post", "communityBySlug", "trendingCommunities", "search"),
+        "updatePost": ("allPosts", "post", "search"),
+        "deletePost": ("allPosts", "post", "communityBySlug", "trendingCommunities", "search"),
+        "createComment": ("allPosts", "post"),
+        "updateComment": ("allPosts", "post"),
+        "deleteComment": ("allPosts", "post"),
+        "vote": ("allPosts", "post"),
+        "createCommunity": ("communityBySlug", "trendingCommunities", "search"),
+        "joinCommunity": ("communityBySlug", "trendingCommunities"),
+        "updateCommunity": ("allPosts", "post", "communityBySlug", "trendingCommunities", "search"),
+    },
+}
+
+VERSION_KEY_PREFIX = "graphql:response:version:"
+
+
+def cache_settings():
+    configured = getattr(settings, "GRAPHENE", {}).get("RESPONSE_CACHE", {})
+    return {**DEFAULTS, **configured}
+
+
+def _store(config):
+    return caches[config["CACHE_ALIAS"]]
+
+
+def is_anonymous(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return False
+    return "HTTP_AUTHORIZATION" not in request.META and not get_http_authorization(request)
+
+
+def _root_fields(operation):
+    names = []
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return None  # fragments at the root are not worth analysing here
+        if selection.name.value != "__typename":
+            names.append(selection.name.value)
+    return names
+
+
+def _version_key(field):
+    return f"{VERSION_KEY_PREFIX}{field}"
+
+
+def current_versions(fields, config=None):
+    """Version of each root field in ``fields`` (one cache round trip once they exist)."""
+    config = config or cache_settings()
+    store = _store(config)
+    keys = {field: _version_key(field) for field in fields}
+    found = store.get_many(keys.values())
+    versions = {}
+    for field, key in keys.items():
+        if key not in found:
+            found[key] = store.get_or_set(key, 1, timeout=None)
+        versions[field] = found[key]
+    return versions
+
+
+def invalidate(fields=None, config=None):
+    """Drop the cached responses that contain any of ``fields`` (None: every cached field)."""
+    config = config or cache_settings()
+    store = _store(config)
+    for field in config["FIELDS"] if fields is None else fields:
+        try:
+            store.incr(_version_key(field))
+        except ValueError:
+            store.set(_version_key(field), 2, timeout=None)
+
+
+def invalidated_fields(operation):
+    """Root query fields whose cached responses a mutation ``operation`` changes (empty for anything else)."""
+    if operation is None or operation.operation != OperationType.MUTATION:
+        return set()
+    mutations = cache_settings()["INVALIDATING_MUTATIONS"]
+    fields = set()
+    for selection in operation.selection_set.selections:
+        if isinstance(selection, FieldNode):
+            fields.update(mutations.get(selection.name.value, ()))
+    return fields
+
+
+class CachedResponse:
+    def __init__(self, body, etag, ttl):
+        self.body = body
+        self.etag = etag
+        self.ttl = ttl
+
+
+class ResponseCache:
+    """
+    Cache lookups for one anonymous request (check ``is_anonymous`` first);
+    ``key`` is None when the operation is not cacheable.
+    """
+
+    def __init__(self, document, variables, operation_name):
+        self.config = cache_settings()
+        self.key = None
+        self.ttl = None
+        if not self.config["ENABLED"] or document is None:
+            return
+
+        operation = get_operation_ast(document, operation_name)
+        if operation is None or operation.operation != OperationType.QUERY:
+            return
+        fields = _root_fields(operation)
+        if not fields or any(name not in self.config["FIELDS"] for name in fields):
+            return
+
+        self.ttl = min(self.config["FIELDS"][name] for name in fields)
+        payload = json.dumps([print_ast(document), operation_name, variables or {}], sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        versions = current_versions(sorted(set(fields)), self.config)
+        version = ",".join(f"{field}={number}" for field, number in versions.items())
+        self.key = f"graphql:response:{version}:{digest}"
+
+    def get(self):
+        if self.key is None:
+            return None
+        return _store(self.config).get(self.key)
+
+    def set(self, body):
+        etag = 'W/"{}"'.format(hashlib.sha256(body.encode("utf-8")).hexdigest()[:32])
+        cached = CachedResponse(body, etag, self.ttl)
+        _store(self.config).set(self.key, cached, self.ttl)
+        return cached
@@ -1,46 +1,87 @@
 import graphene
 from apps.communities.models import Community
 from apps.posts.models import Post
+from apps.search import autocomplete as autocomplete_service
+from apps.search import services as search_service
 from apps.users.models import User
-from django.db import models
+from graphql import GraphQLError
 from graphql_api.communities.types import CommunityType
+from graphql_api.pagination import decode_cursor, encode_cursor, page_size
 from graphql_api.posts.types import PostType
 from graphql_api.users.types import UserType
 
+# result list -> (model, queryset used to load the matches)
+SEARCH_KINDS = {
+    "posts": (Post, lambda: Post.objects.select_related("author", "community")),
+    "communities": (Community, lambda: Community.objects.select_related("owner")),
+    "users": (User, lambda: User.objects.all()),
+}
+
+
+def search_page(model, query, first, after=None, queryset=None, offset=0, prefix=()):
+    """
+    One page of ranked search results. Every result gets a ``cursor`` holding
+    ``[*prefix, rank, document id]`` that can be passed back as ``after``.
+    """
+    cursor = None
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(prefix) + 2 or values[: len(prefix)] != list(prefix):
+            raise GraphQLError("Invalid cursor.")
+        try:
+            cursor = (float(values[-2]), int(values[-1]))
+        except (TypeError, ValueError):
+            raise GraphQLError("Invalid cursor.") from None
+
+    results = search_service.search(model, query, first, after=cursor, queryset=queryset, offset=offset)
+    for obj in results:
+        obj._cursor = encode_cursor([*prefix, *obj._search_key])
+    return results
+
 
 class SearchResultType(graphene.ObjectType):
     posts = graphene.List(PostType)
     communities = graphene.List(CommunityType)
     users = graphene.List(UserType)
 
+class AutocompleteResultType(graphene.ObjectType):
+    users = graphene.List(UserType)
+    communities = graphene.List(CommunityType)
+
 class SearchQuery(graphene.ObjectType):
+    # Ranked full-text search (apps.search). Passing the cursor of a result as `after`
+    # returns the next page of that result's list only.
     search = graphene.Field(
         SearchResultType,
         query=graphene.String(required=True),
-        limit=graphene.Int()
+        limit=graphene.Int(),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
+
+    # Typeahead on username and community name/slug (prefix match, cached per prefix)
+    autocomplete = graphene.Field(
+        AutocompleteResultType,
+        prefix=graphene.String(required=True),
+        kinds=graphene.List(graphene.String),  # "users", "communities"; both when omitted
+        limit=graphene.Int(),
     )
 
-    def resolve_search(self, info, query, limit=10):
-        # Search posts
-        posts = Post.objects.filter(
-            models.Q(title__icontains=query) | 
-            models.Q(content__icontains=query)
-        ).select_related('author', 'community')[:limit]
-        
-        # Search communities
-        communities = Community.objects.filter(
-            models.Q(name__icontains=query) | 
-            models.Q(description__icontains=query)
-        ).select_related('owner')[:limit]
-        
-        # Search users
-        users = User.objects.filter(
-            models.Q(username__icontains=query) | 
-            models.Q(bio__icontains=query)
-        )[:limit]
-        
-        return {
-            'posts': posts,
-            'communities': communities,
-            'users': users
-        }
+    def resolve_search(self, info, query, limit=10, first=None, after=None):
+        size = page_size(first or limit)
+        kinds = list(SEARCH_KINDS)
+        if after:
+            values = decode_cursor(after)
+            if not (values and isinstance(values[0], str) and values[0] in SEARCH_KINDS):
+                raise GraphQLError("Invalid cursor.")
+            kinds = [values[0]]
+
+        results = {}
+        for kind, (model, queryset) in SEARCH_KINDS.items():
+            results[kind] = []
+            if kind in kinds:
+                results[kind] = search_page(model, query, size, after=after, queryset=queryset(), prefix=(kind,))
+        return results
+
+    def resolve_autocomplete(self, info, prefix, kinds=None, limit=None):
+        return autocomplete_service.autocomplete(prefix, kinds=kinds or autocomplete_service.KINDS, limit=limit)
@@ -0,0 +1,60 @@
+import json
+import unittest
+from unittest import mock
+
+from apps.communities.models import Community
+from core import replicas
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from graphql_jwt.shortcuts import get_token
+
+COMMUNITY_QUERY = '{ communityBySlug(slug: "general") { id name } }'
+JOIN_MUTATION = 'mutation { joinCommunity(communityName: "general") { success } }'
+
+
+@unittest.skipUnless(settings.DATABASE_REPLICAS, "set DATABASE_REPLICA_URLS (the primary's own URL works)")
+@override_settings(
+    DATABASE_REPLICA_STICKY_SECONDS=60,
+    GRAPHQL_JWT={**getattr(settings, "GRAPHQL_JWT", {}), "JWT_ALGORITHM": "HS256", "JWT_SECRET_KEY": "x" * 32},
+)
+class ReadReplicaTests(TransactionTestCase):
+    """
+    Queries read from a replica until the user writes, then from the primary
+    (``core.replicas``). Replicas mirror ``default`` in tests, and this is a
+    TransactionTestCase so their connections see the committed rows.
+    """
+
+    databases = {"default", *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="reader", email="reader@example.com")
+        Community.objects.create(name="general", slug="general", owner=self.user)
+
+    def post(self, query, **headers):
+        return self.client.post("/graphql/", json.dumps({"query": query}), content_type="application/json", **headers)
+
+    def read_alias(self, query, **headers):
+        """Database the reads of ``query`` were routed to (None: the primary)."""
+        with mock.patch("core.replicas.read_from", wraps=replicas.read_from) as read_from:
+            response = self.post(query, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["communityBySlug"]["name"], "general")
+        (alias,), _ = read_from.call_args
+        return alias
+
+    def test_session_user_reads_own_writes(self):
+        self.client.force_login(self.user)
+        self.assertIn(self.read_alias(COMMUNITY_QUERY), settings.DATABASE_REPLICAS)
+
+        self.assertTrue(self.post(JOIN_MUTATION).json()["data"]["joinCommunity"]["success"])
+        self.assertIsNone(self.read_alias(COMMUNITY_QUERY))
+
+    def test_jwt_user_reads_own_writes(self):
+        headers = {"HTTP_AUTHORIZATION": f"JWT {get_token(self.user)}"}
+        self.assertIn(self.read_alias(COMMUNITY_QUERY, **headers), settings.DATABASE_REPLICAS)
+
+        self.assertTrue(self.post(JOIN_MUTATION, **headers).json()["data"]["joinCommunity"]["success"])
+        self.assertIsNone(self.read_alias(COMMUNITY_QUERY, **headers))
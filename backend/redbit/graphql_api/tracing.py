@@ -0,0 +1,165 @@
+"""
+Sampled per-resolver tracing in the Apollo tracing format (version 1).
+
+For a sampled request ``RedbitGraphQLView`` attaches a ``Trace`` to the
+request, records the parsing, validation and execution phases, and
+``TracingMiddleware`` records the start offset and duration of every
+resolver. The finished trace goes to the configured exporter and, when
+``EXTENSIONS`` is on, is also returned as ``extensions.tracing`` (the key
+Apollo tooling reads).
+
+Parsing and validation come from the document cache (``graphql_api.documents``),
+so on a cache hit "parsing" is just the lookup and "validation" only covers
+the per-request cost rule.
+
+Settings (``GRAPHENE["TRACING"]``): ``SAMPLE_RATE`` (0.0-1.0), ``EXTENSIONS``,
+``EXPORTER`` (dotted path to a class with ``export(trace, operation_name)``),
+``SLOWEST_RESOLVERS`` (how many resolvers the logging exporter lists).
+"""
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "SAMPLE_RATE": 0.0,
+    "EXTENSIONS": False,
+    "EXPORTER": "graphql_api.tracing.LoggingExporter",
+    "SLOWEST_RESOLVERS": 10,
+}
+PHASES = ("parsing", "validation", "execution")
+
+
+def tracing_settings():
+    configured = getattr(settings, "GRAPHENE", {}).get("TRACING", {})
+    return {**DEFAULTS, **configured}
+
+
+def _isoformat(moment):
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class Trace:
+    def __init__(self, config=None):
+        self.config = config or tracing_settings()
+        self.start_time = datetime.now(timezone.utc)
+        self.start = time.perf_counter_ns()
+        self.end = None
+        self.end_time = None
+        self.spans = {}  # phase -> (start, end) in perf_counter_ns
+        self.resolvers = []
+
+    @contextmanager
+    def span(self, name):
+        """Time a phase; a phase timed twice is extended to cover both."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            if name in self.spans:
+                start = min(start, self.spans[name][0])
+            self.spans[name] = (start, end)
+
+    def add_resolver(self, info, start, end):
+        self.resolvers.append(
+            {
+                "path": info.path.as_list(),
+                "parentType": info.parent_type.name,
+                "fieldName": info.field_name,
+                "returnType": str(info.return_type),
+                "startOffset": start - self.start,
+                "duration": end - start,
+            }
+        )
+
+    def finish(self):
+        self.end = time.perf_counter_ns()
+        self.end_time = datetime.now(timezone.utc)
+
+    def _phase(self, name):
+        start, end = self.spans.get(name, (self.start, self.start))
+        return {"startOffset": start - self.start, "duration": end - start}
+
+    def as_apollo(self):
+        return {
+            "version": 1,
+            "startTime": _isoformat(self.start_time),
+            "endTime": _isoformat(self.end_time),
+            "duration": self.end - self.start,
+            "parsing": self._phase("parsing"),
+            "validation": self._phase("validation"),
+            "execution": {**self._phase("execution"), "resolvers": self.resolvers},
+        }
+
+
+class LoggingExporter:
+    """Logs one JSON line per trace: phase durations and the slowest resolvers (ms)."""
+
+    def __init__(self, config=None):
+        self.config = config or tracing_settings()
+
+    def export(self, trace, operation_name=None):
+        slowest = sorted(trace["execution"]["resolvers"], key=lambda resolver: -resolver["duration"])
+        summary = {
+            "operation": operation_name,
+            "duration": trace["duration"] / 1e6,
+            **{phase: trace[phase]["duration"] / 1e6 for phase in PHASES},
+            "slowest": [
+                {"path": ".".join(str(key) for key in resolver["path"]), "duration": resolver["duration"] / 1e6}
+                for resolver in slowest[: self.config["SLOWEST_RESOLVERS"]]
+            ],
+        }
+        logger.info("GraphQL trace %s", json.dumps(summary))
+
+
+_exporters = {}
+
+
+def get_exporter(config):
+    path = config["EXPORTER"]
+    if path not in _exporters:
+        _exporters[path] = import_string(path)(config)
+    return _exporters[path]
+
+
+def start_trace(request):
+    """A new ``Trace`` attached to ``request`` if this request is sampled, else None."""
+    config = tracing_settings()
+    rate = config["SAMPLE_RATE"]
+    if rate <= 0 or random.random() >= rate:
+        return None
+    request.graphql_trace = Trace(config)
+    return request.graphql_trace
+
+
+def finish_trace(trace, operation_name=None):
+    """Finish ``trace``, export it and return the Apollo tracing payload."""
+    trace.finish()
+    payload = trace.as_apollo()
+    try:
+        get_exporter(trace.config).export(payload, operation_name)
+    except Exception:
+        logger.warning("Exporting a GraphQL trace failed", exc_info=True)
+    return payload
+
+
+class TracingMiddleware:
+    """Graphene middleware that times each resolver of a sampled request."""
+
+    def resolve(self, next, root, info, **kwargs):
+        trace = getattr(info.context, "graphql_trace", None)
+        if trace is None:
+            return next(root, info, **kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return next(root, info, **kwargs)
+        finally:
+            trace.add_resolver(info, start, time.perf_counter_ns())
@@ -7,6 +7,7 @@ from graphql_jwt.decorators import login_required
 
 from .types import UserType
 from apps.notifications.services import create_notification
+from apps.posts import timelines
 from apps.notifications.models import Notification
 
 User = get_user_model()
@@ -175,6 +176,7 @@ class FollowUser(graphene.Mutation):
                 message=f"{current_user.username} started following you.",
                 related_object=current_user
             )
+        timelines.invalidate(current_user.id)
         
         return FollowUser(
             success=True,
@@ -1,6 +1,7 @@
 import graphene
 from apps.users.models import User
 from graphene_django import DjangoObjectType
+from graphql_api.loaders import UserFollowerCountLoader, UserFollowingCountLoader, UserIsFollowingLoader, load
 
 
 class UserType(DjangoObjectType):
@@ -8,6 +9,7 @@ class UserType(DjangoObjectType):
     follower_count = graphene.Int()
     following_count = graphene.Int()
     is_following = graphene.Boolean()
+    cursor = graphene.String()  # ส่งกลับมาเป็น `after` เพื่อขอหน้าถัดไป
     
     class Meta:
         model = User
@@ -18,20 +20,23 @@ class UserType(DjangoObjectType):
             "date_joined", "last_seen", "is_online"
         )
     
+    def resolve_cursor(self, info):
+        return getattr(self, "_cursor", None)
+
     def resolve_total_karma(self, info):
         return self.total_karma
     
     def resolve_follower_count(self, info):
-        return self.follower_count
+        return load(info, UserFollowerCountLoader, self.pk)
     
     def resolve_following_count(self, info):
-        return self.following_count
+        return load(info, UserFollowingCountLoader, self.pk)
     
     def resolve_is_following(self, info):
         user = info.context.user
         if not user.is_authenticated:
             return False
-        return self.followers.filter(id=user.id).exists()
+        return load(info, UserIsFollowingLoader, self.pk)
 
 class UserSettingsType(graphene.ObjectType):
     notifications_enabled = graphene.Boolean()
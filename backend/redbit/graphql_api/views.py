@@ -0,0 +1,372 @@
+import time
+from contextlib import nullcontext
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from core import metrics, replicas
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, validate, validate_schema
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.shortcuts import get_user_by_token
+from graphql_jwt.utils import get_http_authorization
+
+from . import persisted_queries, profiling, response_cache, tracing
+from .cost import CostReport, query_cost_rule
+from .documents import document_cache
+from .execution import ThreadedRootExecutionContext
+
+
+class PreparedExecution:
+    """A parsed and validated operation, ready for ``execute()``."""
+
+    def __init__(self, schema, document, operation_ast, variables, operation_name):
+        self.schema = schema
+        self.document = document
+        self.operation_ast = operation_ast
+        self.variables = variables
+        self.operation_name = operation_name
+
+    @property
+    def is_mutation(self):
+        return self.operation_ast is not None and self.operation_ast.operation == OperationType.MUTATION
+
+
+class RedbitGraphQLView(GraphQLView):
+    """
+    GraphQL endpoint with query cost/depth limits (see ``graphql_api.cost``),
+    automatic persisted queries (see ``graphql_api.persisted_queries``),
+    cached parsing/validation (see ``graphql_api.documents``), a shared
+    response cache for anonymous queries (see ``graphql_api.response_cache``),
+    SQL profiling per resolver (see ``graphql_api.profiling``), sampled
+    Apollo tracing (see ``graphql_api.tracing``) and query reads from read
+    replicas (see ``core.replicas``).
+
+    Django creates a view instance per request, so per-request state such as
+    ``extensions`` lives on ``self``. Everything put in ``extensions`` is
+    returned under the ``extensions`` key of the response.
+    """
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        self.operation_type, self.operation_name = "unknown", metrics.OTHER_OPERATION
+        trace = tracing.start_trace(request) if query else None
+        try:
+            return self.execute_document(request, query, variables, operation_name, show_graphiql, trace)
+        finally:
+            self.finish_trace(trace, operation_name)
+
+    def finish_trace(self, trace, operation_name):
+        if trace is not None:
+            payload = tracing.finish_trace(trace, operation_name)
+            if trace.config["EXTENSIONS"]:
+                self.extensions["tracing"] = payload
+
+    def execute_document(self, request, query, variables, operation_name, show_graphiql=False, trace=None):
+        prepared = self.prepare_execution(request, query, variables, operation_name, show_graphiql, trace)
+        if not isinstance(prepared, PreparedExecution):
+            return prepared
+        return self.run_execution(request, prepared, trace)
+
+    def run_execution(self, request, prepared, trace=None):
+        profile = profiling.start_profile(request)
+        try:
+            with profile.capture() if profile else nullcontext(), trace.span("execution") if trace else nullcontext():
+                result = self.execute_prepared(request, prepared)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        return self.finish_execution(request, prepared, profile, result)
+
+    def prepare_execution(self, request, query, variables, operation_name, show_graphiql=False, trace=None):
+        """
+        Everything ``GraphQLView.execute_graphql_request`` does before ``execute()``,
+        except that the document and the result of the standard validation rules
+        come from the document cache. Returns a ``PreparedExecution``, or the
+        ``ExecutionResult`` (None for GraphiQL) to respond with instead.
+        """
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        document, errors = document_cache.get(schema, query, trace.spans if trace else None)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is not None:
+            self.operation_type = operation_ast.operation.value
+            self.operation_name = metrics.operation_label(operation_ast)
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    f"Can only perform a {operation_ast.operation.value} operation from a POST request.",
+                )
+            )
+
+        # the cost depends on the variables, so it is checked on every request
+        self.cost_report = CostReport()
+        with trace.span("validation") if trace else nullcontext():
+            errors = validate(schema, document, [query_cost_rule(variables, operation_name, self.cost_report)])
+        if self.cost_report.cost is not None:
+            self.extensions["cost"] = self.cost_report.as_extension()
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        return PreparedExecution(schema, document, operation_ast, variables, operation_name)
+
+    def execute_options(self, request, prepared):
+        options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": prepared.variables,
+            "operation_name": prepared.operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            options["execution_context_class"] = self.execution_context_class
+        return options
+
+    def execute_prepared(self, request, prepared):
+        options = self.execute_options(request, prepared)
+        if prepared.is_mutation and (
+            graphene_settings.ATOMIC_MUTATIONS is True
+            or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+        ):
+            with transaction.atomic():
+                result = execute(prepared.schema, prepared.document, **options)
+                if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                    transaction.set_rollback(True)
+            return result
+        with replicas.read_from(self.read_alias(request, prepared)):
+            return execute(prepared.schema, prepared.document, **options)
+
+    def read_alias(self, request, prepared):
+        """Database to read from: a replica for queries (see ``core.replicas``), None for the primary."""
+        if prepared.is_mutation or not settings.DATABASE_REPLICAS:
+            return None
+        return replicas.choose_replica(self.request_user(request))
+
+    def request_user(self, request):
+        """
+        ``request.user``, or the user of the request's JWT. graphql_jwt's
+        middleware only authenticates inside resolvers, after the replica is
+        chosen; the user found here is kept on the request so it skips that.
+        """
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user
+        token = get_http_authorization(request)
+        if not token:
+            return user
+        try:
+            token_user = get_user_by_token(token, request)
+        except JSONWebTokenError:
+            return user  # the middleware reports the bad token
+        if token_user is None:
+            return user
+        request.user = token_user
+        return token_user
+
+    def finish_execution(self, request, prepared, profile, result):
+        if profile is not None:
+            report = profile.report()
+            profile.log_offenders(report, prepared.operation_name)
+            if profile.config["EXTENSIONS"]:
+                self.extensions["sql"] = report
+        stale_fields = response_cache.invalidated_fields(prepared.operation_ast)
+        if stale_fields:
+            response_cache.invalidate(stale_fields)
+        if prepared.is_mutation:
+            # the user's next reads go to the primary until the replicas have the write
+            replicas.pin_to_primary(getattr(request, "user", None))
+        self.execution_errors = bool(result.errors)
+        return result
+
+    def get_response(self, request, data, show_graphiql=False):
+        data, response, cache = self.lookup_response(request, data, show_graphiql)
+        if response is not None:
+            return response
+
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = self.execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        return self.encode_response(request, execution_result, id, show_graphiql, cache)
+
+    def lookup_response(self, request, data, show_graphiql=False):
+        """
+        Resolve a persisted query and look the request up in the response cache.
+        Returns ``(data, response, cache)``; ``response`` is a ready
+        ``(body, status)`` for APQ errors and cache hits, else None.
+        """
+        try:
+            data = persisted_queries.resolve(request, data)
+        except persisted_queries.PersistedQueryError as error:
+            # APQ clients expect a miss as a regular GraphQL error with status 200
+            return data, (self.json_encode(request, {"errors": [self.format_error(error)]}), error.status), None
+
+        cache = None
+        if not show_graphiql and not request.GET.get("pretty") and response_cache.is_anonymous(request):
+            query, variables, operation_name, _id = self.get_graphql_params(request, data)
+            if query:
+                document, errors = document_cache.get(self.schema.graphql_schema, query)
+                cache = response_cache.ResponseCache(None if errors else document, variables, operation_name)
+                self.cached_response = cache.get()
+                if self.cached_response is not None:
+                    operation_ast = get_operation_ast(document, operation_name)
+                    self.operation_type, self.operation_name = "query", metrics.operation_label(operation_ast)
+                    return data, (self.cached_response.body, 200), cache
+        return data, None, cache
+
+    def encode_response(self, request, execution_result, id=None, show_graphiql=False, cache=None):
+        # same as the second half of GraphQLView.get_response, plus storing the response in the cache
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if not execution_result:
+            return None, status_code
+
+        response = {}
+        if execution_result.errors:
+            set_rollback()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+        if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        result = self.json_encode(request, response, pretty=show_graphiql)
+        if cache is not None and cache.key and status_code == 200 and not self.execution_errors:
+            # the shared body leaves out this request's extensions (cost, sql, tracing)
+            self.cached_response = cache.set(super().json_encode(request, response))
+        return result, status_code
+
+    def dispatch(self, request, *args, **kwargs):
+        start = self.start_request()
+        response = super().dispatch(request, *args, **kwargs)
+        return self.finish_response(request, response, start)
+
+    def start_request(self):
+        self.extensions = {}
+        self.cached_response = None
+        self.execution_errors = True
+        self.operation_type = self.operation_name = None
+        return time.perf_counter()
+
+    def finish_response(self, request, response, start):
+        if self.operation_type is not None:
+            metrics.observe_operation(self.operation_type, self.operation_name, time.perf_counter() - start)
+            metrics.record_pool_usage()
+            metrics.record_document_cache()
+
+        cached = self.cached_response
+        if cached is not None:
+            if cached.etag in parse_etags(request.headers.get("If-None-Match", "")):
+                response = HttpResponseNotModified()
+            response["ETag"] = cached.etag
+            response["Cache-Control"] = f"public, max-age={cached.ttl}"
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    def json_encode(self, request, d, pretty=False):
+        # every GraphQL response body goes through here (graphene builds it in get_response)
+        if self.extensions and isinstance(d, dict):
+            d = {**d, "extensions": {**d.get("extensions", {}), **self.extensions}}
+        return super().json_encode(request, d, pretty)
+
+
+class AsyncRedbitGraphQLView(RedbitGraphQLView):
+    """
+    ``RedbitGraphQLView`` as a native async view, so daphne keeps a request
+    on the event loop instead of holding a thread for it from start to end.
+
+    Only blocking work leaves the loop: the APQ/response cache lookup and
+    the response encoding run in a thread, each root field of a query runs
+    in its own worker thread so independent fields resolve concurrently (see
+    ``graphql_api.execution``), and a mutation runs serially in one thread
+    inside its transaction. GraphiQL and batched requests take the
+    synchronous path.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() not in ("get", "post"):
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        start = self.start_request()
+        if hasattr(request, "user"):
+            # load the session user once instead of in every resolver thread
+            # (request.auser() needs aget_user(), which graphql_jwt's backend lacks)
+            request.user = await sync_to_async(get_user)(request)
+        try:
+            data = self.parse_body(request)
+            if self.batch or (self.graphiql and self.can_display_graphiql(request, data)):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+            result, status_code = await self.aget_response(request, data)
+            response = HttpResponse(status=status_code, content=result, content_type="application/json")
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+        return self.finish_response(request, response, start)
+
+    async def aget_response(self, request, data):
+        data, response, cache = await sync_to_async(self.lookup_response)(request, data)
+        if response is not None:
+            return response
+
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = await self.aexecute_graphql_request(request, query, variables, operation_name)
+        return await sync_to_async(self.encode_response)(request, execution_result, id, False, cache)
+
+    async def aexecute_graphql_request(self, request, query, variables, operation_name):
+        self.operation_type, self.operation_name = "unknown", metrics.OTHER_OPERATION
+        trace = tracing.start_trace(request) if query else None
+        try:
+            return await self.aexecute_document(request, query, variables, operation_name, trace)
+        finally:
+            self.finish_trace(trace, operation_name)
+
+    async def aexecute_document(self, request, query, variables, operation_name, trace=None):
+        # parsing and validation come from the document cache, so this runs on the loop
+        prepared = self.prepare_execution(request, query, variables, operation_name, trace=trace)
+        if not isinstance(prepared, PreparedExecution):
+            return prepared
+        if prepared.is_mutation:
+            return await sync_to_async(self.run_execution)(request, prepared, trace)
+
+        # the sticky-primary check reads the cache, so it leaves the loop (only when there are replicas)
+        alias = await sync_to_async(self.read_alias)(request, prepared) if settings.DATABASE_REPLICAS else None
+        profile = profiling.start_profile(request)
+        options = {**self.execute_options(request, prepared), "execution_context_class": ThreadedRootExecutionContext}
+        try:
+            with trace.span("execution") if trace else nullcontext(), replicas.read_from(alias):
+                result = execute(prepared.schema, prepared.document, **options)
+                if isawaitable(result):
+                    result = await result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        return self.finish_execution(request, prepared, profile, result)
@@ -23,6 +23,8 @@ from graphql_api.routing import websocket_urlpatterns
 from graphql_api.middleware import JWTAuthMiddlewareStack
 
 application = ProtocolTypeRouter({
+    # /graphql/ is an async view (graphql_api.views.AsyncRedbitGraphQLView), so Django's
+    # ASGI handler runs it on the event loop without a thread per request
     "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
         JWTAuthMiddlewareStack(
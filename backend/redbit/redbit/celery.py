@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from core import metrics
 
 # ตั้งค่า default Django settings module สำหรับ 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "redbit.settings.local")  # หรือ base ตามที่คุณใช้
@@ -15,6 +16,9 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # โหลด task modules จากทุก registered Django app configs.
 app.autodiscover_tasks()
 
+# Prometheus: เวลาของแต่ละ task และ HTTP server สำหรับ metrics ของ worker (ดู core.metrics)
+metrics.connect_celery_signals()
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
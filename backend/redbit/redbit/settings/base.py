@@ -102,6 +102,59 @@ DATABASES = {
     "default": env.db("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}")  # type: ignore
 }
 
+# Read replica (คั่นด้วย comma): GraphQL query อ่านจาก replica, mutation และงานอื่นทั้งหมดใช้ default
+# เพิ่ม replica = เพิ่ม URL, ตอนเทสต์ทุกตัว mirror default
+# จึงใช้ฐานข้อมูล local ตัวที่สอง (หรือ URL เดียวกับ default) แทน replica จริงได้
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    DATABASES[f"replica_{_index}"] = {**env.db_url_config(_url), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica_{_index}")
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+# วินาทีหลัง mutation ที่ผู้ใช้คนนั้นยังอ่านจาก default (อ่านสิ่งที่ตัวเองเพิ่งเขียนได้แม้ replica ยังตามไม่ทัน)
+DATABASE_REPLICA_STICKY_SECONDS = env.int("DATABASE_REPLICA_STICKY_SECONDS", default=5)
+
+# Connection pool ของ psycopg 3 (Django >= 5.1) สำหรับ PostgreSQL: request, database_sync_to_async
+# และ Celery task ยืม connection ที่เปิดไว้แล้วแทนการเปิดใหม่ทุกครั้ง
+# pool มีต่อ process ต่อฐานข้อมูล ขนาด default ตามบทบาทของ process (PROCESS_ROLE ตั้งใน docker-compose):
+# - web: daphne ใช้หลาย thread พร้อมกัน (request, root field ของ async view, Channels)
+# - worker: Celery prefork รันทีละ task ต่อ process
+# - beat: แทบไม่ใช้ฐานข้อมูล
+PROCESS_ROLE = env("PROCESS_ROLE", default="web")
+DB_POOL_SIZES = {"web": (2, 20), "worker": (1, 2), "beat": (0, 1)}  # (min_size, max_size)
+_pool_min, _pool_max = DB_POOL_SIZES.get(PROCESS_ROLE, DB_POOL_SIZES["web"])
+
+for _database in DATABASES.values():
+    if env.bool("DB_POOL", default=True) and _database["ENGINE"] == "django.db.backends.postgresql":
+        _database["OPTIONS"] = {
+            **_database.get("OPTIONS", {}),
+            "pool": {
+                "min_size": env.int("DB_POOL_MIN_SIZE", default=_pool_min),
+                "max_size": env.int("DB_POOL_MAX_SIZE", default=_pool_max),
+                # วินาทีที่รอ connection ว่างได้ก่อน error (เวลารอดูได้จาก metrics redbit_db_pool_*)
+                "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+                # connection ที่ว่างนานเกินนี้ (วินาที) ถูกปิดจนเหลือ min_size
+                "max_idle": env.float("DB_POOL_MAX_IDLE", default=300.0),
+            },
+        }
+    else:
+        # ไม่มี pool (SQLite หรือ DB_POOL=False): ใช้ connection ซ้ำต่อ thread ได้ถ้าตั้ง DB_CONN_MAX_AGE
+        _database["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=0)
+
+    # health check: ตรวจ connection ก่อนใช้ (ใน pool คือ ConnectionPool.check_connection)
+    # ตัวที่หลุดแล้วถูกทิ้งและเปิดใหม่
+    _database["CONN_HEALTH_CHECKS"] = True
+
+# Full-text search (apps.search.backends)
+# ถ้าไม่ตั้งไว้จะเลือกตามฐานข้อมูล: PostgreSQL ใช้ tsvector + GIN, SQLite ใช้ FTS5
+SEARCH_BACKEND = env("SEARCH_BACKEND", default=None)
+
+# Prometheus (core.metrics): /metrics ต้องส่ง header "Authorization: Bearer <token>"
+# ถ้าไม่ตั้งไว้ /metrics เปิดเฉพาะตอน DEBUG
+METRICS_TOKEN = env("METRICS_TOKEN", default=None)
+# ชื่อ operation ที่ใช้เป็น label ของ metrics ได้ตรงๆ (ชื่อมาจาก client จึงต้องจำกัด)
+# operation อื่นใช้ชื่อ root field ถ้ามีตัวเดียว นอกนั้นเป็น "other"
+METRICS_OPERATION_NAMES = env.list("METRICS_OPERATION_NAMES", default=[])
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -48,7 +48,42 @@ AUTHENTICATION_BACKENDS = [
 ]
 GRAPHENE = {
     "SCHEMA": "redbit.graphql_api.schema.schema",
-    "MIDDLEWARE": ("graphql_jwt.middleware.JSONWebTokenMiddleware",),
+    "MIDDLEWARE": (
+        "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "graphql_api.loaders.DataLoaderMiddleware",
+        "graphql_api.profiling.SQLProfilerMiddleware",
+        "graphql_api.tracing.TracingMiddleware",
+    ),
+    # Documents over these limits are rejected before execution (see graphql_api.cost)
+    "QUERY_COST": {
+        "MAX_COST": env.int("GRAPHQL_MAX_COST", default=10000),
+        "MAX_DEPTH": env.int("GRAPHQL_MAX_DEPTH", default=10),
+        "MAX_LIST_SIZE": 100,
+    },
+    # Per-process LRU of parsed and validated documents (see graphql_api.documents)
+    "DOCUMENT_CACHE": {
+        "MAX_SIZE": env.int("GRAPHQL_DOCUMENT_CACHE_SIZE", default=1000),
+    },
+    # Shared cache of anonymous responses for public queries (see graphql_api.response_cache)
+    "RESPONSE_CACHE": {
+        "ENABLED": env.bool("GRAPHQL_RESPONSE_CACHE", default=True),
+    },
+    # Query count / N+1 report per resolver path, logged and returned in extensions.sql (see graphql_api.profiling)
+    "SQL_PROFILER": {
+        "ENABLED": env.bool("GRAPHQL_SQL_PROFILER", default=DEBUG),
+        "EXTENSIONS": env.bool("GRAPHQL_SQL_PROFILER_EXTENSIONS", default=DEBUG),
+        "DUPLICATE_THRESHOLD": 5,
+        "MAX_QUERIES": 50,
+    },
+    # Sampled Apollo tracing of parse/validate/execute and every resolver (see graphql_api.tracing)
+    "TRACING": {
+        "SAMPLE_RATE": env.float("GRAPHQL_TRACING_SAMPLE_RATE", default=0.0),
+        "EXTENSIONS": env.bool("GRAPHQL_TRACING_EXTENSIONS", default=DEBUG),
+    },
+    # Automatic persisted queries, stored in the default (Redis) cache (see graphql_api.persisted_queries)
+    "PERSISTED_QUERIES": {
+        "TTL": env.int("GRAPHQL_PERSISTED_QUERY_TTL", default=30 * 24 * 60 * 60),
+    },
 }
 
 SITE_ID = 1
@@ -96,6 +131,32 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+# tasks/ อยู่นอก INSTALLED_APPS จึงต้อง import ให้ worker รู้จักเอง
+CELERY_METRICS_PORT = env.int("CELERY_METRICS_PORT", default=9808)  # port ของ metrics server ใน worker (0 = ปิด)
+CELERY_IMPORTS = ("tasks.notifications", "tasks.email", "tasks.feeds")
+# community ที่มีสมาชิกมากกว่านี้จะใช้ fan-out-on-read ใน home feed (ดู apps.posts.timelines)
+HOME_FEED_FANOUT_LIMIT = env.int("HOME_FEED_FANOUT_LIMIT", default=10000)
+# วินาทีที่รวม notification ต่อผู้รับก่อนเขียน (latency สูงสุดของการแจ้งเตือน, 0 = ส่งทันทีไม่รวม)
+NOTIFICATION_COALESCE_SECONDS = env.int("NOTIFICATION_COALESCE_SECONDS", default=5)
+CELERY_BEAT_SCHEDULE = {
+    "refresh-hot-scores": {
+        "task": "tasks.notifications.refresh_hot_scores",
+        "schedule": datetime.timedelta(minutes=5),
+    },
+    "prune-vote-rollups": {
+        "task": "tasks.notifications.prune_vote_rollups",
+        "schedule": datetime.timedelta(hours=1),
+    },
+    # ปกติ flush ถูกตั้งโดย event แรกของ window อันนี้เก็บตกกรณี task หาย
+    "flush-notifications": {
+        "task": "tasks.notifications.flush_notifications",
+        "schedule": datetime.timedelta(minutes=1),
+    },
+    "reconcile-unread-counts": {
+        "task": "tasks.notifications.reconcile_unread_counts",
+        "schedule": datetime.timedelta(minutes=15),
+    },
+}
 
 # Django Channels Configuration
 ASGI_APPLICATION = "redbit.asgi.application"
@@ -20,14 +20,16 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+from core.metrics import metrics_view
 from graphql_api.schema import schema
+from graphql_api.views import AsyncRedbitGraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("allauth.urls")),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(schema=schema, graphiql=True))),
+    path("graphql/", csrf_exempt(AsyncRedbitGraphQLView.as_view(schema=schema, graphiql=True))),
     path("social/", include("apps.users.urls")),
+    path("metrics", metrics_view),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,18 @@
+from celery import shared_task
+
+
+@shared_task
+def fanout_post_task(post_id):
+    """
+    Push a new post into the home timelines of the author's followers and
+    the members of its community (fan-out-on-write).
+    """
+    from apps.posts import timelines
+    from apps.posts.models import Post
+
+    try:
+        post = Post.objects.only("id", "author_id", "community_id", "created_at").get(pk=post_id)
+    except Post.DoesNotExist:
+        return 0
+
+    return timelines.fanout_post(post)
@@ -1,71 +1,135 @@
+import logging
+
 from celery import shared_task
-from django.contrib.contenttypes.models import ContentType
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_notifications():
+    """
+    Write every buffered notification event of the coalescing window with one
+    bulk insert (see apps.notifications.coalescing). Scheduled by the first
+    event of a window; also run by Celery Beat in case a flush was lost.
+    """
+    from apps.notifications import coalescing
+
+    return coalescing.flush()
+
+
+@shared_task
+def deliver_notifications_task(events):
+    """
+    Write notification events right away, without buffering (no Redis, or
+    NOTIFICATION_COALESCE_SECONDS = 0).
+    """
+    from apps.notifications import coalescing
+
+    try:
+        return len(coalescing.deliver(events))
+    except Exception as e:
+        # Log error but don't fail the main request
+        logger.exception("Error creating notifications: %s", e)
+        return 0
 
 
 @shared_task
 def create_notification_task(recipient_id, sender_id, notification_type, message, content_type_id=None, object_id=None):
     """
     Celery task to create a notification asynchronously.
+    Kept for tasks queued before notifications were coalesced.
     """
-    from apps.notifications.models import Notification
     from django.contrib.auth import get_user_model
-    from channels.layers import get_channel_layer
-    from asgiref.sync import async_to_sync
-    
+
     User = get_user_model()
-    
+    sender = User.objects.filter(id=sender_id).only("id", "username").first() if sender_id else None
+    event = {
+        "recipient_id": recipient_id,
+        "sender_id": sender_id,
+        "sender_name": sender.username if sender else None,
+        "notification_type": notification_type,
+        "message": message,
+        "content_type_id": content_type_id,
+        "object_id": object_id,
+    }
+    return deliver_notifications_task(events=[event])
+
+
+@shared_task
+def reconcile_unread_counts():
+    """
+    Periodic (Celery Beat) correction of the Redis unread-notification
+    counters against the notifications table.
+    """
+    from apps.notifications import unread
+
+    return unread.reconcile()
+
+
+@shared_task
+def update_post_score(post_id):
+    """
+    Recompute the stored hot score of a single post after its votes changed.
+    """
+    from apps.posts import feed_cache
+    from apps.posts.models import Post
+    from apps.posts.ranking import compute_hot_score
+
     try:
-        recipient = User.objects.get(id=recipient_id)
-        sender = User.objects.get(id=sender_id) if sender_id else None
-        
-        # Don't create notification if sender and recipient are the same
-        if recipient == sender:
-            return None
-        
-        content_type = None
-        if content_type_id:
-            content_type = ContentType.objects.get(id=content_type_id)
-        
-        notification = Notification.objects.create(
-            recipient=recipient,
-            sender=sender,
-            notification_type=notification_type,
-            message=message,
-            content_type=content_type,
-            object_id=object_id
-        )
-        
-        # Publish notification to Channels for real-time delivery
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            async_to_sync(channel_layer.group_send)(
-                f"user_{recipient_id}_notifications",
-                {
-                    "type": "notification_message",
-                    "notification": {
-                        "id": str(notification.id),
-                        "message": notification.message,
-                        "notificationType": notification.notification_type,
-                        "isRead": notification.is_read,
-                        "createdAt": notification.created_at.isoformat(),
-                        "sender": {
-                            "id": str(sender.id) if sender else None,
-                            "username": sender.username if sender else None,
-                        } if sender else None,
-                    }
-                }
-            )
-        
-        return notification.id
-    except Exception as e:
-        # Log error but don't fail the main request
-        print(f"Error creating notification: {e}")
+        post = Post.objects.only("id", "community_id", "upvotes", "created_at").get(pk=post_id)
+    except Post.DoesNotExist:
         return None
 
+    post.hot_score = compute_hot_score(post.upvotes, post.created_at)
+    Post.objects.filter(pk=post_id).update(hot_score=post.hot_score)
+    feed_cache.update_post(post, sorts=("hot",))
+    return post.hot_score
+
 
 @shared_task
-def update_post_score(post_id):
+def refresh_hot_scores(batch_size=1000):
     """
-    Update hot score for posts
+    Periodic (Celery Beat) sweep that applies time decay to hot scores.
+    Only posts inside HOT_SCORE_WINDOW are recomputed; older posts are
+    zeroed once so they drop out of the hot feed.
     """
-    pass
+    from apps.posts import feed_cache
+    from apps.posts.models import Post
+    from apps.posts.ranking import HOT_SCORE_WINDOW, compute_hot_score
+    from django.utils import timezone
+
+    now = timezone.now()
+    cutoff = now - HOT_SCORE_WINDOW
+
+    expired = Post.objects.filter(created_at__lt=cutoff).exclude(hot_score=0).update(hot_score=0)
+
+    refreshed = 0
+    batch = []
+    recent = Post.objects.filter(created_at__gte=cutoff).only("id", "upvotes", "created_at")
+    for post in recent.iterator(chunk_size=batch_size):
+        post.hot_score = compute_hot_score(post.upvotes, post.created_at, now=now)
+        batch.append(post)
+        if len(batch) >= batch_size:
+            refreshed += Post.objects.bulk_update(batch, ["hot_score"])
+            batch = []
+    if batch:
+        refreshed += Post.objects.bulk_update(batch, ["hot_score"])
+
+    # every hot score moved, so cached hot feeds are rebuilt lazily on next read
+    feed_cache.invalidate("hot")
+
+    return {"refreshed": refreshed, "expired": expired}
+
+
+@shared_task
+def prune_vote_rollups():
+    """
+    Periodic (Celery Beat) cleanup of hourly vote rollups that are older
+    than the longest top window and no longer read by any feed.
+    """
+    from apps.posts.ranking import VOTE_ROLLUP_RETENTION
+    from apps.votes.models import VoteRollup
+    from django.utils import timezone
+
+    deleted, _ = VoteRollup.objects.filter(bucket__lt=timezone.now() - VOTE_ROLLUP_RETENTION).delete()
+    return deleted